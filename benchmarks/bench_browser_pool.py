@@ -0,0 +1,116 @@
+"""Measure page throughput of BrowserPool at several pool sizes
+
+Usage:
+    python benchmarks/bench_browser_pool.py [--pages N] [--sizes 1,2,4] [--delay S]
+
+Serves N generated pages from a local HTTP server; each page's HTML is
+held back --delay seconds to stand in for network latency. For every pool
+size, as many worker threads as browsers lease a session, load a page,
+extract its text and return the browser, until all pages are done.
+Chrome startup is timed separately from the page loads.
+Requires Chrome; Selenium Manager resolves the driver.
+"""
+import argparse
+import http.server
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.browser_pool import BrowserPool
+
+
+def write_fixture(directory, pages):
+    for i in range(pages):
+        paragraphs = "".join(f"<p>Paragraph {j} of page {i}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>"
+                             for j in range(10))
+        links = "".join(f'<a href="page{(i + k) % pages}.html">Page {(i + k) % pages}</a> ' for k in range(1, 6))
+        with open(os.path.join(directory, f"page{i}.html"), "w") as f:
+            f.write(f"<!DOCTYPE html><html><head><title>Page {i}</title></head><body>"
+                    f"<nav>{links}</nav><article><h1>Page {i}</h1>{paragraphs}</article></body></html>")
+
+
+def serve(directory, delay):
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(size, urls):
+    pool = BrowserPool(size=size)
+    try:
+        # Start every browser up front so page throughput isn't mixed with Chrome startup
+        start = time.perf_counter()
+        leases = [pool.lease(f"warmup-{i}") for i in range(size)]
+        for lease in leases:
+            lease.release()
+        startup = time.perf_counter() - start
+
+        pending = queue.Queue()
+        for url in urls:
+            pending.put(url)
+        failures = []
+
+        def worker(index):
+            while True:
+                try:
+                    url = pending.get_nowait()
+                except queue.Empty:
+                    return
+                with pool.session(f"worker-{index}") as browser:
+                    success, _ = browser.navigate_to(url)
+                    if not success or not browser.extract_main_text():
+                        failures.append(url)
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(size)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stats = pool.get_stats()
+        print(f"{size:>5} {startup:>10.2f} {elapsed:>8.2f} {len(urls) / elapsed:>8.2f} "
+              f"{stats['avg_wait'] * 1000:>10.1f} {stats['recycled']:>9} {len(failures):>8}")
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--sizes", default="1,2,4", help="comma separated pool sizes")
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds each page's HTML is held back")
+    args = parser.parse_args()
+
+    fixture_dir = tempfile.mkdtemp(prefix="bench_pool_")
+    write_fixture(fixture_dir, args.pages)
+    server = serve(fixture_dir, args.delay)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page{i}.html" for i in range(args.pages)]
+
+    print(f"{args.pages} pages, {args.delay}s server delay")
+    print(f"{'size':>5} {'startup s':>10} {'pages s':>8} {'pages/s':>8} {'lease ms':>10} {'recycled':>9} {'failures':>8}")
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            run(size, urls)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
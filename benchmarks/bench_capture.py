@@ -0,0 +1,91 @@
+"""Compare CDP single-shot, scrolled and tiled full page capture
+
+Usage:
+    python benchmarks/bench_capture.py [--viewports N] [--runs N]
+
+Serves a generated static page (with a sticky header) from a local HTTP
+server and captures it with headless Chrome using both methods.
+Requires Chrome; Selenium Manager resolves the driver.
+"""
+import argparse
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from services.screenshot_service import ScreenshotService
+
+VIEWPORT_WIDTH = 1280
+VIEWPORT_HEIGHT = 800
+
+
+def write_fixture(directory, viewports):
+    """Static page roughly `viewports` screens tall"""
+    sections = "\n".join(
+        f'<section style="height:{VIEWPORT_HEIGHT - 40}px;background:hsl({i * 37 % 360},60%,85%)">'
+        f'<h2>Section {i}</h2><p>{"Lorem ipsum dolor sit amet. " * 40}</p></section>'
+        for i in range(viewports)
+    )
+    html = f"""<!DOCTYPE html><html><head><title>Capture fixture</title>
+<style>body{{margin:0;font-family:sans-serif}} header{{position:sticky;top:0;height:40px;background:#222;color:#fff}}</style>
+</head><body><header>Sticky header</header>{sections}</body></html>"""
+    with open(os.path.join(directory, "index.html"), "w") as f:
+        f.write(html)
+
+
+def serve(directory):
+    handler = partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--viewports", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture_dir = tempfile.mkdtemp(prefix="bench_capture_")
+    write_fixture(fixture_dir, args.viewports)
+    server = serve(fixture_dir)
+    url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={VIEWPORT_WIDTH},{VIEWPORT_HEIGHT}")
+    driver = webdriver.Chrome(options=options)
+
+    try:
+        driver.get(url)
+        browser = SimpleNamespace(driver=driver, current_url=url)
+
+        print(f"Page: {args.viewports} viewports, {args.runs} runs per mode")
+        print(f"{'mode':<8} {'mean s':>8} {'min s':>8} {'image':>14}")
+        for mode in ("cdp", "stitch", "tiled"):
+            service = ScreenshotService(browser, capture_mode=mode)
+            timings = []
+            size = None
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                screenshot = service.take_full_page_screenshot()
+                timings.append(time.perf_counter() - start)
+                size = "{}x{}".format(*screenshot.size)
+            print(f"{mode:<8} {sum(timings) / len(timings):>8.2f} {min(timings):>8.2f} {size:>14}")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare click target lookup by WebDriver element scan and by the in-page index
+
+Usage:
+    python benchmarks/bench_click.py [--links N] [--runs N]
+
+Serves a generated page with many links and buttons from a local HTTP
+server and finds a few targets on it with headless Chrome both ways. The
+first index lookup on a page may build the index; repeats are lookups.
+Requires Chrome; Selenium Manager resolves the driver.
+"""
+import argparse
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from services.browser_service import BrowserService
+
+WORDS = ("news", "sport", "weather", "travel", "video", "market", "world", "science",
+         "health", "culture", "music", "books", "food", "style", "tech", "games")
+
+QUERIES = ("subscribe now", "world science", "contact us")
+
+
+def write_fixture(directory, links):
+    """Static page with `links` links, some buttons and a few hidden elements"""
+    items = []
+    for i in range(links):
+        label = f"{WORDS[i % len(WORDS)]} {WORDS[(i * 7) % len(WORDS)]} story {i}"
+        items.append(f'<li><a href="#item{i}">{label}</a></li>')
+        if i % 50 == 0:
+            items.append(f'<li><button onclick="void 0">Share {i}</button>'
+                         f'<span role="button" aria-label="Save {i}"></span>'
+                         f'<a href="#hidden{i}" style="display:none">Subscribe now</a></li>')
+    html = f"""<!DOCTYPE html><html><head><title>Click fixture</title></head><body>
+<ul>{''.join(items)}</ul>
+<footer><a href="#contact">Contact us</a> <button>Subscribe now</button></footer>
+</body></html>"""
+    with open(os.path.join(directory, "index.html"), "w") as f:
+        f.write(html)
+
+
+def serve(directory):
+    handler = partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=1500)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture_dir = tempfile.mkdtemp(prefix="bench_click_")
+    write_fixture(fixture_dir, args.links)
+    server = serve(fixture_dir)
+    url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+    options = Options()
+    options.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=options)
+
+    try:
+        driver.get(url)
+        browser = BrowserService(driver=driver)
+
+        print(f"Page: {args.links} links, {args.runs} runs per query")
+        print(f"{'query':<16} {'method':<8} {'first s':>8} {'repeat s':>9} {'score':>6}  match")
+        for query in QUERIES:
+            for method, in_browser in (("scan", False), ("index", True)):
+                timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    _, label, score = browser.find_click_target(query, in_browser=in_browser)
+                    timings.append(time.perf_counter() - start)
+                repeats = timings[1:] or timings
+                print(f"{query:<16} {method:<8} {timings[0]:>8.3f} {sum(repeats) / len(repeats):>9.3f} "
+                      f"{score:>6}  {label}")
+
+        items, total = browser.list_clickable()
+        print(f"Listing: {len(items)} of {total} clickable elements")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure click target matching accuracy on noisy transcripts and ranking speed
+
+Usage:
+    python benchmarks/bench_fuzzy_match.py [--candidates N] [--queries N] [-v]
+
+Accuracy is measured on benchmarks/data/click_corpus.json for the previous
+three-tier scorer (exact / substring / all words) and the fuzzy matcher.
+Speed is measured on a generated page with N candidate labels.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import fuzzy_match
+from utils.fuzzy_match import FuzzyMatcher
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "click_corpus.json")
+
+# Threshold click_element used with the tiered scorer
+LEGACY_MIN_SCORE = 30
+
+WORDS = ("news", "sport", "weather", "travel", "video", "market", "world", "science", "health",
+         "culture", "music", "books", "food", "style", "tech", "games", "login", "account", "search")
+
+
+def legacy_score(label, search):
+    """The exact / substring / all-words tiers click_element used before"""
+    label, search = label.lower().strip(), search.lower().strip()
+    if label == search:
+        return 100
+    if search in label:
+        return 80
+    if all(word in label for word in search.split()):
+        return 60
+    return 0
+
+
+def legacy_best(labels, search):
+    best, best_score = None, 0
+    for label in labels:
+        score = legacy_score(label, search)
+        if score > best_score:
+            best, best_score = label, score
+    return best if best_score > LEGACY_MIN_SCORE else None
+
+
+def evaluate(verbose):
+    with open(CORPUS) as f:
+        pages = json.load(f)["pages"]
+
+    totals = {"legacy": 0, "fuzzy": 0}
+    cases = 0
+    for page in pages:
+        matcher = FuzzyMatcher(page["labels"])
+        for case in page["cases"]:
+            cases += 1
+            expected = case["expected"]
+            legacy = legacy_best(page["labels"], case["transcript"])
+            best = matcher.best(case["transcript"])
+            fuzzy = page["labels"][best[1]] if best else None
+
+            totals["legacy"] += legacy == expected
+            totals["fuzzy"] += fuzzy == expected
+            if verbose or fuzzy != expected:
+                mark = "ok  " if fuzzy == expected else "MISS"
+                print(f"  {mark} {page['name']:<8} {case['transcript']!r:<26} -> {fuzzy!r} "
+                      f"(score {best[0] if best else '-'}, expected {expected!r}, legacy {legacy!r})")
+
+    print(f"Corpus: {cases} transcripts")
+    for name, correct in totals.items():
+        print(f"  {name:<7} {correct:>3}/{cases} correct ({100.0 * correct / cases:.0f}%)")
+
+
+def benchmark(candidates, queries):
+    rng = random.Random(0)
+    labels = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) + f" {i}" for i in range(candidates)]
+    weights = [rng.random() for _ in labels]
+    spoken = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) for _ in range(queries)]
+
+    start = time.perf_counter()
+    matcher = FuzzyMatcher(labels)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in spoken:
+        matcher.rank(query, weights)
+    per_query = (time.perf_counter() - start) / queries
+
+    backend = "numpy" if fuzzy_match.np is not None else "pure Python"
+    print(f"Speed ({backend}): {candidates} candidates, index built in {build * 1000:.1f} ms, "
+          f"{per_query * 1000:.2f} ms per query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-v", "--verbose", action="store_true", help="show every transcript, not just misses")
+    args = parser.parse_args()
+
+    evaluate(args.verbose)
+    benchmark(args.candidates, args.queries)
+
+
+if __name__ == "__main__":
+    main()
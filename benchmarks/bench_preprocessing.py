@@ -0,0 +1,107 @@
+"""Compare upload size and describe latency with and without image preprocessing
+
+Usage:
+    python benchmarks/bench_preprocessing.py [screenshot.png ...] [--live]
+
+Without arguments a few synthetic pages of increasing height are generated.
+With --live each image is also described by GPT-4o both ways (uses API credits).
+"""
+import base64
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from services.image_preprocessor import ImagePreprocessor
+
+WORDS = ("page", "news", "search", "account", "weather", "sports", "login", "video",
+         "article", "today", "market", "update", "world", "menu", "contact", "share")
+
+
+def make_sample_page(path, height, seed=0):
+    """Render a fake web page: header, text blocks and images"""
+    rng = random.Random(seed)
+    image = Image.new('RGB', (1920, height), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, 1920, 90], fill=(33, 37, 41))
+    y = 130
+    while y < height - 100:
+        if rng.random() < 0.3:
+            # Photo-like block: noisy gradient
+            photo = Image.effect_noise((1280, 400), rng.randint(30, 80)).convert('RGB')
+            tint = Image.new('RGB', (1280, 400), tuple(rng.randint(40, 220) for _ in range(3)))
+            image.paste(Image.blend(photo, tint, 0.5), (320, y))
+            y += 440
+        else:
+            for _ in range(rng.randint(3, 8)):
+                words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+                draw.text((320, y), words, fill=(40, 40, 40))
+                y += 22
+            y += 30
+    image.save(path)
+
+
+def describe_latency(client, data_urls):
+    content = [{"type": "text", "text": "Describe this webpage briefly."}]
+    content.extend({"type": "image_url", "image_url": {"url": url}} for url in data_urls)
+    start = time.perf_counter()
+    client.chat.completions.create(
+        model="gpt-4o",
+        messages=[{"role": "user", "content": content}],
+        max_tokens=300
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    live = '--live' in sys.argv
+
+    paths = args
+    if not paths:
+        sample_dir = tempfile.mkdtemp(prefix="bench_preprocessing_")
+        for height in (1080, 5000, 15000, 40000):
+            path = os.path.join(sample_dir, f"page_{height}.png")
+            make_sample_page(path, height, seed=height)
+            paths.append(path)
+
+    client = None
+    if live:
+        import openai
+        from config.secure_config import secure_config
+        client = openai.OpenAI(api_key=secure_config.openai_api_key)
+
+    preprocessor = ImagePreprocessor()
+
+    print(f"{'image':<20} {'size':>12} {'png KB':>8} {'out KB':>8} {'tiles':>5} {'prep ms':>8}", end="")
+    print(f" {'raw s':>7} {'prep s':>7}" if live else "")
+
+    for path in paths:
+        start = time.perf_counter()
+        with Image.open(path) as image:
+            size = f"{image.width}x{image.height}"
+            processed = preprocessor.process(image, os.path.getsize(path))
+        prep_ms = (time.perf_counter() - start) * 1000
+
+        line = (f"{os.path.basename(path):<20} {size:>12} {processed.original_bytes // 1024:>8} "
+                f"{processed.encoded_bytes // 1024:>8} {len(processed.tiles):>5} {prep_ms:>8.0f}")
+
+        if client:
+            with open(path, 'rb') as f:
+                raw_url = "data:image/png;base64," + base64.b64encode(f.read()).decode('utf-8')
+            line += f" {describe_latency(client, [raw_url]):>7.2f} {describe_latency(client, processed.data_urls()):>7.2f}"
+
+        print(line)
+
+    stats = preprocessor.get_stats()
+    print(f"\nTotal: {stats['original_bytes'] // 1024}KB -> {stats['encoded_bytes'] // 1024}KB "
+          f"({stats['bytes_saved'] // 1024}KB saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compare page loads with and without request blocking
+
+Usage:
+    python benchmarks/bench_request_filter.py [--runs N] [--media-mb N]
+
+Serves a page with a large video, web fonts, images and slow "tracker"
+scripts from a local HTTP server, so it runs offline. Loads it with
+blocking off and on and reports load time (until PageReadiness considers
+the page settled), requests, bytes and blocked requests per rule.
+Requires Chrome; Selenium Manager resolves the driver.
+"""
+import argparse
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from services.browser_service import BrowserService
+from services.page_readiness import PageReadiness
+
+TRACKER_DELAY = 1.0  # Seconds each /ads/ response is held back
+
+
+def write_fixture(directory, media_mb):
+    """index.html with heavy subresources, plus a blocklist matching its trackers"""
+    os.makedirs(os.path.join(directory, "ads"))
+    with open(os.path.join(directory, "clip.mp4"), "wb") as f:
+        f.write(os.urandom(media_mb * 1024 * 1024))
+    for name in ("regular", "bold"):
+        with open(os.path.join(directory, f"{name}.woff2"), "wb") as f:
+            f.write(os.urandom(512 * 1024))
+    for i in range(5):
+        with open(os.path.join(directory, "ads", f"tracker{i}.js"), "w") as f:
+            f.write(f"window.tracker{i} = true;")
+    images = "".join(f'<img src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" alt="{i}">' for i in range(5))
+    scripts = "".join(f'<script async src="/ads/tracker{i}.js"></script>' for i in range(5))
+    html = f"""<!DOCTYPE html><html><head><title>Heavy page</title>
+<style>
+@font-face {{ font-family: Body; src: url(regular.woff2) format("woff2"); }}
+@font-face {{ font-family: Body; font-weight: bold; src: url(bold.woff2) format("woff2"); }}
+body {{ font-family: Body, sans-serif; }}
+</style>{scripts}</head><body>
+<h1>Heavy page</h1><p><b>Bold</b> and regular text.</p>
+<video src="clip.mp4" preload="auto" muted autoplay></video>{images}
+</body></html>"""
+    with open(os.path.join(directory, "index.html"), "w") as f:
+        f.write(html)
+
+    blocklist = os.path.join(directory, "blocklist.txt")
+    with open(blocklist, "w") as f:
+        f.write("# Fixture trackers\n*/ads/*\n")
+    return blocklist
+
+
+class FixtureHandler(http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/ads/"):
+            time.sleep(TRACKER_DELAY)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--media-mb", type=int, default=20)
+    args = parser.parse_args()
+
+    fixture_dir = tempfile.mkdtemp(prefix="bench_filter_")
+    blocklist = write_fixture(fixture_dir, args.media_mb)
+    server = serve(fixture_dir)
+    url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+    options = Options()
+    options.add_argument("--headless=new")
+    logging_prefs, perf_prefs = PageReadiness.performance_logging_prefs()
+    options.set_capability("goog:loggingPrefs", logging_prefs)
+    options.add_experimental_option("perfLoggingPrefs", perf_prefs)
+    driver = webdriver.Chrome(options=options)
+
+    try:
+        browser = BrowserService(driver=driver, block_requests=False)
+        browser.request_filter.blocklist_path = blocklist
+
+        print(f"Page: {args.media_mb} MB video, 2 fonts, 5 trackers delayed {TRACKER_DELAY}s, {args.runs} runs")
+        print(f"{'blocking':<9} {'load s':>7} {'requests':>9} {'KB':>9} {'blocked':>8}  by rule")
+        for blocking in (False, True):
+            if blocking:
+                browser.request_filter.enable()
+            else:
+                browser.request_filter.disable()
+
+            timings, stats = [], None
+            for _ in range(args.runs):
+                # Fresh cache each run so every byte comes over the network
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                start = time.perf_counter()
+                browser.navigate_to(url)
+                timings.append(time.perf_counter() - start)
+                stats = browser.get_request_stats(url)
+
+            print(f"{'on' if blocking else 'off':<9} {sum(timings) / len(timings):>7.2f} {stats['requests']:>9} "
+                  f"{stats['bytes'] / 1024:>9.0f} {stats['blocked_requests']:>8}  {stats['blocked_by']}")
+
+        totals = browser.request_filter.get_stats()
+        print(f"Blocked bytes (sizes known from the unblocked loads): {totals['blocked_bytes'] / 1024:.0f} KB")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
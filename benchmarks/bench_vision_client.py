@@ -0,0 +1,172 @@
+"""Exercise VisionClient's retry and rate-limit paths against a fake OpenAI server
+
+Usage:
+    python benchmarks/bench_vision_client.py [--runs N] [--retry-after S]
+
+Serves the chat completions endpoint from a local HTTP server that answers
+each request from a script: a 429 with Retry-After, a 503, or a normal or
+streamed completion. Every scenario is run --runs times and reports its
+latency, the retries VisionClient made and whether the outcome matched.
+A last scenario leaves the client a request budget it cannot get within
+its deadline, which must fail at once instead of sleeping out the deadline.
+Runs offline; needs no API key.
+"""
+import argparse
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.vision_client import VisionClient, VisionError
+
+ANSWER = "A test page. It has a heading and two links."
+STREAM_DELAY = 0.02  # Seconds between streamed chunks
+
+REQUEST = {
+    "model": "gpt-4o",
+    "messages": [{"role": "user", "content": "Describe the page."}],
+    "max_tokens": 100,
+}
+
+
+class FakeOpenAI(http.server.BaseHTTPRequestHandler):
+    """Answers POST /v1/chat/completions with the next step of server.script"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+            step = self.server.script.pop(0) if self.server.script else ("ok",)
+
+        if step[0] == "status":
+            _, status, retry_after = step
+            headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+            self.send_json(status, {"error": {"message": f"fake {status}", "type": "fake"}}, headers)
+        elif body.get("stream"):
+            self.send_stream()
+        else:
+            self.send_json(200, {
+                "id": "fake", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+            })
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = ANSWER.split(" ")
+        events = [{"id": "fake", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o",
+                   "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                  for word in words]
+        for event in events:
+            self.write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            time.sleep(STREAM_DELAY)
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    server.lock = threading.Lock()
+    server.script = []
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_scenario(server, base_url, script, stream=False, spend_budget=False, **client_options):
+    """Run one request against script; returns (seconds, retries, server requests, outcome)
+
+    spend_budget sends an untimed request first, so the measured one
+    starts with the rate limiter's bucket empty.
+    """
+    client = VisionClient("fake-key", base_url=base_url, backoff_base=0.05, **client_options)
+    if spend_budget:
+        client.submit(REQUEST).result()
+    with server.lock:
+        server.script = list(script)
+        server.requests = 0
+    start = time.perf_counter()
+    try:
+        if stream:
+            text = "".join(client.stream(REQUEST)).strip()
+        else:
+            text = client.submit(REQUEST).result()
+        outcome = "ok" if text == ANSWER else f"wrong answer: {text!r}"
+    except VisionError as e:
+        outcome = f"VisionError: {e}"
+    elapsed = time.perf_counter() - start
+    retries = client.get_stats()['retries']
+    client.close()
+    return elapsed, retries, server.requests, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--retry-after", type=float, default=0.5,
+                        help="seconds the fake server asks the client to wait after a 429")
+    args = parser.parse_args()
+
+    server = serve()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    retry_after = args.retry_after
+
+    scenarios = [
+        # (name, script, expected outcome prefix, run_scenario options)
+        ("ok", [], "ok", {}),
+        ("429 + Retry-After", [("status", 429, retry_after)], "ok", {}),
+        ("503 twice", [("status", 503, None), ("status", 503, None)], "ok", {}),
+        ("stream, 503 first", [("status", 503, None)], "ok", {"stream": True}),
+        ("stream, 429 first", [("status", 429, retry_after)], "ok", {"stream": True}),
+        ("retries exhausted", [("status", 503, None)] * 3, "VisionError", {"max_retries": 2}),
+        ("Retry-After > deadline", [("status", 429, 30)], "VisionError", {"timeout": 5.0}),
+        # The request bucket refills in a minute, far past the deadline: must fail at once
+        ("rate limit > deadline", [], "VisionError", {"spend_budget": True, "requests_per_minute": 1,
+                                                      "timeout": 5.0}),
+    ]
+
+    print(f"{'scenario':<24} {'avg s':>7} {'retries':>8} {'requests':>9}  outcome")
+    failed = 0
+    for name, script, expected, options in scenarios:
+        results = [run_scenario(server, base_url, script, **options) for _ in range(args.runs)]
+        average = sum(r[0] for r in results) / len(results)
+        retries = sum(r[1] for r in results) / len(results)
+        requests = sum(r[2] for r in results) / len(results)
+        outcomes = {r[3] for r in results}
+        matched = all(outcome.startswith(expected) for outcome in outcomes)
+        failed += not matched
+        print(f"{name:<24} {average:>7.2f} {retries:>8.1f} {requests:>9.1f}  "
+              f"{'' if matched else 'UNEXPECTED '}{'; '.join(sorted(outcomes))}")
+
+    server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
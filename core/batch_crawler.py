@@ -0,0 +1,318 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from services.browser_pool import BrowserPool
+from services.screenshot_service import ScreenshotService
+from services.vision_service import ANALYSIS_TYPES, VisionService
+
+DEFAULT_BROWSERS = 3
+DEFAULT_VISION_WORKERS = 4
+DEFAULT_RETRIES = 1
+LEASE_TIMEOUT = 120  # Seconds a worker waits for a browser before giving up on a page
+
+
+def read_url_list(path: str) -> List[str]:
+    """URLs from a text file: one per line, blank lines and # comments ignored, duplicates dropped"""
+    urls = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            url = line.split("#", 1)[0].strip()
+            if url and url not in seen:
+                seen.add(url)
+                urls.append(url)
+    return urls
+
+
+class CrawlState:
+    """Append-only JSON lines log of finished URLs, so an interrupted crawl can resume
+
+    Each line records one URL's outcome; on load the last line per URL
+    wins. A URL is only logged once its analysis is in the cache (or it
+    failed), so pages still waiting on the vision API when a crawl is
+    stopped are crawled again next time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.records[record["url"]] = record
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Line cut short by an interrupted write
+        except OSError:
+            pass
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            return self.records.get(url)
+
+    def record(self, url: str, status: str, **details):
+        record = {"url": url, "status": status, "time": time.time(), **details}
+        with self._lock:
+            self.records[url] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class BatchCrawler:
+    """Pre-warms the vision cache by analyzing a list of pages without the voice UI
+
+    Each of `browsers` worker threads leases a headless browser from a
+    BrowserPool, loads a page, captures it and returns the browser before
+    handing the screenshot to VisionService, whose `vision_workers` threads
+    call the API. At most max_pending pages wait for analysis at once, so
+    fast page loads can't pile up screenshots in memory. Results are stored
+    in the VisionCache the desktop app reads, under the URL each page ends
+    up at, exactly as a voice "navigate" would.
+
+    Pages whose analyses are already cached are skipped, which together
+    with the CrawlState log makes an interrupted crawl resumable.
+    """
+
+    def __init__(self, urls: List[str], state: CrawlState, browsers: int = DEFAULT_BROWSERS,
+                 vision_workers: int = DEFAULT_VISION_WORKERS, max_pending: Optional[int] = None,
+                 retries: int = DEFAULT_RETRIES, refresh: bool = False,
+                 pool: Optional[BrowserPool] = None, vision_service: Optional[VisionService] = None):
+        self.urls = urls
+        self.state = state
+        self.browsers = max(1, browsers)
+        self.retries = max(0, retries)
+        self.refresh = refresh
+        self.pool = pool or BrowserPool(size=self.browsers, headless=True)
+        self.vision_service = vision_service or VisionService(max_workers=vision_workers)
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * self.vision_service.max_workers)
+
+        self._pending_urls = queue.Queue()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._analyzing = 0
+        self._idle = threading.Condition(self._lock)
+
+        self.started = None
+        self.stats = {
+            'total': len(urls),
+            'done': 0,
+            'cached': 0,
+            'failed': 0,
+            'total_load': 0.0,
+            'total_analysis': 0.0,
+        }
+        self.failures: List[tuple] = []  # (url, error)
+
+    def run(self):
+        """Crawl every URL; returns when all are finished or stop() was called"""
+        if not self.vision_service.openai_client:
+            raise RuntimeError("OpenAI client not initialized - check your API key")
+
+        for url in self.urls:
+            if self._is_cached(url):
+                self._finish(url, 'cached')
+            else:
+                self._pending_urls.put(url)
+
+        remaining = self._pending_urls.qsize()
+        print(f"🕸️ Crawling {remaining} of {len(self.urls)} pages with {self.browsers} browsers and "
+              f"{self.vision_service.max_workers} vision workers")
+        self.started = time.monotonic()
+
+        workers = [threading.Thread(target=self._worker, args=(index,), name=f"crawl-worker-{index}", daemon=True)
+                   for index in range(min(self.browsers, remaining))]
+        for worker in workers:
+            worker.start()
+        # Short joins keep the main thread responsive to Ctrl+C
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(0.5)
+        self.wait_for_analyses()
+
+    def stop(self):
+        """Load no further pages; analyses already queued still finish"""
+        self._stopping.set()
+
+    def wait_for_analyses(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no page is waiting on the vision API; False on timeout"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._idle:
+            while self._analyzing:
+                remaining = deadline - time.monotonic() if deadline is not None else 0.5
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 0.5))
+        return True
+
+    def _is_cached(self, url: str) -> bool:
+        """Both analyses of url (or of the page it redirected to last time) are still cached"""
+        if self.refresh:
+            return False
+        record = self.state.get(url)
+        keys = [url]
+        if record and record.get('final_url'):
+            keys.append(record['final_url'])
+        cache = self.vision_service.cache
+        return any(all(cache.contains(kind, key) for kind in ANALYSIS_TYPES) for key in keys)
+
+    def _worker(self, index: int):
+        session_id = f"crawl-{index}"
+        while not self._stopping.is_set():
+            try:
+                url = self._pending_urls.get_nowait()
+            except queue.Empty:
+                return
+
+            # Don't load another page while enough are waiting for analysis
+            while not self._slots.acquire(timeout=0.5):
+                if self._stopping.is_set():
+                    return
+
+            try:
+                capture = self._capture(url, session_id)
+            except Exception as e:
+                self._slots.release()
+                self._finish(url, 'failed', error=str(e))
+                continue
+
+            if capture is None:  # Stopped before the page was loaded
+                self._slots.release()
+                return
+            self._analyze(url, *capture)
+
+    def _capture(self, url: str, session_id: str):
+        """Load url in a pooled browser and screenshot it; (final url, screenshot, load seconds)"""
+        error = None
+        for attempt in range(self.retries + 1):
+            if self._stopping.is_set():
+                return None
+            started = time.monotonic()
+            # Released healthy either way: the pool probes the browser and replaces
+            # it only if it stopped responding, not for every page that failed to load
+            lease = self.pool.lease(session_id, timeout=LEASE_TIMEOUT)
+            try:
+                browser = lease.service
+                success, message = browser.navigate_to(url)
+                if success:
+                    final_url = browser.current_url
+                    screenshot = ScreenshotService(browser).take_full_page_screenshot()
+                    if screenshot and final_url:
+                        return final_url, screenshot, time.monotonic() - started
+                    message = "Screenshot failed"
+                error = message
+            finally:
+                lease.release()
+            if attempt < self.retries:
+                print(f"🔁 Retrying {url}: {error}")
+        raise RuntimeError(error)
+
+    def _analyze(self, url: str, final_url: str, screenshot, load_time: float):
+        """Queue the page's analyses; it is recorded once they are all in the cache"""
+        started = time.monotonic()
+        futures = self.vision_service.queue_background_analysis(final_url, screenshot)
+        if not futures:
+            self._slots.release()
+            self._finish(url, 'done', final_url=final_url, load=load_time, analysis=0.0)
+            return
+
+        with self._lock:
+            self._analyzing += 1
+        remaining = [len(futures)]
+
+        def on_done(_future: Future):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                results = {kind: future.result() for kind, future in futures.items()}
+                missing = [kind for kind, value in results.items() if not value]
+                if missing:
+                    self._finish(url, 'failed', final_url=final_url, error=f"No {' or '.join(missing)} result")
+                else:
+                    self._finish(url, 'done', final_url=final_url, load=load_time,
+                                 analysis=time.monotonic() - started)
+            except Exception as e:
+                self._finish(url, 'failed', final_url=final_url, error=str(e))
+            finally:
+                self._slots.release()
+                with self._idle:
+                    self._analyzing -= 1
+                    self._idle.notify_all()
+
+        for future in futures.values():
+            future.add_done_callback(on_done)
+
+    def _finish(self, url: str, status: str, final_url: Optional[str] = None, error: Optional[str] = None,
+                load: float = 0.0, analysis: float = 0.0):
+        details = {'final_url': final_url} if final_url else {}
+        if error:
+            details['error'] = error
+        if status == 'done':
+            details.update(load=round(load, 2), analysis=round(analysis, 2))
+        if status != 'cached':
+            self.state.record(url, status, **details)
+
+        with self._lock:
+            self.stats[status] += 1
+            self.stats['total_load'] += load
+            self.stats['total_analysis'] += analysis
+            if error:
+                self.failures.append((url, error))
+            finished = self.stats['done'] + self.stats['cached'] + self.stats['failed']
+            rate = self._pages_per_minute()
+
+        if status == 'done':
+            print(f"[{finished}/{self.stats['total']}] ✅ {url} (load {load:.1f}s, analysis {analysis:.1f}s) "
+                  f"- {rate:.1f} pages/min")
+        elif status == 'failed':
+            print(f"[{finished}/{self.stats['total']}] ❌ {url}: {error}")
+
+    def _pages_per_minute(self) -> float:
+        """Analyzed pages per minute since crawling began; lock must be held"""
+        if self.started is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started
+        return self.stats['done'] / elapsed * 60 if elapsed > 0 else 0.0
+
+    def get_stats(self) -> Dict:
+        """Page counts, throughput and average load and analysis time"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pages_per_minute'] = self._pages_per_minute()
+            stats['elapsed'] = time.monotonic() - self.started if self.started is not None else 0.0
+            stats['analyzing'] = self._analyzing
+        done = stats['done']
+        stats['avg_load'] = stats['total_load'] / done if done else 0.0
+        stats['avg_analysis'] = stats['total_analysis'] / done if done else 0.0
+        return stats
+
+    def report(self) -> str:
+        """Summary of the crawl, its browsers and vision workers, and every failure"""
+        stats = self.get_stats()
+        pool = self.pool.get_stats()
+        vision = self.vision_service.get_queue_stats()
+        lines = [
+            f"Pages: {stats['done']} analyzed, {stats['cached']} already cached, {stats['failed']} failed, "
+            f"{stats['total'] - stats['done'] - stats['cached'] - stats['failed']} not crawled",
+            f"Time: {stats['elapsed']:.1f}s, {stats['pages_per_minute']:.1f} pages/min, "
+            f"avg load {stats['avg_load']:.1f}s, avg analysis {stats['avg_analysis']:.1f}s",
+            f"Browsers: {pool['created']} started, {pool['recycled']} recycled, "
+            f"avg lease wait {pool['avg_wait']:.2f}s",
+            f"Vision: {vision['tasks_completed']} tasks, avg queue wait {vision['avg_wait_time']:.1f}s, "
+            f"{vision['coalesced_requests']} coalesced",
+        ]
+        if self.failures:
+            lines.append("Failures:")
+            lines.extend(f"  {url}: {error}" for url, error in self.failures)
+        return "\n".join(lines)
+
+    def close(self):
+        self.pool.close()
+        self.vision_service.cleanup()
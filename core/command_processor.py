@@ -1,3 +1,11 @@
+from utils.text_stream import split_sentences
+
+# DOM text shorter than this is too thin to stand in for the page, use vision
+MIN_DOM_TEXT_CHARS = 300
+# DOM text up to this length is read out as-is instead of being summarized
+DIRECT_READ_CHARS = 700
+
+
 class CommandProcessor:
     def __init__(self, browser_service, audio_service, vision_service, screenshot_service):
         self.browser_service = browser_service
@@ -27,6 +35,11 @@ class CommandProcessor:
                 success, used_cache = self._handle_read_content(status_callback)
                 return (success, not used_cache)  # Only analyze if didn't use cache
 
+            # Listing clickable elements - no analysis needed
+            elif any(keyword in text for keyword in ["what can i click", "clickable", "list links", "list buttons"]):
+                success = self._handle_list_clickable(status_callback)
+                return (success, False)
+
             # Click commands - should trigger analysis as page might change
             elif "click" in text:
                 element_text = text.replace("click on", "").replace("click", "").strip()
@@ -43,16 +56,16 @@ class CommandProcessor:
                 success = self._handle_scroll(text, status_callback)
                 return (success, False)  # No analysis needed for scroll
 
-            # Navigation commands - should trigger analysis
+            # History commands - analyze only pages that changed since they were left
             elif "back" in text:
                 success, message = self.browser_service.go_back()
                 self.audio_service.speak(message, status_callback)
-                return (success, True)  # Should analyze after navigation
+                return (success, self._history_page_needs_analysis())
 
             elif "forward" in text:
                 success, message = self.browser_service.go_forward()
                 self.audio_service.speak(message, status_callback)
-                return (success, True)  # Should analyze after navigation
+                return (success, self._history_page_needs_analysis())
 
             # Cookie commands - no analysis needed
             elif "accept cookies" in text or "accept cookie" in text:
@@ -63,7 +76,8 @@ class CommandProcessor:
             # Help command - no analysis needed
             elif "help" in text:
                 self.audio_service.speak(
-                    "Available commands: navigate to, describe, read, click on, scroll, back, forward, accept cookies, help",
+                    "Available commands: navigate to, describe, read, click on, what can I click, scroll, back, forward, "
+                    "accept cookies, help",
                     status_callback
                 )
                 return (True, False)
@@ -78,6 +92,36 @@ class CommandProcessor:
             self.audio_service.speak("Command failed", status_callback)
             return (False, False)
 
+    def _history_page_needs_analysis(self):
+        """After back/forward: whether the page has to be captured and analyzed again"""
+        entry = self.browser_service.history.current
+        if entry is None or entry.changed:
+            return True
+        if entry.analysis_pending():
+            print(f"📋 Analysis of {entry.url} still running from the last visit")
+            return False
+        if self.vision_service.has_cached_analysis(entry.url):
+            print(f"📋 {entry.url} unchanged and cached - no new analysis needed")
+            return False
+        return True
+
+    def _handle_list_clickable(self, status_callback):
+        """Read out what can be clicked, on-screen elements first"""
+        if not self.browser_service.current_url:
+            self.audio_service.speak("Not on any webpage", status_callback)
+            return False
+
+        items, total = self.browser_service.list_clickable()
+        if not items:
+            self.audio_service.speak("I couldn't find anything to click", status_callback)
+            return False
+
+        message = "You can click: " + ", ".join(item['label'] for item in items)
+        if total > len(items):
+            message += f", and {total - len(items)} more"
+        self.audio_service.speak(message, status_callback)
+        return True
+
     def _extract_website(self, text):
         """Extract website from navigation command"""
         for keyword in ["navigate to", "go to", "open"]:
@@ -94,8 +138,8 @@ class CommandProcessor:
         current_url = self.browser_service.current_url
 
         # Check if we have cached description
-        if current_url in self.vision_service.description_cache:
-            description = self.vision_service.description_cache[current_url]
+        description = self.vision_service.get_cached_description(current_url)
+        if description:
             self.audio_service.speak(description, status_callback)
             print(f"📋 Used cached description for {current_url} - no new analysis needed")
             return (True, True)  # Success and used cache
@@ -104,14 +148,18 @@ class CommandProcessor:
         if status_callback:
             status_callback("Analyzing page...")
 
-        screenshot_path = self.screenshot_service.take_full_page_screenshot()
-        if screenshot_path:
-            description = self.vision_service.get_page_description(screenshot_path, current_url)
-            if description:
-                self.audio_service.speak(description, status_callback)
-                return (True, False)  # Success but didn't use cache
-            else:
-                self.audio_service.speak("Cannot analyze page", status_callback)
+        # A background analysis of this page may already be running
+        description = self.vision_service.wait_for_pending("describe", current_url)
+        if description:
+            self.audio_service.speak(description, status_callback)
+            return (True, True)
+
+        screenshot = self.screenshot_service.take_full_page_screenshot()
+        if screenshot:
+            # Speak each sentence as soon as the model produces it
+            sentences = self.vision_service.stream_page_description(screenshot, current_url)
+            self.audio_service.speak_stream(sentences, status_callback)
+            return (True, False)  # Success but didn't use cache
         else:
             self.audio_service.speak("Cannot capture page", status_callback)
 
@@ -126,8 +174,8 @@ class CommandProcessor:
         current_url = self.browser_service.current_url
 
         # Check if we have cached content
-        if current_url in self.vision_service.content_cache:
-            content = self.vision_service.content_cache[current_url]
+        content = self.vision_service.get_cached_content(current_url)
+        if content:
             self.audio_service.speak(content, status_callback)
             print(f"📋 Used cached content for {current_url} - no new analysis needed")
             return (True, True)  # Success and used cache
@@ -136,14 +184,37 @@ class CommandProcessor:
         if status_callback:
             status_callback("Reading content...")
 
-        screenshot_path = self.screenshot_service.take_screenshot()
-        if screenshot_path:
-            content = self.vision_service.get_main_content(screenshot_path, current_url)
-            if content:
-                self.audio_service.speak(content, status_callback)
-                return (True, False)  # Success but didn't use cache
+        # Fast path: use the text already in the DOM when there is enough of it
+        extracted = self.browser_service.extract_main_text()
+        text = (extracted or {}).get('text') or ""
+        if len(text) >= MIN_DOM_TEXT_CHARS:
+            if len(text) <= DIRECT_READ_CHARS:
+                print(f"📄 Reading {len(text)} chars of page text directly")
+                self.vision_service.store_content(current_url, text)
+                self.audio_service.speak(text, status_callback)
+            elif self.vision_service.openai_client:
+                sentences = self.vision_service.stream_text_summary(text, current_url)
+                self.audio_service.speak_stream(sentences, status_callback)
             else:
-                self.audio_service.speak("Cannot read content", status_callback)
+                # Nothing to summarize it with: read it all, a sentence at a time
+                print(f"📄 OpenAI not configured - reading {len(text)} chars of page text directly")
+                self.audio_service.speak_stream(split_sentences([text]), status_callback)
+            return (True, False)
+
+        print(f"🖼️ Only {len(text)} chars of page text - falling back to vision")
+
+        # A background analysis of this page may already be running
+        content = self.vision_service.wait_for_pending("content", current_url)
+        if content:
+            self.audio_service.speak(content, status_callback)
+            return (True, True)
+
+        screenshot = self.screenshot_service.take_screenshot()
+        if screenshot:
+            # Speak each sentence as soon as the model produces it
+            sentences = self.vision_service.stream_main_content(screenshot, current_url)
+            self.audio_service.speak_stream(sentences, status_callback)
+            return (True, False)  # Success but didn't use cache
         else:
             self.audio_service.speak("Cannot capture page", status_callback)
 
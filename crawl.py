@@ -0,0 +1,71 @@
+"""Pre-warm the vision cache for a list of pages
+
+Usage:
+    python crawl.py urls.txt [--browsers 3] [--vision-workers 4] [--state FILE] [--refresh]
+
+urls.txt holds one URL per line (# starts a comment). Pages are loaded in
+headless Chrome instances, captured and analyzed into the same cache the
+voice assistant reads, so those pages are described instantly later.
+Finished URLs are logged to the state file (urls.txt.crawl.jsonl by
+default); running the same command again after an interruption picks up
+where it stopped. Ctrl+C once stops loading pages and waits for the
+analyses already running, twice quits at once.
+"""
+import argparse
+import sys
+import os
+
+# Añadir el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.batch_crawler import BatchCrawler, CrawlState, DEFAULT_BROWSERS, DEFAULT_RETRIES, \
+    DEFAULT_VISION_WORKERS, read_url_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", help="file with one URL per line")
+    parser.add_argument("--browsers", type=int, default=DEFAULT_BROWSERS, help="headless browsers loading pages")
+    parser.add_argument("--vision-workers", type=int, default=DEFAULT_VISION_WORKERS,
+                        help="concurrent vision API requests")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="captured pages allowed to wait for analysis (default: twice the vision workers)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="extra attempts to load a page")
+    parser.add_argument("--state", default=None, help="resume log (default: <urls>.crawl.jsonl)")
+    parser.add_argument("--refresh", action="store_true", help="re-analyze pages that are already cached")
+    args = parser.parse_args()
+
+    try:
+        urls = read_url_list(args.urls)
+    except OSError as e:
+        print(f"Cannot read URL list: {e}")
+        return 2
+    if not urls:
+        print("No URLs to crawl")
+        return 0
+
+    state = CrawlState(args.state or args.urls + ".crawl.jsonl")
+    crawler = BatchCrawler(urls, state, browsers=args.browsers, vision_workers=args.vision_workers,
+                           max_pending=args.max_pending, retries=args.retries, refresh=args.refresh)
+    try:
+        try:
+            crawler.run()
+        except KeyboardInterrupt:
+            crawler.stop()
+            print("\n⏹️ Stopping: waiting for running analyses (Ctrl+C again to quit now)")
+            try:
+                crawler.wait_for_analyses()
+            except KeyboardInterrupt:
+                pass
+        print(crawler.report())
+        print(f"Progress saved to {state.path}")
+        return 1 if crawler.get_stats()['failed'] else 0
+    except RuntimeError as e:
+        print(f"Crawl failed: {e}")
+        return 2
+    finally:
+        crawler.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,23 @@
-import time
 import tkinter as tk
 import threading
 import tempfile
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.audio_service import AudioService
-from services.browser_service import BrowserService
+from services.browser_actor import BACKGROUND, BrowserPreempted
+from services.browser_pool import BrowserPool
 from services.vision_service import VisionService
 from services.screenshot_service import ScreenshotService
 from core.command_processor import CommandProcessor
 from ui.main_window import MainWindow
+from utils.startup_timer import StartupTimer
+
+# Times a background capture is retried after giving way to the user's commands
+BACKGROUND_CAPTURE_ATTEMPTS = 5
 
 
 class VoiceWebAssistant:
@@ -22,20 +27,36 @@ class VoiceWebAssistant:
 
         # Setup temp directories
         self.speech_temp_dir = os.path.join(tempfile.gettempdir(), "web_assistant_speech")
-        self.screenshot_temp_dir = os.path.join(tempfile.gettempdir(), "web_assistant_screenshots")
 
-        # Initialize services
-        self.audio_service = AudioService(self.speech_temp_dir)
-        self.browser_service = BrowserService()
-        self.vision_service = VisionService()
-        self.screenshot_service = ScreenshotService(self.browser_service, self.screenshot_temp_dir)
+        self.startup = StartupTimer()
+
+        # Desktop mode: a pool of one visible Chrome, leased for the whole run.
+        # Chrome launches in the background; the first browser command
+        # waits for it only if it isn't up yet
+        self.browser_pool = BrowserPool(size=1, headless=False, background=True, timer=self.startup)
+        self.browser_service = self.browser_pool.lease("desktop").service
+
+        # Audio and vision start in parallel while the window is built (Tk
+        # has to stay on the main thread)
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+            audio = pool.submit(self._start_stage, "audio service", AudioService, self.speech_temp_dir)
+            vision = pool.submit(self._start_stage, "vision service", VisionService)
+            with self.startup.stage("ui"):
+                self.main_window = MainWindow(self)
+            self.audio_service = audio.result()
+            self.vision_service = vision.result()
+
+        self.browser_service.add_navigation_listener(self.vision_service.on_navigation)
+        self.screenshot_service = ScreenshotService(self.browser_service)
         self.command_processor = CommandProcessor(
             self.browser_service, self.audio_service,
             self.vision_service, self.screenshot_service
         )
+        self.startup.record("ready for commands", self.startup.elapsed())
 
-        # Setup UI
-        self.main_window = MainWindow(self)
+    def _start_stage(self, name, factory, *args):
+        with self.startup.stage(name):
+            return factory(*args)
 
     def start_recording(self, event=None):
         """Start recording when space is pressed"""
@@ -111,20 +132,43 @@ class VoiceWebAssistant:
     def _trigger_background_analysis(self):
         """Trigger background screenshot analysis"""
 
+        epoch = self.browser_service.navigation_epoch
+        entry = self.browser_service.history.current
+
         def background_task():
+            for _ in range(BACKGROUND_CAPTURE_ATTEMPTS):
+                try:
+                    # Browser work here yields to the user's commands
+                    with self.browser_service.actor.priority(BACKGROUND):
+                        self.browser_service.wait_until_ready()
+                        if self.browser_service.navigation_epoch != epoch:
+                            return  # User already moved on
+                        # Compared with the previous capture so unchanged regions aren't re-analyzed
+                        screenshot, diff = self.screenshot_service.capture_changes()
+                    break
+                except BrowserPreempted:
+                    # Queued again behind the command that interrupted it, so it
+                    # resumes once that has run (unless it left the page)
+                    print("⏸️ Background capture gave way to a command - retrying after it")
+                except Exception as e:
+                    print(f"Background analysis error: {e}")
+                    return
+            else:
+                print("⏸️ Background capture kept being interrupted - skipping this page")
+                return
+
             try:
-                time.sleep(2)  # Wait for page to settle
-                screenshot_path = self.screenshot_service.take_full_page_screenshot()
-                if screenshot_path and self.browser_service.current_url:
-                    # Don't delete the screenshot yet - let vision service handle it
-                    screenshot_copy = screenshot_path + "_analysis"
-                    import shutil
-                    shutil.copy2(screenshot_path, screenshot_copy)
-
-                    self.vision_service.queue_background_analysis(
+                if self.browser_service.navigation_epoch != epoch:
+                    return
+                if screenshot and self.browser_service.current_url:
+                    futures = self.vision_service.queue_background_analysis(
                         self.browser_service.current_url,
-                        screenshot_copy
+                        screenshot,
+                        diff
                     )
+                    # Kept with the history entry so going back here doesn't queue it again
+                    if entry is not None:
+                        entry.analysis.update(futures)
             except Exception as e:
                 print(f"Background analysis error: {e}")
 
@@ -144,8 +188,8 @@ class VoiceWebAssistant:
     def take_manual_screenshot(self):
         """Manual screenshot for testing"""
         self.main_window.update_status("Taking screenshot...")
-        path = self.screenshot_service.take_full_page_screenshot()
-        if path:
+        screenshot = self.screenshot_service.take_full_page_screenshot()
+        if screenshot:
             self.audio_service.speak("Screenshot captured", self.main_window.update_status)
         else:
             self.audio_service.speak("Screenshot failed", self.main_window.update_status)
@@ -156,10 +200,7 @@ class VoiceWebAssistant:
             self.browser_service.driver.refresh()
             self.audio_service.speak("Page refreshed", self.main_window.update_status)
             # Clear cache for this URL since we refreshed
-            if self.browser_service.current_url in self.vision_service.description_cache:
-                del self.vision_service.description_cache[self.browser_service.current_url]
-            if self.browser_service.current_url in self.vision_service.content_cache:
-                del self.vision_service.content_cache[self.browser_service.current_url]
+            self.vision_service.invalidate(self.browser_service.current_url)
             # Trigger background analysis after refresh
             self._trigger_background_analysis()
         else:
@@ -180,7 +221,8 @@ class VoiceWebAssistant:
 
         # Cleanup services
         self.audio_service.cleanup()
-        self.browser_service.cleanup()
+        self.browser_pool.close()
+        self.vision_service.cleanup()
         self.screenshot_service.cleanup_screenshots()
 
         try:
@@ -188,9 +230,15 @@ class VoiceWebAssistant:
         except:
             pass
 
+    def _report_startup(self):
+        """Print the startup stages once the background browser launch is done"""
+        self.browser_service.driver  # Waits for the launch
+        print("⏱️ Startup stages:\n" + self.startup.report())
+
     def run(self):
         """Run the application"""
         self.audio_service.speak("Voice assistant ready", self.main_window.update_status)
+        threading.Thread(target=self._report_startup, daemon=True).start()
 
         try:
             self.main_window.root.mainloop()
@@ -1,6 +1,9 @@
 from .audio_service import AudioService
+from .browser_pool import BrowserPool
 from .browser_service import BrowserService
 from .screenshot_service import ScreenshotService
+from .screenshot_store import Screenshot, ScreenshotStore
+from .vision_cache import VisionCache
 from .vision_service import VisionService
 
-__all__ = ['AudioService', 'BrowserService', 'ScreenshotService', 'VisionService']
\ No newline at end of file
+__all__ = ['AudioService', 'BrowserPool', 'BrowserService', 'Screenshot', 'ScreenshotService', 'ScreenshotStore', 'VisionCache', 'VisionService']
\ No newline at end of file
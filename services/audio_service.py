@@ -10,6 +10,7 @@ import uuid
 import subprocess
 import sys
 import asyncio
+import queue
 
 
 class AudioService:
@@ -20,6 +21,7 @@ class AudioService:
         self.RATE = 44100
         self.recording = False
         self.speaking = False
+        self.speech_generation = 0  # Bumped on stop so stale speech streams end
         self.speech_temp_dir = speech_temp_dir
 
         # Initialize PyAudio and mixer
@@ -64,6 +66,7 @@ class AudioService:
     def stop_speaking(self):
         """Stop any ongoing speech"""
         try:
+            self.speech_generation += 1
             if self.speaking:
                 mixer.music.stop()
                 self.speaking = False
@@ -137,18 +140,7 @@ class AudioService:
                 if not mixer.get_init():
                     mixer.init()
 
-                filename = os.path.join(self.speech_temp_dir, f"speech_{uuid.uuid4()}.mp3")
-
-                # Use Edge-TTS
-                async def generate():
-                    communicate = self.edge_tts.Communicate(text, "en-US-AriaNeural")
-                    await communicate.save(filename)
-
-                # Run async function
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(generate())
-                loop.close()
+                filename = self._synthesize(text)
 
                 # Play the audio
                 mixer.music.load(filename)
@@ -175,6 +167,95 @@ class AudioService:
 
         threading.Thread(target=speak_thread, daemon=True).start()
 
+    def _synthesize(self, text):
+        """Generate speech for text with Edge-TTS and return the mp3 path"""
+        filename = os.path.join(self.speech_temp_dir, f"speech_{uuid.uuid4()}.mp3")
+
+        async def generate():
+            communicate = self.edge_tts.Communicate(text, "en-US-AriaNeural")
+            await communicate.save(filename)
+
+        # Run async function
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(generate())
+        finally:
+            loop.close()
+
+        return filename
+
+    def speak_stream(self, sentences, status_callback=None):
+        """Speak sentences as they arrive from an iterable
+
+        One thread pulls sentences and synthesizes them while another plays
+        the finished clips in order, so the first sentence is heard while
+        the rest of the text is still being generated.
+        """
+        clips = queue.Queue()
+        generation = self.speech_generation
+        self.speaking = True
+
+        # Only stop_speaking() ends the stream: it bumps the generation. A
+        # speak() finishing meanwhile clears self.speaking but must not cut it off
+        def active():
+            return generation == self.speech_generation
+
+        if status_callback:
+            status_callback("Speaking...")
+
+        def synthesize_thread():
+            try:
+                for sentence in sentences:
+                    if not active():
+                        break
+                    print(f"Assistant: {sentence}")
+                    try:
+                        clips.put(self._synthesize(sentence))
+                    except Exception as e:
+                        print(f"TTS error: {e}")
+            except Exception as e:
+                print(f"Speech stream error: {e}")
+            finally:
+                clips.put(None)
+
+        def play_thread():
+            start_time = time.time()
+            first_clip = True
+            try:
+                if not mixer.get_init():
+                    mixer.init()
+
+                while True:
+                    filename = clips.get()
+                    if filename is None:
+                        break
+
+                    if active():
+                        if first_clip:
+                            print(f"⚡ Time to first speech: {time.time() - start_time:.2f}s")
+                            first_clip = False
+                        mixer.music.load(filename)
+                        mixer.music.play()
+                        while mixer.music.get_busy() and active():
+                            time.sleep(0.05)
+                        mixer.music.unload()
+
+                    try:
+                        os.remove(filename)
+                    except:
+                        pass
+
+            except Exception as e:
+                print(f"TTS playback error: {e}")
+            finally:
+                if generation == self.speech_generation:
+                    self.speaking = False
+                if status_callback:
+                    status_callback("Ready")
+
+        threading.Thread(target=synthesize_thread, daemon=True).start()
+        threading.Thread(target=play_thread, daemon=True).start()
+
     def cleanup(self):
         """Clean up audio resources"""
         try:
@@ -0,0 +1,200 @@
+import functools
+import itertools
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Operation priorities: lower runs first
+FOREGROUND = 0
+BACKGROUND = 10
+
+
+class BrowserPreempted(Exception):
+    """Raised at a safe point of a background operation when foreground work is waiting"""
+
+
+class BrowserActor:
+    """Runs every browser operation on one thread, in priority order
+
+    WebDriver isn't thread-safe, so callers submit operations instead of
+    touching the driver: a multi-step operation (a scrolling capture, a
+    click) runs as one unit and nothing interleaves with it. Callers block
+    until their operation has run. An operation started from the actor
+    thread itself (a nested call) runs inline.
+
+    A thread's operations run at FOREGROUND priority unless it wraps them
+    in priority(BACKGROUND). Long background operations call checkpoint()
+    at safe points, which raises BrowserPreempted if foreground work is
+    queued. Queue wait and execution time are recorded per operation.
+    """
+
+    def __init__(self, name: str = "browser-actor"):
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queued = Counter()  # priority -> operations waiting
+        self._running_priority = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.preemptions = 0
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self._thread.start()
+
+    def on_actor_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def current_priority(self) -> int:
+        return getattr(self._local, "priority", FOREGROUND)
+
+    @contextmanager
+    def priority(self, priority: int):
+        """Run the calling thread's operations at priority within the block"""
+        previous = self.current_priority()
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def submit(self, fn, args=(), kwargs=None, name: Optional[str] = None,
+               priority: Optional[int] = None) -> Future:
+        """Queue fn(*args, **kwargs) and return a Future of its result"""
+        kwargs = kwargs or {}
+        future = Future()
+        if self.on_actor_thread():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+
+        if priority is None:
+            priority = self.current_priority()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(RuntimeError("Browser actor stopped"))
+                return future
+            self._queued[priority] += 1
+        task = (future, fn, args, kwargs, name or getattr(fn, "__name__", "operation"), time.monotonic())
+        self._queue.put((priority, next(self._sequence), task))
+        return future
+
+    def call(self, fn, args=(), kwargs=None, name: Optional[str] = None, priority: Optional[int] = None):
+        """Run fn on the actor thread and return its result (or raise its exception)"""
+        return self.submit(fn, args, kwargs, name, priority).result()
+
+    def checkpoint(self):
+        """Safe point: raise BrowserPreempted if higher priority work is waiting"""
+        if not self.on_actor_thread():
+            return
+        with self._lock:
+            waiting = [priority for priority, count in self._queued.items() if count > 0]
+            if self._running_priority is not None and waiting and min(waiting) < self._running_priority:
+                self.preemptions += 1
+                raise BrowserPreempted("Foreground browser command waiting")
+
+    def _run(self):
+        while True:
+            priority, _, task = self._queue.get()
+            if task is None:
+                break
+            future, fn, args, kwargs, name, queued_at = task
+            with self._lock:
+                self._queued[priority] -= 1
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._running_priority = priority
+
+            started = time.monotonic()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                finished = time.monotonic()
+                with self._lock:
+                    self._running_priority = None
+                    self._record(name, started - queued_at, finished - started)
+
+    def _record(self, name, wait, execution):
+        """Accumulate timings for an operation; lock must be held"""
+        stats = self._stats.setdefault(name, {'count': 0, 'total_wait': 0.0, 'max_wait': 0.0,
+                                              'total_exec': 0.0, 'max_exec': 0.0})
+        stats['count'] += 1
+        stats['total_wait'] += wait
+        stats['max_wait'] = max(stats['max_wait'], wait)
+        stats['total_exec'] += execution
+        stats['max_exec'] = max(stats['max_exec'], execution)
+
+    def get_stats(self) -> Dict:
+        """Per operation count, average and max queue wait and execution time"""
+        with self._lock:
+            operations = {}
+            for name, stats in self._stats.items():
+                operations[name] = {
+                    'count': stats['count'],
+                    'avg_wait': stats['total_wait'] / stats['count'],
+                    'max_wait': stats['max_wait'],
+                    'avg_exec': stats['total_exec'] / stats['count'],
+                    'max_exec': stats['max_exec'],
+                }
+            return {'operations': operations, 'preemptions': self.preemptions,
+                    'queued': sum(self._queued.values())}
+
+    def stop(self):
+        """Finish queued operations and end the actor thread"""
+        with self._lock:
+            self._stopped = True
+        if self._thread.is_alive() and not self.on_actor_thread():
+            self._queue.put((float("inf"), next(self._sequence), None))
+            self._thread.join(timeout=5)
+
+
+class ActorDriver:
+    """WebDriver proxy that runs every call and property read on the actor thread
+
+    Keeps stray driver use from other threads (readiness probes, UI
+    actions) from interleaving with an operation in progress.
+    """
+
+    def __init__(self, driver, actor: BrowserActor):
+        self._driver = driver
+        self._actor = actor
+
+    @property
+    def wrapped(self):
+        """The underlying WebDriver"""
+        return self._driver
+
+    def __getattr__(self, name):
+        # Properties such as current_url are WebDriver requests themselves
+        if isinstance(getattr(type(self._driver), name, None), property):
+            return self._actor.call(getattr, (self._driver, name), name=f"driver.{name}")
+
+        value = getattr(self._driver, name)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            return self._actor.call(value, args, kwargs, name=f"driver.{name}")
+        return call
+
+
+def actor_operation(method):
+    """Run a method as one operation on self.actor (directly if there is none)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        actor = getattr(self, "actor", None)
+        if actor is None:
+            return method(self, *args, **kwargs)
+        return actor.call(method, (self,) + args, kwargs, name=method.__name__)
+    return wrapper
@@ -0,0 +1,316 @@
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from services.browser_service import BrowserService
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_USES = 200  # Leases before an instance is replaced anyway
+DEFAULT_MAX_AGE = 30 * 60  # Seconds
+DEFAULT_MAX_HEAP_MB = 1024  # A page heap larger than this counts as leaking
+HEALTH_CHECK_INTERVAL = 30  # Idle instances are probed again after this many seconds
+MAX_SESSION_HISTORY = 50
+
+# One round trip reporting whether the page responds and its JS heap size
+HEALTH_PROBE_SCRIPT = """
+var memory = performance.memory;
+return {ok: true, heapMb: memory ? memory.usedJSHeapSize / 1048576 : 0};
+"""
+
+
+class PoolExhausted(Exception):
+    """No browser became free before the lease timeout"""
+
+
+class BrowserSession:
+    """State of one user or job that outlives any single lease
+
+    A session can be served by different instances over time; its current
+    URL is restored when that happens. data is free for callers' per-session
+    caches.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.current_url: Optional[str] = None
+        self.history: List[str] = []
+        self.data: Dict = {}
+        self.created = time.time()
+        self.leases = 0
+
+
+class _Instance:
+    """A pooled BrowserService and its bookkeeping"""
+
+    def __init__(self, service: BrowserService, instance_id: int):
+        self.service = service
+        self.instance_id = instance_id
+        self.created = time.monotonic()
+        self.last_checked = self.created
+        self.uses = 0
+        self.session: Optional[BrowserSession] = None  # Last session served
+        self.leased = False
+
+
+class BrowserLease:
+    """A BrowserService lent to a session; release it (or use `with`) when done"""
+
+    def __init__(self, pool: "BrowserPool", instance: _Instance, session: BrowserSession, waited: float):
+        self.pool = pool
+        self.service = instance.service
+        self.session = session
+        self.waited = waited
+        self._instance = instance
+        self._released = False
+
+    def release(self, healthy: bool = True):
+        """Return the browser to the pool; healthy=False recycles it"""
+        if not self._released:
+            self._released = True
+            self.pool._release(self._instance, healthy)
+
+    def __enter__(self) -> BrowserService:
+        return self.service
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class BrowserPool:
+    """A bounded set of Chrome instances leased to sessions
+
+    Instances are BrowserServices, each with its own Chrome, actor and
+    page state, started on demand up to size. lease() hands one to a
+    session, preferring the instance that served it last; an instance
+    switching sessions continues in a fresh browser context (see
+    BrowserService.start_private_session) and the session's URL is
+    restored. Instances are health-checked when returned and when leased
+    after sitting idle, and replaced if the page doesn't respond, the
+    heap has grown past max_heap_mb, or they're older than max_age or
+    used more than max_uses times.
+
+    The desktop app is the size=1, headless=False configuration with one
+    lease held for the whole run.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, headless: bool = True,
+                 factory: Optional[Callable[[], BrowserService]] = None, max_uses: int = DEFAULT_MAX_USES,
+                 max_age: float = DEFAULT_MAX_AGE, max_heap_mb: float = DEFAULT_MAX_HEAP_MB, **service_options):
+        self.size = max(1, size)
+        self.factory = factory or (lambda: BrowserService(headless=headless, **service_options))
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.max_heap_mb = max_heap_mb
+
+        self._condition = threading.Condition()
+        self._instances: List[_Instance] = []
+        self._starting = 0  # Instances being created outside the lock
+        self._ids = itertools.count(1)
+        self._sessions: Dict[str, BrowserSession] = {}
+
+        self.stats = {
+            'leases': 0,
+            'total_wait': 0.0,
+            'created': 0,
+            'recycled': 0,
+            'failed_starts': 0,
+        }
+
+    def lease(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> BrowserLease:
+        """Lend a browser to a session, waiting up to timeout for one to be free"""
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        with self._condition:
+            session = self._session(session_id)
+            while True:
+                instance = self._idle_instance(session)
+                if instance:
+                    break
+                if len(self._instances) + self._starting < self.size:
+                    self._starting += 1
+                    instance = None
+                    break
+                # Pool full: take over another session's idle instance
+                instance = self._idle_instance(session, others=True)
+                if instance:
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise PoolExhausted(f"No browser free within {timeout}s")
+                self._condition.wait(remaining)
+
+            if instance:
+                instance.leased = True
+
+        if instance is None:
+            instance = self._start_instance()
+        elif time.monotonic() - instance.last_checked > HEALTH_CHECK_INTERVAL and not self._healthy(instance):
+            self._recycle(instance, replace=True)
+            instance = self._start_instance()
+
+        try:
+            self._assign(instance, session)
+        except Exception:
+            # A browser left half switched between sessions is not handed out again
+            self._recycle(instance)
+            raise
+        waited = time.monotonic() - start
+        with self._condition:
+            self.stats['leases'] += 1
+            self.stats['total_wait'] += waited
+        return BrowserLease(self, instance, session, waited)
+
+    def session(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> BrowserLease:
+        """lease() for use as `with pool.session("alice") as browser:`"""
+        return self.lease(session_id, timeout)
+
+    def _session(self, session_id):
+        """The session for an id, created on first use; lock must be held"""
+        if session_id is None:
+            return BrowserSession(f"anonymous-{time.monotonic_ns()}")
+        if session_id not in self._sessions:
+            self._sessions[session_id] = BrowserSession(session_id)
+        return self._sessions[session_id]
+
+    def _idle_instance(self, session, others=False):
+        """A free instance: the session's previous one, else one no session has
+        used, else (with others) the least used one of another session; lock must be held"""
+        idle = [instance for instance in self._instances if not instance.leased]
+        for instance in idle:
+            if instance.session is session:
+                return instance
+        for instance in idle:
+            if instance.session is None:
+                return instance
+        if others and idle:
+            return min(idle, key=lambda instance: instance.uses)
+        return None
+
+    def _start_instance(self):
+        """Create an instance in a slot already reserved in _starting"""
+        try:
+            service = self.factory()
+            # A background launch is left to finish on its own
+            if service.driver_ready and service.driver is None:
+                raise RuntimeError("Browser failed to start")
+        except Exception:
+            with self._condition:
+                self._starting -= 1
+                self.stats['failed_starts'] += 1
+                self._condition.notify()
+            raise
+
+        instance = _Instance(service, next(self._ids))
+        instance.leased = True
+        service.add_navigation_listener(lambda url, epoch: self._on_navigation(instance, url))
+        with self._condition:
+            self._starting -= 1
+            self._instances.append(instance)
+            self.stats['created'] += 1
+        return instance
+
+    def _assign(self, instance, session):
+        """Point an instance at a session, isolating it from the previous one"""
+        service = instance.service
+        if instance.session is not session:
+            if instance.session is not None:
+                service.start_private_session(self._origins(instance.session))
+            instance.session = session
+            if session.current_url and service.current_url != session.current_url:
+                service.navigate_to(session.current_url)
+            elif not session.current_url and service.current_url:
+                service.reset_page()
+        instance.uses += 1
+        session.leases += 1
+
+    @staticmethod
+    def _origins(session):
+        """Origins of the pages a session visited"""
+        origins = set()
+        for url in session.history:
+            parsed = urlparse(url)
+            if parsed.scheme in ("http", "https") and parsed.netloc:
+                origins.add(f"{parsed.scheme}://{parsed.netloc}")
+        return sorted(origins)
+
+    def _on_navigation(self, instance, url):
+        session = instance.session
+        if session is not None:
+            if not url:
+                return
+            session.current_url = url
+            if not session.history or session.history[-1] != url:
+                session.history.append(url)
+                del session.history[:-MAX_SESSION_HISTORY]
+
+    def _release(self, instance, healthy):
+        healthy = healthy and self._healthy(instance)
+        if not healthy:
+            self._recycle(instance)
+        with self._condition:
+            instance.leased = False
+            self._condition.notify()
+
+    def _healthy(self, instance) -> bool:
+        """Probe an instance; False if it should be replaced"""
+        instance.last_checked = time.monotonic()
+        if instance.uses >= self.max_uses or time.monotonic() - instance.created > self.max_age:
+            return False
+        try:
+            probe = instance.service.driver.execute_script(HEALTH_PROBE_SCRIPT) or {}
+        except Exception as e:
+            print(f"Browser {instance.instance_id} failed its health check: {e}")
+            return False
+        return bool(probe.get('ok')) and probe.get('heapMb', 0) <= self.max_heap_mb
+
+    def _recycle(self, instance, replace=False):
+        """Quit an instance and drop it from the pool
+
+        With replace, its slot is reserved for a replacement the caller
+        starts; otherwise one starts on demand.
+        """
+        print(f"♻️ Recycling browser {instance.instance_id} after {instance.uses} uses")
+        with self._condition:
+            if instance in self._instances:
+                self._instances.remove(instance)
+            if replace:
+                self._starting += 1
+            self.stats['recycled'] += 1
+            self._condition.notify()
+        try:
+            instance.service.cleanup()
+        except Exception as e:
+            print(f"Error closing recycled browser: {e}")
+
+    def check_health(self):
+        """Probe every idle instance now, recycling failed ones"""
+        with self._condition:
+            idle = [instance for instance in self._instances if not instance.leased]
+            for instance in idle:
+                instance.leased = True
+        for instance in idle:
+            self._release(instance, True)
+
+    def get_stats(self) -> Dict:
+        """Lease counts and waits, instances started and recycled, current occupancy"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats['instances'] = len(self._instances)
+            stats['leased'] = sum(instance.leased for instance in self._instances)
+            stats['sessions'] = len(self._sessions)
+        stats['avg_wait'] = stats['total_wait'] / stats['leases'] if stats['leases'] else 0.0
+        return stats
+
+    def close(self):
+        """Quit every instance"""
+        with self._condition:
+            instances = list(self._instances)
+            self._instances.clear()
+            self._condition.notify_all()
+        for instance in instances:
+            try:
+                instance.service.cleanup()
+            except Exception as e:
+                print(f"Error closing browser: {e}")
@@ -2,24 +2,497 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
 from urllib.parse import urlparse
-import time
+import contextlib
+import json
 import threading
 
+from services.browser_actor import ActorDriver, BrowserActor, actor_operation
+from services.cookie_memory import CookieConsentMemory
+from services.driver_cache import DriverCache
+from services.page_readiness import PageReadiness
+from services.request_filter import RequestFilter
+from services.session_history import PAGE_STATE_SCRIPT, SessionHistory
+from utils.fuzzy_match import FuzzyMatcher, MIN_MATCH_SCORE, prominence
+
+# Readability-style main content extraction, run as a single script call.
+# Paragraph-like blocks score their parent (and half to the grandparent);
+# the highest scoring container, discounted by link density, is taken as
+# the main content and its visible text blocks are returned in order.
+READABLE_TEXT_SCRIPT = """
+var SKIP = 'script,style,noscript,nav,header,footer,aside,form,iframe,svg,button,' +
+           '[role=navigation],[role=banner],[role=contentinfo],[role=complementary],[aria-hidden=true]';
+var BLOCKS = 'h1,h2,h3,h4,p,li,blockquote,pre,td,dd,figcaption';
+
+function clean(text) { return (text || '').replace(/\\s+/g, ' ').trim(); }
+function visible(el) { return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length); }
+function linkDensity(el) {
+    var total = clean(el.innerText).length;
+    if (!total) return 1;
+    var links = 0;
+    el.querySelectorAll('a').forEach(function (a) { links += clean(a.innerText).length; });
+    return links / total;
+}
+
+var scores = new Map();
+document.querySelectorAll('p, pre, td, blockquote').forEach(function (p) {
+    if (p.closest(SKIP) || !visible(p)) return;
+    var text = clean(p.innerText);
+    if (text.length < 25) return;
+    var score = 1 + text.split(',').length + Math.min(3, Math.floor(text.length / 100));
+    var parent = p.parentElement;
+    var grand = parent && parent.parentElement;
+    if (parent) scores.set(parent, (scores.get(parent) || 0) + score);
+    if (grand) scores.set(grand, (scores.get(grand) || 0) + score / 2);
+});
+
+var best = null, bestScore = 0;
+scores.forEach(function (score, el) {
+    score = score * (1 - linkDensity(el));
+    if (score > bestScore) { bestScore = score; best = el; }
+});
+if (!best) best = document.querySelector('article, main, [role=main]') || document.body;
+
+var parts = [];
+best.querySelectorAll(BLOCKS).forEach(function (el) {
+    var skipped = el.closest(SKIP);
+    if (skipped && best.contains(skipped) && skipped !== best) return;
+    var outer = el.parentElement && el.parentElement.closest(BLOCKS);
+    if (outer && best.contains(outer)) return;
+    if (!visible(el)) return;
+    var text = clean(el.innerText);
+    if (text) parts.push(text);
+});
+
+var text = parts.length ? parts.join('\\n') : clean(best.innerText);
+return {title: document.title, text: text, length: text.length};
+"""
+
+# Per-page index of clickable elements, installed on every new document
+# (and lazily by execute_script if that wasn't possible). It is built once
+# the DOM is parsed and then kept current by a MutationObserver, so a click
+# lookup only re-reads elements that changed. SPA route changes trigger a
+# rebuild on the next lookup. Elements are keyed by their normalized text,
+# aria-label and title: find() returns exact key matches, candidates()
+# returns every visible element's texts and position for the fuzzy
+# matcher, and pick() the element it chose.
+CLICK_INDEX_SCRIPT = """
+(function () {
+    if (window.__assistantClickIndex) return;
+
+    var SELECTOR = 'button, a, [onclick], [role=button], [role=link]';
+    var MAX_DIRTY = 500;  // More changed nodes than this: rebuild instead
+
+    var entries = new Map();  // element -> {label, role, keys}
+    var byKey = new Map();    // normalized text -> Set of elements
+    var dirty = new Set();
+    var built = false;
+    var stats = {builds: 0, updates: 0, lookups: 0};
+
+    function normalize(text) { return (text || '').replace(/\\s+/g, ' ').trim().toLowerCase(); }
+    function visible(el) {
+        if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return false;
+        var style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.opacity !== '0';
+    }
+    function before(a, b) { return !!(a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING); }
+
+    function unindex(el) {
+        var entry = entries.get(el);
+        if (!entry) return;
+        entry.keys.forEach(function (key) {
+            var set = byKey.get(key);
+            if (set) {
+                set.delete(el);
+                if (!set.size) byKey.delete(key);
+            }
+        });
+        entries.delete(el);
+    }
+
+    function index(el) {
+        unindex(el);
+        if (!el.isConnected || !el.matches(SELECTOR)) return;
+        var aria = (el.getAttribute('aria-label') || '').trim();
+        var title = (el.getAttribute('title') || '').trim();
+        var label = (el.innerText || '').replace(/\\s+/g, ' ').trim() || aria;
+        var keys = [];
+        [label, aria, title].forEach(function (text) {
+            var key = normalize(text);
+            if (key && keys.indexOf(key) === -1) keys.push(key);
+        });
+        if (!keys.length) return;
+
+        var role = el.getAttribute('role') || (el.tagName === 'A' ? 'link' : 'button');
+        entries.set(el, {label: label || title, role: role, keys: keys});
+        keys.forEach(function (key) {
+            if (!byKey.has(key)) byKey.set(key, new Set());
+            byKey.get(key).add(el);
+        });
+    }
+
+    function build() {
+        entries.clear();
+        byKey.clear();
+        dirty.clear();
+        document.querySelectorAll(SELECTOR).forEach(index);
+        built = true;
+        stats.builds++;
+    }
+
+    function refresh() {
+        if (!built) return build();
+        if (!dirty.size) return;
+        dirty.forEach(function (node) {
+            if (!node.isConnected) return;  // Removed entries are pruned on lookup
+            index(node);
+            node.querySelectorAll(SELECTOR).forEach(index);
+        });
+        dirty.clear();
+        stats.updates++;
+    }
+
+    new MutationObserver(function (records) {
+        if (!built) return;
+        records.forEach(function (record) {
+            if (record.type === 'childList') {
+                record.addedNodes.forEach(function (node) { if (node.nodeType === 1) dirty.add(node); });
+            }
+            // Text or attributes changed inside a clickable element
+            var el = record.target.nodeType === 1 ? record.target : record.target.parentElement;
+            var owner = el && el.closest(SELECTOR);
+            if (owner) dirty.add(owner);
+        });
+        if (dirty.size > MAX_DIRTY) built = false;
+    }).observe(document, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: ['aria-label', 'title', 'role', 'onclick', 'href']
+    });
+
+    // Client-side route changes swap most of the page: rebuild on next use
+    function invalidate() { built = false; }
+    ['pushState', 'replaceState'].forEach(function (name) {
+        var original = history[name];
+        history[name] = function () {
+            invalidate();
+            return original.apply(this, arguments);
+        };
+    });
+    window.addEventListener('popstate', invalidate);
+    window.addEventListener('hashchange', invalidate);
+
+    function schedule() { (window.requestIdleCallback || setTimeout)(function () { if (!built) build(); }); }
+    if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', schedule);
+    else schedule();
+
+    function find(search) {
+        refresh();
+        stats.lookups++;
+        var best = null;
+        (byKey.get(normalize(search)) || []).forEach(function (el) {
+            if (!el.isConnected || el.disabled || (best && !before(el, best)) || !visible(el)) return;
+            best = el;
+        });
+        return best ? {element: best, label: entries.get(best).label, score: 100} : null;
+    }
+
+    var picked = [];
+    function candidates() {
+        refresh();
+        stats.lookups++;
+        picked = [];
+        var items = [];
+        entries.forEach(function (entry, el) {
+            if (!el.isConnected) return unindex(el);
+            if (el.disabled || !visible(el)) return;
+            var rect = el.getBoundingClientRect();
+            picked.push(el);
+            items.push({label: entry.label, texts: entry.keys,
+                        rect: [rect.left, rect.top, rect.width, rect.height]});
+        });
+        return {items: items, viewport: [window.innerWidth, window.innerHeight]};
+    }
+
+    function list(limit) {
+        refresh();
+        var elements = [];
+        entries.forEach(function (entry, el) {
+            if (!el.isConnected) return unindex(el);
+            if (!el.disabled) elements.push(el);
+        });
+        elements.sort(function (a, b) { return before(a, b) ? -1 : 1; });
+
+        // What is on screen first, then the rest of the page
+        var onScreen = [], offScreen = [], seen = new Set();
+        elements.forEach(function (el) {
+            var entry = entries.get(el), key = normalize(entry.label);
+            if (!key || seen.has(key) || onScreen.length >= limit || !visible(el)) return;
+            seen.add(key);
+            var rect = el.getBoundingClientRect();
+            var inView = rect.bottom > 0 && rect.top < window.innerHeight;
+            (inView ? onScreen : offScreen).push({label: entry.label, role: entry.role});
+        });
+        return {items: onScreen.concat(offScreen).slice(0, limit), total: elements.length};
+    }
+
+    window.__assistantClickIndex = {
+        find: find,
+        candidates: candidates,
+        pick: function (i) { return picked[i] || null; },
+        list: list,
+        stats: function () { return Object.assign({entries: entries.size}, stats); }
+    };
+})();
+"""
+
+CLICK_FIND_SCRIPT = CLICK_INDEX_SCRIPT + "return window.__assistantClickIndex.find(arguments[0]);"
+CLICK_LIST_SCRIPT = CLICK_INDEX_SCRIPT + "return window.__assistantClickIndex.list(arguments[0]);"
+CLICK_CANDIDATES_SCRIPT = CLICK_INDEX_SCRIPT + "return window.__assistantClickIndex.candidates();"
+CLICK_PICK_SCRIPT = "return window.__assistantClickIndex.pick(arguments[0]);"
+
+# Cookie consent handling, registered for every new document while auto
+# cookies are on. Known consent frameworks are recognized by their accept
+# buttons; otherwise a button with accepting text inside a cookie/consent
+# container is used. A MutationObserver re-checks (throttled) as the page
+# changes, so a banner is accepted as soon as it appears, until
+# WATCH_MS have passed. What worked on each domain is kept by
+# CookieConsentMemory, passed in as window.__assistantCookieMemory and tried
+# first on the next visit; the script only reports it through state().
+COOKIE_CONSENT_SCRIPT = """
+(function () {
+    if (window.__assistantCookieConsent) return;
+
+    var WATCH_MS = 20000;
+    var CHECK_DELAY_MS = 100;
+
+    var FRAMEWORKS = [
+        ['onetrust', '#onetrust-accept-btn-handler'],
+        ['cookiebot', '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll, #CybotCookiebotDialogBodyButtonAccept'],
+        ['didomi', '#didomi-notice-agree-button'],
+        ['quantcast', '.qc-cmp2-summary-buttons button[mode=primary]'],
+        ['trustarc', '#truste-consent-button'],
+        ['funding-choices', '.fc-cta-consent'],
+        ['osano', '.osano-cm-accept-all'],
+        ['cookieyes', '.cky-btn-accept'],
+        ['complianz', '.cmplz-btn.cmplz-accept'],
+        ['iubenda', '.iubenda-cs-accept-btn'],
+        ['klaro', '.cm-btn-accept-all'],
+        ['borlabs', '#BorlabsCookieBox ._brlbs-btn-accept-all'],
+        ['cookieconsent', '.cc-window .cc-allow, .cc-window .cc-dismiss']
+    ];
+    // Frameworks rendering into a shadow root: [name, host, button]
+    var SHADOW_FRAMEWORKS = [
+        ['usercentrics', '#usercentrics-root', '[data-testid=uc-accept-all-button]']
+    ];
+    var CONTAINERS = '[id*=cookie i], [class*=cookie i], [id*=consent i], [class*=consent i], ' +
+                     '[id*=gdpr i], [class*=gdpr i], [aria-label*=cookie i], [aria-label*=consent i], ' +
+                     '[role=dialog], [role=alertdialog], [aria-modal=true]';
+    var BUTTONS = 'button, a, [role=button], input[type=button], input[type=submit]';
+    var ACCEPT_TEXT = new RegExp('^(accept|accept all|accept all cookies|accept cookies|accept and close|' +
+        'allow|allow all|allow all cookies|allow cookies|i accept|i agree|agree|agree and close|' +
+        'agree and continue|yes,? i agree|got it|ok|okay|alle akzeptieren|akzeptieren|tout accepter|' +
+        'accepter|aceptar|aceptar todo|accetta|accetta tutto|alles accepteren|accepteren)$', 'i');
+    // Buttons naming cookies count anywhere on the page
+    var COOKIE_TEXT = /\\b(accept|allow|agree)\\b.*\\bcookies?\\b/i;
+
+    var state = {watching: false, accepted: false, via: null, checks: 0};
+    var observer = null, pending = false, deadline = 0;
+
+    function remembered() {
+        var memory = window.__assistantCookieMemory || {};
+        return memory[location.hostname] || null;
+    }
+
+    function visible(el) {
+        if (!el || el.disabled || !(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return false;
+        var style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.opacity !== '0';
+    }
+    function text(el) {
+        return (el.innerText || el.value || el.getAttribute('aria-label') || '')
+            .replace(/\\s+/g, ' ').trim().replace(/[.!]$/, '');
+    }
+
+    function frameworkButton(name) {
+        for (var i = 0; i < FRAMEWORKS.length; i++) {
+            if (name && FRAMEWORKS[i][0] !== name) continue;
+            var button = document.querySelector(FRAMEWORKS[i][1]);
+            if (visible(button)) return [FRAMEWORKS[i][0], button];
+        }
+        for (var j = 0; j < SHADOW_FRAMEWORKS.length; j++) {
+            if (name && SHADOW_FRAMEWORKS[j][0] !== name) continue;
+            var host = document.querySelector(SHADOW_FRAMEWORKS[j][1]);
+            var shadowButton = host && host.shadowRoot && host.shadowRoot.querySelector(SHADOW_FRAMEWORKS[j][2]);
+            if (visible(shadowButton)) return [SHADOW_FRAMEWORKS[j][0], shadowButton];
+        }
+        return null;
+    }
+
+    function patternButton() {
+        var containers = document.querySelectorAll(CONTAINERS);
+        for (var i = 0; i < containers.length; i++) {
+            var container = containers[i];
+            // Generic dialogs only when they are about cookies
+            if (container.matches('[role=dialog], [role=alertdialog], [aria-modal=true]') &&
+                !/cookie|consent/i.test(container.textContent)) continue;
+            var buttons = container.querySelectorAll(BUTTONS);
+            for (var j = 0; j < buttons.length; j++) {
+                if (ACCEPT_TEXT.test(text(buttons[j])) && visible(buttons[j])) return ['pattern', buttons[j]];
+            }
+        }
+        var all = document.querySelectorAll(BUTTONS);
+        for (var k = 0; k < all.length; k++) {
+            if (COOKIE_TEXT.test(text(all[k])) && visible(all[k])) return ['pattern', all[k]];
+        }
+        return null;
+    }
+
+    function accept() {
+        state.checks++;
+        if (!document.body) return {accepted: false, via: null};
+        var memory = remembered();
+        var found = (memory && memory.via !== 'pattern' && frameworkButton(memory.via)) ||
+                    frameworkButton(null) || patternButton();
+        if (!found) return {accepted: false, via: null};
+
+        found[1].click();
+        state.accepted = true;
+        state.via = found[0];
+        return {accepted: true, via: found[0]};
+    }
+
+    function check() {
+        pending = false;
+        if (!state.watching) return;
+        if (accept().accepted || Date.now() > deadline) stop();
+    }
+
+    function schedule() {
+        if (pending || !state.watching) return;
+        pending = true;
+        setTimeout(check, CHECK_DELAY_MS);
+    }
+
+    function watch() {
+        if (state.watching || state.accepted) return;
+        state.watching = true;
+        deadline = Date.now() + WATCH_MS;
+        observer = new MutationObserver(schedule);
+        observer.observe(document, {childList: true, subtree: true});
+        schedule();
+    }
+
+    function stop() {
+        state.watching = false;
+        if (observer) observer.disconnect();
+        observer = null;
+    }
+
+    window.__assistantCookieConsent = {
+        accept: accept,
+        watch: watch,
+        stop: stop,
+        state: function () { return Object.assign({remembered: remembered()}, state); }
+    };
+})();
+"""
+COOKIE_WATCH_SCRIPT = COOKIE_CONSENT_SCRIPT + "window.__assistantCookieConsent.watch();"
+COOKIE_ACCEPT_SCRIPT = COOKIE_CONSENT_SCRIPT + "return window.__assistantCookieConsent.accept();"
+COOKIE_STOP_SCRIPT = "if (window.__assistantCookieConsent) window.__assistantCookieConsent.stop();"
+COOKIE_STATE_SCRIPT = "return window.__assistantCookieConsent ? window.__assistantCookieConsent.state() : null;"
+
 
 class BrowserService:
-    def __init__(self):
-        self.driver = None
+    def __init__(self, driver=None, block_requests=True, background=False, timer=None, driver_cache=None,
+                 headless=False, cookie_memory=None):
+        """driver: use an existing WebDriver instead of launching Chrome
+        block_requests: block ads, trackers, media and fonts (see RequestFilter)
+        headless: launch Chrome without a window
+        background: launch Chrome on a thread and return immediately; the
+            first use of .driver waits until it is up
+        timer: optional StartupTimer to record driver resolution and launch in
+        cookie_memory: CookieConsentMemory of what accepted each domain's banner"""
+        self._driver = None
+        self._driver_ready = threading.Event()
         self.current_url = None
+        self.navigation_epoch = 0  # Incremented on every page change
+        self._navigation_listeners = []
+        # Pages of this tab with their fingerprints, for reuse on back/forward
+        self.history = SessionHistory()
         self.auto_cookies_enabled = False
-        self.setup_webdriver()
+        self._cookie_script_id = None  # CDP identifier of the registered consent script
+        self.cookie_memory = cookie_memory or CookieConsentMemory()
+        self._click_matcher = None  # (labels, FuzzyMatcher) of the last fuzzy lookup
+        self._browser_context = None  # CDP browser context of the current tab, if not the default one
+        self.block_requests = block_requests
+        self.headless = headless
+        self.timer = timer
+        self.driver_cache = driver_cache or DriverCache()
+        # Every driver call runs on this one thread (see BrowserActor)
+        self.actor = BrowserActor()
+
+        # Event-driven waits for page loads instead of fixed sleeps
+        self.readiness = PageReadiness(None)
+        self.request_filter = RequestFilter(None)
+        self.readiness.add_listener(self.request_filter.on_network_event)
+
+        if background and driver is None:
+            threading.Thread(target=self._start, daemon=True, name="browser-startup").start()
+        else:
+            self._start(driver)
+
+    @property
+    def driver(self):
+        """The WebDriver (calls run on the actor thread), waiting for a background
+        launch to finish; None if it failed"""
+        if not self._driver_ready.is_set():
+            print("⏳ Waiting for the browser to start...")
+            self._driver_ready.wait()
+        return self._driver
+
+    @property
+    def driver_ready(self):
+        """Whether .driver can be used without waiting"""
+        return self._driver_ready.is_set()
+
+    def _start(self, driver=None):
+        """Launch (or adopt) the driver and attach the page helpers to it"""
+        try:
+            if driver is None:
+                driver = self.setup_webdriver()
+            if driver is not None:
+                # Nobody else can reach the driver yet, so set it up directly
+                self._driver = self.request_filter.driver = driver
+                with self._timed("browser setup"):
+                    if self.block_requests:
+                        self.request_filter.enable()
+                    self._install_page_scripts()
+                driver = ActorDriver(driver, self.actor)
+            self._driver = driver
+            self.readiness.driver = driver
+            self.request_filter.driver = driver
+        finally:
+            self._driver_ready.set()
+
+    def _timed(self, stage):
+        if self.timer:
+            return self.timer.stage(stage)
+        return contextlib.nullcontext()
 
     def setup_webdriver(self):
-        """Setup Selenium WebDriver"""
+        """Launch Chrome and return its WebDriver, or None on failure
+
+        The chromedriver path comes from the local driver cache, so no
+        network check is needed; it is resolved again if launching with a
+        cached driver fails.
+        """
         try:
             chrome_options = Options()
-            chrome_options.add_argument("--start-maximized")
+            if self.headless:
+                chrome_options.add_argument("--headless=new")
+                chrome_options.add_argument("--window-size=1920,1080")
+            else:
+                chrome_options.add_argument("--start-maximized")
             chrome_options.add_argument("--disable-notifications")
             chrome_options.add_argument("--disable-infobars")
             chrome_options.add_argument("--disable-extensions")
@@ -28,37 +501,174 @@ class BrowserService:
             chrome_options.add_argument("--disable-web-security")
             chrome_options.add_argument("--disable-features=VizDisplayCompositor")
 
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # CDP network events for readiness detection
+            logging_prefs, perf_prefs = PageReadiness.performance_logging_prefs()
+            chrome_options.set_capability("goog:loggingPrefs", logging_prefs)
+            chrome_options.add_experimental_option("perfLoggingPrefs", perf_prefs)
+
+            with self._timed("driver resolution"):
+                driver_path = self.driver_cache.get()
+                cached = driver_path is not None
+                if not cached:
+                    driver_path = self._resolve_driver()
+
+            try:
+                with self._timed("chrome launch"):
+                    driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            except Exception as e:
+                if not cached:
+                    raise
+                print(f"Cached chromedriver failed ({e}), resolving it again")
+                self.driver_cache.clear()
+                with self._timed("driver resolution (refresh)"):
+                    driver_path = self._resolve_driver()
+                with self._timed("chrome launch (retry)"):
+                    driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+
             print("WebDriver initialized successfully")
+            return driver
         except Exception as e:
             print(f"Error setting up WebDriver: {e}")
-            self.driver = None
+            return None
+
+    def _resolve_driver(self):
+        """Driver path from webdriver-manager, or None to let Selenium Manager find one"""
+        try:
+            return self.driver_cache.resolve()
+        except Exception as e:
+            print(f"webdriver-manager failed ({e}), falling back to Selenium Manager")
+            return None
+
+    def _install_page_scripts(self):
+        """Run the clickable element index on every new document"""
+        if not self._driver or not hasattr(self._driver, "execute_cdp_cmd"):
+            return
+        try:
+            self._driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": CLICK_INDEX_SCRIPT})
+        except Exception as e:
+            # Still installed on demand by the first lookup on each page
+            print(f"Could not preinstall page scripts: {e}")
+
+    def add_navigation_listener(self, callback):
+        """Register callback(url, epoch) to be called on every page change"""
+        self._navigation_listeners.append(callback)
+
+    def _set_current_url(self, url):
+        """Record a page change and notify listeners"""
+        self.current_url = url
+        self.navigation_epoch += 1
+        for callback in self._navigation_listeners:
+            try:
+                callback(url, self.navigation_epoch)
+            except Exception as e:
+                print(f"Navigation listener error: {e}")
+
+    def _page_state(self):
+        """Fingerprint and scroll position of the current page, or None"""
+        try:
+            return self.driver.execute_script(PAGE_STATE_SCRIPT)
+        except Exception as e:
+            print(f"Could not read page state: {e}")
+            return None
+
+    def _record_visit(self):
+        """Add the page just opened to the session history"""
+        self.history.visit(self.current_url, self._page_state())
 
+    def _leave_page(self):
+        """Remember how the current page looks and where it is scrolled before moving away"""
+        if self.history.current and self.current_url:
+            self.history.current.update(self._page_state())
+        # A banner may have been accepted after the page had loaded
+        if self.auto_cookies_enabled:
+            self._learn_cookie_consent()
+
+    def wait_until_ready(self, timeout=None):
+        """Wait until the current page has loaded and settled (see PageReadiness)"""
+        return self.readiness.wait(timeout)
+
+    @actor_operation
     def enable_auto_cookies(self):
-        """Enable automatic cookie acceptance for all pages"""
+        """Enable automatic cookie acceptance for all pages
+
+        The consent script is registered for every new document, so banners
+        are accepted as they appear without any WebDriver calls per page.
+        """
         self.auto_cookies_enabled = True
+        self._register_cookie_script()
+        self._watch_cookies(force=True)
         print("✅ Auto-accept cookies enabled for all pages")
 
-    def disable_auto_cookies(self):
-        """Disable automatic cookie acceptance"""
-        self.auto_cookies_enabled = False
-        print("❌ Auto-accept cookies disabled")
+    def _cookie_script(self, script):
+        """script preceded by the remembered consent buttons of every domain"""
+        return f"window.__assistantCookieMemory = {json.dumps(self.cookie_memory.snapshot())};\n{script}"
+
+    def _register_cookie_script(self):
+        """Run the consent watcher on every new document of the current tab"""
+        self._cookie_script_id = None
+        if self.driver and hasattr(self.driver, "execute_cdp_cmd"):
+            try:
+                result = self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument",
+                                                     {"source": self._cookie_script(COOKIE_WATCH_SCRIPT)})
+                self._cookie_script_id = result.get("identifier")
+            except Exception as e:
+                # Started by _watch_cookies after each navigation instead
+                print(f"Could not register cookie script: {e}")
 
-    def _auto_accept_cookies_background(self):
-        """Auto accept cookies in background if enabled"""
-        if not self.auto_cookies_enabled:
+    def _unregister_cookie_script(self):
+        if self._cookie_script_id is not None:
+            try:
+                self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument",
+                                            {"identifier": self._cookie_script_id})
+            except Exception as e:
+                print(f"Could not unregister cookie script: {e}")
+            self._cookie_script_id = None
+
+    def _learn_cookie_consent(self):
+        """Remember what accepted the current page's banner, for its domain's next visit"""
+        if not self.current_url:
+            return
+        try:
+            state = self.driver.execute_script(COOKIE_STATE_SCRIPT)
+        except Exception:
             return
+        if not state or not state.get('accepted'):
+            return
+        if self.cookie_memory.remember(urlparse(self.current_url).hostname, state.get('via')):
+            # The registered script carries the memory it was registered with
+            if self._cookie_script_id is not None:
+                self._unregister_cookie_script()
+                self._register_cookie_script()
 
-        def accept_task():
-            time.sleep(3)  # Wait for page to load
+    @actor_operation
+    def disable_auto_cookies(self):
+        """Disable automatic cookie acceptance"""
+        self.auto_cookies_enabled = False
+        self._unregister_cookie_script()
+        if self.driver:
             try:
-                self.auto_accept_cookies()
-            except:
+                self.driver.execute_script(COOKIE_STOP_SCRIPT)
+            except Exception:
                 pass
+        print("❌ Auto-accept cookies disabled")
 
-        threading.Thread(target=accept_task, daemon=True).start()
+    def _watch_cookies(self, force=False):
+        """Start the consent watcher on the current page if it isn't registered for new documents
+
+        Called once a page has loaded, which is also when a banner accepted
+        during the load is remembered.
+        """
+        if not self.auto_cookies_enabled or not self.driver:
+            return
+        self._learn_cookie_consent()
+        if self._cookie_script_id is not None and not force:
+            return
+        try:
+            self.driver.execute_script(self._cookie_script(COOKIE_WATCH_SCRIPT))
+        except Exception as e:
+            print(f"Cookie watcher error: {e}")
 
+    @actor_operation
     def navigate_to(self, website):
         """Navigate to website"""
         if not self.driver:
@@ -77,12 +687,15 @@ class BrowserService:
                     search_query = website.replace(" ", "+")
                     website = f"https://www.google.com/search?q={search_query}"
 
+            self._leave_page()
+            self.readiness.begin()
             self.driver.get(website)
-            time.sleep(2)
-            self.current_url = self.driver.current_url
+            self.wait_until_ready()
+            self._set_current_url(self.driver.current_url)
+            self._record_visit()
 
-            # Auto-accept cookies if enabled
-            self._auto_accept_cookies_background()
+            # Without CDP the consent watcher is started per page
+            self._watch_cookies()
 
             parsed_url = urlparse(self.current_url)
             domain = parsed_url.netloc or parsed_url.path
@@ -91,6 +704,7 @@ class BrowserService:
         except Exception as e:
             return False, f"Navigation failed: {e}"
 
+    @actor_operation
     def click_element(self, element_text):
         """Click on element by text with fuzzy matching"""
         if not self.driver:
@@ -101,61 +715,21 @@ class BrowserService:
             search_text = element_text.lower().strip()
             search_text = search_text.replace("click on ", "").replace("click ", "")
 
-            # Find clickable elements
-            clickable_elements = []
-            try:
-                buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                links = self.driver.find_elements(By.TAG_NAME, "a")
-                onclick_elements = self.driver.find_elements(By.XPATH, "//*[@onclick]")
-                role_elements = self.driver.find_elements(By.XPATH, "//*[@role='button' or @role='link']")
-
-                clickable_elements.extend(buttons + links + onclick_elements + role_elements)
-            except Exception as e:
-                return False, f"Error finding elements: {e}"
-
-            # Find best match
-            best_match = None
-            best_score = 0
-
-            for element in clickable_elements:
-                try:
-                    if not element.is_displayed() or not element.is_enabled():
-                        continue
-
-                    element_text_content = element.text.lower().strip()
-                    if not element_text_content:
-                        element_text_content = element.get_attribute('aria-label')
-                        if element_text_content:
-                            element_text_content = element_text_content.lower().strip()
-
-                    if not element_text_content:
-                        continue
-
-                    # Calculate similarity
-                    score = 0
-                    if element_text_content == search_text:
-                        score = 100
-                    elif search_text in element_text_content:
-                        score = 80
-                    elif all(word in element_text_content for word in search_text.split()):
-                        score = 60
-
-                    if score > best_score:
-                        best_score = score
-                        best_match = element
-
-                except:
-                    continue
+            best_match, matched_text, best_score = self.find_click_target(search_text)
 
             # Click best match
-            if best_match and best_score > 30:
+            if best_match and best_score >= MIN_MATCH_SCORE:
                 try:
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", best_match)
-                    time.sleep(0.5)
+                    # An instant scroll has finished when the script returns, even on
+                    # pages with smooth scrolling, so there is nothing to wait for
+                    self.driver.execute_script(
+                        "arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", best_match)
 
-                    matched_text = best_match.text or best_match.get_attribute('aria-label') or "element"
+                    matched_text = matched_text or "element"
 
                     # Try multiple click methods
+                    self._leave_page()
+                    self.readiness.begin()
                     try:
                         best_match.click()
                     except:
@@ -170,13 +744,13 @@ class BrowserService:
                                 element.dispatchEvent(clickEvent);
                             """, best_match)
 
-                    time.sleep(1)
+                    self.wait_until_ready()
 
                     # Update URL if changed
                     if self.driver.current_url != initial_url:
-                        self.current_url = self.driver.current_url
-                        # Auto-accept cookies on new page
-                        self._auto_accept_cookies_background()
+                        self._set_current_url(self.driver.current_url)
+                        self._record_visit()
+                        self._watch_cookies()
 
                     return True, f"Clicked: {matched_text}"
 
@@ -188,6 +762,126 @@ class BrowserService:
         except Exception as e:
             return False, f"Click error: {e}"
 
+    @actor_operation
+    def find_click_target(self, search_text, in_browser=True):
+        """Find the clickable element best matching search_text
+
+        Returns (element, label, score), with element None if nothing
+        matched. Exact label matches come straight from the page's
+        clickable element index; otherwise the index's visible elements are
+        ranked with the fuzzy matcher, weighted by how prominent they are.
+        The element-by-element WebDriver scan is only used if the scripts
+        fail or in_browser is False.
+        """
+        search_text = search_text.lower().strip()
+        if in_browser:
+            try:
+                match = self.driver.execute_script(CLICK_FIND_SCRIPT, search_text)
+                if match:
+                    return match['element'], match['label'], match['score']
+                return self._find_click_target_fuzzy(search_text)
+            except Exception as e:
+                print(f"Click target script failed, scanning elements: {e}")
+
+        return self._find_click_target_scan(search_text)
+
+    def _find_click_target_fuzzy(self, search_text):
+        """Rank the page index's candidates in Python and fetch the winner's element"""
+        result = self.driver.execute_script(CLICK_CANDIDATES_SCRIPT) or {}
+        items = result.get('items', [])
+        viewport = result.get('viewport') or [1, 1]
+
+        # One row per text of each element (its text, aria-label, title)
+        rows, owners = [], []
+        for index, item in enumerate(items):
+            for text in item.get('texts') or [item.get('label', '')]:
+                rows.append(text)
+                owners.append(index)
+
+        matcher = self._matcher(rows)
+        weights = [prominence(items[owner]['rect'], viewport) for owner in owners]
+        ranked = matcher.rank(search_text, weights, limit=1)
+        if not ranked:
+            return None, None, 0
+
+        score, row = ranked[0]
+        item = owners[row]
+        element = self.driver.execute_script(CLICK_PICK_SCRIPT, item)
+        return element, items[item].get('label'), score
+
+    def _matcher(self, labels):
+        """FuzzyMatcher for labels, reused while the page's candidates don't change"""
+        key = tuple(labels)
+        if self._click_matcher is None or self._click_matcher[0] != key:
+            self._click_matcher = (key, FuzzyMatcher(labels))
+        return self._click_matcher[1]
+
+    @actor_operation
+    def list_clickable(self, limit=15):
+        """Labels of clickable elements, those on screen first
+
+        Returns (items, total): up to limit dicts with 'label' and 'role',
+        and how many clickable elements the page has.
+        """
+        if not self.driver:
+            return [], 0
+
+        try:
+            result = self.driver.execute_script(CLICK_LIST_SCRIPT, limit) or {}
+            return result.get('items', []), result.get('total', 0)
+        except Exception as e:
+            print(f"Listing clickable elements failed: {e}")
+            return [], 0
+
+    def _find_click_target_scan(self, search_text):
+        """Fallback click target search with one WebDriver call per element property"""
+        clickable_elements = []
+        try:
+            buttons = self.driver.find_elements(By.TAG_NAME, "button")
+            links = self.driver.find_elements(By.TAG_NAME, "a")
+            onclick_elements = self.driver.find_elements(By.XPATH, "//*[@onclick]")
+            role_elements = self.driver.find_elements(By.XPATH, "//*[@role='button' or @role='link']")
+
+            clickable_elements.extend(buttons + links + onclick_elements + role_elements)
+        except Exception as e:
+            print(f"Error finding elements: {e}")
+            return None, None, 0
+
+        candidates = []
+        for element in clickable_elements:
+            try:
+                if not element.is_displayed() or not element.is_enabled():
+                    continue
+
+                label = element.text.strip() or (element.get_attribute('aria-label') or "").strip()
+                if label:
+                    candidates.append((element, label))
+
+            except:
+                continue
+
+        best = FuzzyMatcher([label for _, label in candidates]).best(search_text)
+        if not best:
+            return None, None, 0
+        element, label = candidates[best[1]]
+        return element, label, best[0]
+
+    @actor_operation
+    def extract_main_text(self):
+        """Extract the page's readable main content with one script call
+
+        Returns a dict with 'title', 'text' and 'length', or None on failure.
+        """
+        if not self.driver:
+            return None
+
+        try:
+            return self.driver.execute_script(READABLE_TEXT_SCRIPT)
+        except Exception as e:
+            print(f"Text extraction error: {e}")
+            return None
+
+    @actor_operation
     def scroll_page(self, direction, amount="page"):
         """Scroll the page"""
         if not self.driver:
@@ -212,72 +906,154 @@ class BrowserService:
         except Exception as e:
             return False, f"Scroll error: {e}"
 
-    def go_back(self):
-        """Navigate back"""
+    @actor_operation
+    def reset_page(self):
+        """Show a blank page and forget the current one, e.g. before serving another session"""
         if not self.driver:
-            return False, "Browser not available"
+            return
+        self.driver.get("about:blank")
+        self.history.clear()
+        self._set_current_url(None)
+
+    @actor_operation
+    def start_private_session(self, origins=()):
+        """Continue in a new tab of a fresh browser context, leaving nothing of the previous user
+
+        A browser context has its own cookies, storage, HTTP cache and
+        service workers, and a new tab has no back/forward list or
+        sessionStorage. The tab's page scripts, request blocking and consent
+        script are set up again. Without contexts, cookies, the HTTP cache,
+        the tab's history and the storage of origins are cleared instead.
+        """
+        if not self.driver:
+            return
+
+        driver = self.driver
+        try:
+            context = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            params = {"url": "about:blank", "browserContextId": context}
+            if self.headless:
+                params.update(width=1920, height=1080)
+            target = driver.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+        except Exception as e:
+            print(f"Browser contexts unavailable ({e}), clearing browsing data instead")
+            self._clear_browsing_data(origins)
+            return
 
+        # chromedriver window handles are CDP target ids
+        previous_tab, previous_context = driver.current_window_handle, self._browser_context
+        driver.switch_to.window(target)
+        self._browser_context = context
+        for command, params in (("Target.closeTarget", {"targetId": previous_tab}),
+                                ("Target.disposeBrowserContext", {"browserContextId": previous_context})):
+            if params.get("targetId") or params.get("browserContextId"):
+                try:
+                    driver.execute_cdp_cmd(command, params)
+                except Exception as e:
+                    print(f"Could not clean up after the previous session ({command}): {e}")
+
+        # Blocking rules and new-document scripts belong to the tab
+        if self.request_filter.enabled:
+            self.request_filter.enable()
+        self._install_page_scripts()
+        if self.auto_cookies_enabled:
+            self._register_cookie_script()
+        self.readiness.begin()
+        self.history.clear()
+        self._set_current_url(None)
+
+    def _clear_browsing_data(self, origins):
+        """Clear cookies, cache, tab history and the storage of origins in the current tab"""
+        commands = [("Network.clearBrowserCookies", {}), ("Network.clearBrowserCache", {}),
+                    ("DOMStorage.enable", {})]
+        for origin in origins:
+            commands.append(("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}))
+            commands.append(("DOMStorage.clear", {"storageId": {"securityOrigin": origin, "isLocalStorage": False}}))
+        for command, params in commands:
+            try:
+                self.driver.execute_cdp_cmd(command, params)
+            except Exception as e:
+                print(f"Could not clear browsing data ({command}): {e}")
+        self.reset_page()
         try:
-            self.driver.back()
-            time.sleep(1)
-            self.current_url = self.driver.current_url
-            # Auto-accept cookies on back navigation
-            self._auto_accept_cookies_background()
-            return True, "Navigated back"
+            self.driver.execute_cdp_cmd("Page.resetNavigationHistory", {})
         except Exception as e:
-            return False, f"Back navigation failed: {e}"
+            print(f"Could not clear tab history: {e}")
 
+    @actor_operation
+    def go_back(self):
+        """Navigate back"""
+        return self._step_history(-1)
+
+    @actor_operation
     def go_forward(self):
         """Navigate forward"""
+        return self._step_history(1)
+
+    def _step_history(self, step):
+        """Go back (-1) or forward (+1) a page and match it with its history entry
+
+        A page whose fingerprint hasn't changed since it was left keeps its
+        entry's analysis handles (history.current.changed is False) and is
+        scrolled back to where it was left.
+        """
         if not self.driver:
             return False, "Browser not available"
 
+        direction = "back" if step < 0 else "forward"
         try:
-            self.driver.forward()
-            time.sleep(1)
-            self.current_url = self.driver.current_url
-            # Auto-accept cookies on forward navigation
-            self._auto_accept_cookies_background()
-            return True, "Navigated forward"
+            self._leave_page()
+            self.readiness.begin()
+            if step < 0:
+                self.driver.back()
+            else:
+                self.driver.forward()
+            self.wait_until_ready()
+            self._set_current_url(self.driver.current_url)
+
+            state = self._page_state()
+            entry, known = self.history.move(step, self.current_url, state)
+            if known:
+                if entry.revisit(state):
+                    print(f"♻️ {self.current_url} unchanged since it was left")
+                self._restore_scroll(entry.scroll, state)
+            self._watch_cookies()
+            return True, f"Navigated {direction}"
+        except Exception as e:
+            return False, f"{direction.capitalize()} navigation failed: {e}"
+
+    def _restore_scroll(self, scroll, state):
+        """Scroll to where a page was left, unless the browser already did"""
+        if not state or (int(state.get('scrollX') or 0), int(state.get('scrollY') or 0)) == scroll:
+            return
+        try:
+            self.driver.execute_script("window.scrollTo(arguments[0], arguments[1]);", *scroll)
         except Exception as e:
-            return False, f"Forward navigation failed: {e}"
+            print(f"Could not restore scroll position: {e}")
 
+    @actor_operation
     def auto_accept_cookies(self):
-        """Auto accept cookies with common patterns"""
+        """Accept a cookie banner on the current page now, in one script call"""
         if not self.driver:
             return False, "Browser not available"
 
         try:
-            accept_selectors = [
-                "//button[contains(text(), 'Accept')]",
-                "//button[contains(text(), 'I agree')]",
-                "//button[contains(text(), 'Allow')]",
-                "//button[contains(text(), 'OK')]",
-                "//button[contains(text(), 'Got it')]",
-                "//button[contains(@aria-label, 'Accept')]",
-                "//button[contains(@class, 'accept')]",
-                "//*[@role='button'][contains(text(), 'Accept')]",
-                "//button[contains(@id, 'accept')]",
-                "//button[contains(@class, 'cookie')]",
-                "//a[contains(text(), 'Accept')]"
-            ]
-
-            for selector in accept_selectors:
-                try:
-                    elements = self.driver.find_elements(By.XPATH, selector)
-                    for element in elements:
-                        if element.is_displayed() and element.is_enabled():
-                            self.driver.execute_script("arguments[0].click();", element)
-                            print("🍪 Cookies accepted automatically")
-                            return True, "Cookies accepted"
-                except:
-                    continue
-
+            result = self.driver.execute_script(self._cookie_script(COOKIE_ACCEPT_SCRIPT)) or {}
+            if result.get('accepted'):
+                if self.current_url:
+                    self.cookie_memory.remember(urlparse(self.current_url).hostname, result.get('via'))
+                print(f"🍪 Cookies accepted automatically ({result.get('via')})")
+                return True, "Cookies accepted"
             return False, "No cookie popup found"
 
         except Exception as e:
             return False, f"Cookie acceptance failed: {e}"
 
+    def get_request_stats(self, url=None):
+        """Requests, bytes and blocked requests of a page, the current one by default"""
+        self.readiness.flush()
+        return self.request_filter.page_stats(url or self.current_url)
+
     def get_current_domain(self):
         """Get current domain"""
         if self.current_url:
@@ -291,4 +1067,5 @@ class BrowserService:
             if self.driver:
                 self.driver.quit()
         except:
-            pass
\ No newline at end of file
+            pass
+        self.actor.stop()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_COOKIE_MEMORY = os.path.join(os.path.expanduser("~"), ".web_assistant", "cookie_consent.json")
+MAX_DOMAINS = 500
+
+
+class CookieConsentMemory:
+    """Remembers, per domain, which consent button accepted its cookie banner
+
+    The consent script tries the remembered framework first on the next
+    visit. Kept here rather than in the site's own storage, so nothing is
+    written into the pages visited and it survives Chrome's throwaway
+    profiles and private sessions.
+    """
+
+    def __init__(self, path: str = DEFAULT_COOKIE_MEMORY):
+        self.path = path
+        self._lock = threading.Lock()
+        self._domains = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                domains = json.load(f)
+            return domains if isinstance(domains, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """domain -> {"via": framework name or "pattern", "at": time}"""
+        with self._lock:
+            return dict(self._domains)
+
+    def get(self, domain: str) -> Optional[str]:
+        with self._lock:
+            entry = self._domains.get(domain)
+        return entry.get("via") if entry else None
+
+    def remember(self, domain: str, via: str) -> bool:
+        """Record what accepted domain's banner; True if that is new"""
+        if not domain or not via or self.get(domain) == via:
+            return False
+        with self._lock:
+            # Merge with what other browsers wrote since this one loaded the file
+            domains = self._load()
+            for name, entry in self._domains.items():
+                if entry.get("at", 0) >= domains.get(name, {}).get("at", 0):
+                    domains[name] = entry
+            domains[domain] = {"via": via, "at": time.time()}
+            if len(domains) > MAX_DOMAINS:
+                oldest = sorted(domains, key=lambda name: domains[name].get("at", 0))
+                for name in oldest[:len(domains) - MAX_DOMAINS]:
+                    del domains[name]
+            self._domains = domains
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(domains, f)
+            except OSError as e:
+                print(f"⚠️ Could not save cookie consent memory: {e}")
+        return True
@@ -0,0 +1,48 @@
+import json
+import os
+from typing import Optional
+
+DEFAULT_DRIVER_CACHE = os.path.join(os.path.expanduser("~"), ".web_assistant", "chromedriver.json")
+
+
+class DriverCache:
+    """Remembers the resolved chromedriver binary so startup needs no network
+
+    ChromeDriverManager().install() checks online for the driver matching
+    the installed Chrome on every call. Its result is stored here and
+    reused until launching with it fails (e.g. after a Chrome update), at
+    which point BrowserService resolves it again.
+    """
+
+    def __init__(self, path: str = DEFAULT_DRIVER_CACHE):
+        self.path = path
+
+    def get(self) -> Optional[str]:
+        """Cached driver path, if it still points at an executable"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                driver_path = json.load(f).get("path")
+        except (OSError, ValueError, AttributeError):
+            return None
+        if driver_path and os.access(driver_path, os.X_OK):
+            return driver_path
+        return None
+
+    def resolve(self) -> str:
+        """Resolve the driver with webdriver-manager (may use the network) and cache it"""
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        driver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"path": driver_path}, f)
+        except OSError as e:
+            print(f"⚠️ Could not cache driver path: {e}")
+        return driver_path
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
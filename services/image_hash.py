@@ -0,0 +1,188 @@
+import threading
+from typing import Optional, Dict, List, Set, Tuple
+
+from PIL import Image
+
+from services.screenshot_store import TiledScreenshot
+
+DEFAULT_HASH_SIZE = 16  # 16x16 gradient hash = 256 bits
+
+# Tiled captures are hashed from a thumbnail this wide instead of a full canvas
+TILED_HASH_WIDTH = 256
+
+# Change detection between captures: the page is cut into squares of
+# DIFF_TILE_SIZE pixels, each with a small gradient hash and mean brightness
+# (the gradient alone can't see a flat area changing colour)
+DIFF_TILE_SIZE = 256
+DIFF_HASH_SIZE = 8
+DIFF_HASH_THRESHOLD = 3
+DIFF_BRIGHTNESS_THRESHOLD = 8
+
+Box = Tuple[int, int, int, int]  # (left, top, right, bottom)
+
+
+def difference_hash(image: Image.Image, hash_size: int = DEFAULT_HASH_SIZE) -> int:
+    """Compute a gradient (dHash) perceptual hash of an image as an int
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale grid and
+    each bit records whether a cell is brighter than its right neighbour, so
+    small rendering differences flip few bits while layout changes flip many.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_screenshot(screenshot, hash_size: int = DEFAULT_HASH_SIZE) -> Optional[int]:
+    """Hash an in-memory Screenshot or TiledScreenshot, returning None if it can't be decoded"""
+    try:
+        if isinstance(screenshot, TiledScreenshot):
+            return difference_hash(screenshot.thumbnail(TILED_HASH_WIDTH), hash_size)
+        return difference_hash(screenshot.image, hash_size)
+    except Exception as e:
+        print(f"⚠️ Perceptual hash error: {e}")
+        return None
+
+
+def tile_hashes(screenshot, tile_size: int = DIFF_TILE_SIZE,
+                hash_size: int = DIFF_HASH_SIZE) -> Dict[Box, Tuple[int, int]]:
+    """(gradient hash, mean brightness) of each tile_size square, keyed by its box in the page"""
+    parts = screenshot if isinstance(screenshot, TiledScreenshot) else [screenshot]
+    signatures = {}
+    for part in parts:
+        image = part.image.convert("L")
+        for y in range(0, image.height, tile_size):
+            for x in range(0, image.width, tile_size):
+                box = (x, y, min(x + tile_size, image.width), min(y + tile_size, image.height))
+                tile = image.crop(box)
+                brightness = sum(tile.resize((4, 4), Image.BOX).getdata()) // 16
+                signatures[(box[0], box[1] + part.top, box[2], box[3] + part.top)] = (
+                    difference_hash(tile, hash_size), brightness
+                )
+    return signatures
+
+
+class ScreenshotDiff:
+    """Which tiles of a page changed between two captures"""
+
+    def __init__(self, changed: List[Box], total_tiles: int):
+        self.changed = changed
+        self.total_tiles = total_tiles
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.changed
+
+    @property
+    def changed_fraction(self) -> float:
+        return len(self.changed) / self.total_tiles if self.total_tiles else 1.0
+
+    def bands(self) -> List[Tuple[int, int]]:
+        """(top, bottom) of each run of vertically adjacent rows with changed tiles"""
+        bands = []
+        for _, top, _, bottom in self.changed:  # Sorted top to bottom
+            if bands and top <= bands[-1][1]:
+                bands[-1] = (bands[-1][0], max(bands[-1][1], bottom))
+            else:
+                bands.append((top, bottom))
+        return bands
+
+
+def diff_tile_hashes(previous: Dict[Box, Tuple[int, int]], current: Dict[Box, Tuple[int, int]],
+                     threshold: int = DIFF_HASH_THRESHOLD) -> ScreenshotDiff:
+    """Compare tile signatures from tile_hashes(); tiles with no counterpart count as changed"""
+    changed = []
+    for box, (value, brightness) in current.items():
+        old = previous.get(box)
+        if (old is None or hamming_distance(old[0], value) > threshold
+                or abs(old[1] - brightness) > DIFF_BRIGHTNESS_THRESHOLD):
+            changed.append(box)
+    changed.sort(key=lambda box: (box[1], box[0]))
+    return ScreenshotDiff(changed, len(current))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+class HashIndex:
+    """Multi-index hash table for nearest perceptual-hash lookup
+
+    Hashes are split into max_threshold + 1 bands, each with its own exact
+    lookup table. Two hashes within max_threshold bits of each other must
+    agree on at least one whole band, so a query only compares against the
+    few entries sharing a band instead of scanning every stored hash.
+    """
+
+    def __init__(self, bits: int = DEFAULT_HASH_SIZE * DEFAULT_HASH_SIZE, max_threshold: int = 16):
+        self.bits = bits
+        self.max_threshold = max_threshold
+        band_count = min(max_threshold + 1, bits)
+
+        # (shift, mask) per band, covering all bits
+        self._bands = []
+        start = 0
+        for band in range(band_count):
+            width = bits // band_count + (1 if band < bits % band_count else 0)
+            self._bands.append((start, (1 << width) - 1))
+            start += width
+
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        self._hashes: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _band_values(self, value: int):
+        return [(value >> shift) & mask for shift, mask in self._bands]
+
+    def add(self, value: int):
+        """Insert a hash (no-op if already present)"""
+        with self._lock:
+            if value in self._hashes:
+                return
+            self._hashes.add(value)
+            for table, band_value in zip(self._tables, self._band_values(value)):
+                table.setdefault(band_value, set()).add(value)
+
+    def remove(self, value: int):
+        """Forget a hash"""
+        with self._lock:
+            if value not in self._hashes:
+                return
+            self._hashes.discard(value)
+            for table, band_value in zip(self._tables, self._band_values(value)):
+                bucket = table.get(band_value)
+                if bucket is not None:
+                    bucket.discard(value)
+                    if not bucket:
+                        del table[band_value]
+
+    def search(self, value: int, threshold: int) -> List[Tuple[int, int]]:
+        """Return (distance, hash) pairs within threshold, closest first"""
+        if threshold > self.max_threshold:
+            raise ValueError(f"threshold {threshold} exceeds index maximum {self.max_threshold}")
+
+        with self._lock:
+            candidates = set()
+            for table, band_value in zip(self._tables, self._band_values(value)):
+                bucket = table.get(band_value)
+                if bucket:
+                    candidates.update(bucket)
+
+        results = []
+        for candidate in candidates:
+            distance = hamming_distance(value, candidate)
+            if distance <= threshold:
+                results.append((distance, candidate))
+
+        results.sort()
+        return results
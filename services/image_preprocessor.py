@@ -0,0 +1,212 @@
+import base64
+import io
+import threading
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from services.screenshot_store import TiledScreenshot
+
+# GPT-4o scales images to fit 2048x2048 and then to 768px on the short side,
+# so pixels beyond roughly this size only cost upload time
+DEFAULT_TARGET_WIDTH = 1024
+DEFAULT_TILE_HEIGHT = 2048
+DEFAULT_MAX_TILES = 4
+DEFAULT_MIN_WIDTH = 512
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+class PreprocessedImage:
+    """Encoded tiles ready for upload plus size bookkeeping"""
+
+    def __init__(self, tiles: List[str], mime_type: str, original_bytes: int, encoded_bytes: int,
+                 original_size, processed_size):
+        self.tiles = tiles  # base64 strings, top to bottom
+        self.mime_type = mime_type
+        self.original_bytes = original_bytes
+        self.encoded_bytes = encoded_bytes
+        self.original_size = original_size
+        self.processed_size = processed_size
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.encoded_bytes
+
+    def data_urls(self) -> List[str]:
+        return [f"data:{self.mime_type};base64,{tile}" for tile in self.tiles]
+
+
+class ImagePreprocessor:
+    """Downscale, tile and re-encode screenshots before sending them to the vision model
+
+    The page is resized to target_width. If it is taller than max_tiles tiles
+    it is scaled down further (never below min_width) so the whole page still
+    fits, and whatever remains beyond that is cropped.
+    """
+
+    def __init__(self, target_width: int = DEFAULT_TARGET_WIDTH, tile_height: int = DEFAULT_TILE_HEIGHT,
+                 max_tiles: int = DEFAULT_MAX_TILES, min_width: int = DEFAULT_MIN_WIDTH,
+                 image_format: str = "JPEG", quality: int = 80):
+        self.target_width = target_width
+        self.tile_height = tile_height
+        self.max_tiles = max(1, max_tiles)
+        self.min_width = min(min_width, target_width)
+        self.image_format = image_format.upper()
+        self.quality = quality
+
+        if self.image_format not in MIME_TYPES:
+            raise ValueError(f"Unsupported image format: {image_format}")
+
+        self._stats_lock = threading.Lock()
+        self.images_processed = 0
+        self.total_original_bytes = 0
+        self.total_encoded_bytes = 0
+
+    def process_screenshot(self, screenshot) -> Optional[PreprocessedImage]:
+        """Preprocess an in-memory Screenshot or TiledScreenshot"""
+        try:
+            if isinstance(screenshot, TiledScreenshot):
+                return self.process_tiled(screenshot)
+            # The PNG the browser returned, if there is one, in case re-encoding can't beat it
+            original = screenshot.png if screenshot.encoded_size else None
+            return self.process(screenshot.image, screenshot.encoded_size, original)
+        except Exception as e:
+            print(f"❌ Image preprocessing error: {e}")
+            return None
+
+    def process(self, image: Image.Image, original_bytes: int = 0,
+                original: Optional[bytes] = None) -> PreprocessedImage:
+        """Resize, split into tiles and encode an in-memory image
+
+        original is the image's PNG encoding; it is sent instead when the
+        image needed no resizing or splitting and re-encoding didn't make it
+        smaller (e.g. a small screenshot of flat colours).
+        """
+        original_size = image.size
+        resized = self._resize(image)
+        tiles = self._split(resized)
+
+        encoded = [self._encode(tile) for tile in tiles]
+        if original and resized.size == original_size and len(encoded) == 1 and len(original) <= len(encoded[0]):
+            return self._result([original], len(original), original_size, original_size, captured=True)
+        return self._result(encoded, original_bytes, original_size, resized.size)
+
+    def process_tiled(self, screenshot: TiledScreenshot) -> PreprocessedImage:
+        """Resize and re-tile a tiled capture, decoding one captured tile at a time"""
+        original_size = screenshot.size
+        scale = self._scale(*original_size)
+        width = max(1, round(original_size[0] * scale))
+        max_height = self.tile_height * self.max_tiles
+
+        encoded = []
+        canvas = None
+        filled = 0  # Rows used in the current output tile
+        total = 0  # Rows emitted overall
+        for tile in screenshot:
+            if total >= max_height:
+                break  # Anything beyond max_tiles is cropped, as in process()
+
+            strip = tile.image
+            if scale < 1.0:
+                strip = strip.resize((width, max(1, round(strip.height * scale))), Image.LANCZOS, reducing_gap=3.0)
+
+            row = 0
+            while row < strip.height and total < max_height:
+                if canvas is None:
+                    canvas = Image.new("RGB", (width, self.tile_height))
+                rows = min(strip.height - row, self.tile_height - filled, max_height - total)
+                canvas.paste(strip.crop((0, row, width, row + rows)), (0, filled))
+                row += rows
+                filled += rows
+                total += rows
+                if filled == self.tile_height:
+                    encoded.append(self._encode(canvas))
+                    canvas, filled = None, 0
+
+        if canvas is not None:
+            encoded.append(self._encode(canvas.crop((0, 0, width, filled))))
+
+        return self._result(encoded, screenshot.encoded_size, original_size, (width, total))
+
+    def _result(self, encoded: List[bytes], original_bytes: int, original_size, processed_size,
+                captured: bool = False) -> PreprocessedImage:
+        """captured: encoded holds the screenshot's own PNG rather than re-encoded tiles"""
+        encoded_bytes = sum(len(data) for data in encoded)
+
+        with self._stats_lock:
+            self.images_processed += 1
+            self.total_original_bytes += original_bytes
+            self.total_encoded_bytes += encoded_bytes
+
+        if original_bytes:
+            saved = original_bytes - encoded_bytes
+            change = f"{saved // 1024}KB saved" if saved >= 0 else f"{-saved // 1024}KB larger"
+            if captured:
+                change = "sent as captured"
+            print(f"🗜️ Image {original_size[0]}x{original_size[1]} -> {processed_size[0]}x{processed_size[1]} "
+                  f"in {len(encoded)} tile(s): {original_bytes // 1024}KB -> {encoded_bytes // 1024}KB "
+                  f"({change})")
+
+        return PreprocessedImage(
+            tiles=[base64.b64encode(data).decode('utf-8') for data in encoded],
+            mime_type=MIME_TYPES["PNG" if captured else self.image_format],
+            original_bytes=original_bytes,
+            encoded_bytes=encoded_bytes,
+            original_size=original_size,
+            processed_size=processed_size,
+        )
+
+    def _scale(self, width: int, height: int) -> float:
+        scale = min(1.0, self.target_width / width)
+
+        # Shrink further if the page still wouldn't fit in max_tiles tiles
+        max_height = self.tile_height * self.max_tiles
+        if height * scale > max_height:
+            scale = max(max_height / height, self.min_width / width if width > self.min_width else 1.0)
+            scale = min(scale, 1.0)
+        return scale
+
+    def _resize(self, image: Image.Image) -> Image.Image:
+        width, height = image.size
+        scale = self._scale(width, height)
+        max_height = self.tile_height * self.max_tiles
+
+        if scale < 1.0:
+            image = image.resize((max(1, round(width * scale)), max(1, round(height * scale))),
+                                 Image.LANCZOS, reducing_gap=3.0)
+
+        # Anything that still doesn't fit is cropped
+        if image.height > max_height:
+            image = image.crop((0, 0, image.width, max_height))
+
+        return image
+
+    def _split(self, image: Image.Image) -> List[Image.Image]:
+        if image.height <= self.tile_height:
+            return [image]
+
+        return [
+            image.crop((0, top, image.width, min(top + self.tile_height, image.height)))
+            for top in range(0, image.height, self.tile_height)
+        ]
+
+    def _encode(self, image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        if self.image_format == "PNG":
+            image.save(buffer, format="PNG", optimize=True)
+        else:
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(buffer, format=self.image_format, quality=self.quality)
+        return buffer.getvalue()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return totals of bytes before and after preprocessing"""
+        with self._stats_lock:
+            return {
+                'images_processed': self.images_processed,
+                'original_bytes': self.total_original_bytes,
+                'encoded_bytes': self.total_encoded_bytes,
+                'bytes_saved': self.total_original_bytes - self.total_encoded_bytes,
+            }
@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_TIMEOUT = 10.0  # Give up waiting after this long, ready or not
+DEFAULT_NETWORK_IDLE = 0.5  # Seconds with at most MAX_IDLE_REQUESTS in flight
+DEFAULT_DOM_QUIET = 0.3  # Seconds without DOM mutations
+DEFAULT_POLL_INTERVAL = 0.05
+
+# Long-polling and analytics connections may never finish, so a couple of
+# open requests still counts as idle
+MAX_IDLE_REQUESTS = 2
+
+# Installs a MutationObserver on first call and reports document.readyState
+# and milliseconds since the DOM last changed in a single round trip.
+# Attribute changes are ignored so carousels and CSS animations don't keep
+# the page "busy" forever.
+READINESS_PROBE_SCRIPT = """
+var state = window.__assistantReadiness;
+if (!state) {
+    state = window.__assistantReadiness = {last: performance.now()};
+    new MutationObserver(function () { state.last = performance.now(); })
+        .observe(document, {childList: true, subtree: true, characterData: true});
+}
+return {readyState: document.readyState, quietMs: performance.now() - state.last};
+"""
+
+
+class PageReadiness:
+    """Waits for a page to actually be ready instead of sleeping a fixed time
+
+    A page is ready once document.readyState is "complete", the network
+    has been idle for network_idle seconds and the DOM hasn't changed for
+    dom_quiet seconds, or when the timeout runs out.
+
+    Network activity comes from the CDP Network events chromedriver writes
+    to its performance log (see performance_logging_prefs). Without that
+    log only the DOM signals are used.
+    """
+
+    def __init__(self, driver, timeout: float = DEFAULT_TIMEOUT, network_idle: float = DEFAULT_NETWORK_IDLE,
+                 dom_quiet: float = DEFAULT_DOM_QUIET, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.driver = driver
+        self.timeout = timeout
+        self.network_idle = network_idle
+        self.dom_quiet = dom_quiet
+        self.poll_interval = poll_interval
+
+        # Shared by every waiter: the performance log can only be read once
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self._finished = set()  # Requests whose end was read before their start
+        # Wall clock, to compare with performance log timestamps
+        self._last_network_activity = time.time()
+        self._network_events = True
+        self._listeners = []
+
+        self.stats = {
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait': 0.0,
+        }
+
+    @staticmethod
+    def performance_logging_prefs():
+        """Chrome options needed for network tracking: (capability, experimental option)"""
+        return {"performance": "ALL"}, {"enableNetwork": True, "enablePage": False}
+
+    def add_listener(self, callback):
+        """Register callback(method, params) for every Network event read from the log
+
+        Called with the lock held, so it must be quick and must not call
+        back into this object.
+        """
+        self._listeners.append(callback)
+
+    def flush(self):
+        """Read network events logged since the last read, e.g. before reporting stats"""
+        self._read_network_events()
+
+    def begin(self):
+        """Forget network activity from before a navigation or click about to start"""
+        self._read_network_events()
+        with self._lock:
+            self._inflight.clear()
+            self._finished.clear()
+            self._last_network_activity = time.time()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the page is ready; returns False if the timeout ran out first"""
+        if not self.driver:
+            return False
+
+        start = time.monotonic()
+        deadline = start + (timeout if timeout is not None else self.timeout)
+        ready = False
+        while True:
+            try:
+                ready = self._is_ready()
+            except Exception:
+                # Mid-navigation the old document can vanish under the probe
+                ready = False
+            if ready or time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.stats['waits'] += 1
+            self.stats['total_wait'] += elapsed
+            if not ready:
+                self.stats['timeouts'] += 1
+        if not ready:
+            print(f"⏱️ Page not settled after {elapsed:.1f}s - continuing anyway")
+        return ready
+
+    def _is_ready(self) -> bool:
+        self._read_network_events()
+        with self._lock:
+            network_idle = (len(self._inflight) <= MAX_IDLE_REQUESTS
+                            and time.time() - self._last_network_activity >= self.network_idle)
+
+        probe = self.driver.execute_script(READINESS_PROBE_SCRIPT) or {}
+        return (network_idle and probe.get('readyState') == "complete"
+                and probe.get('quietMs', 0) >= self.dom_quiet * 1000)
+
+    def _read_network_events(self):
+        """Drain the performance log, tracking in-flight requests
+
+        The log is read without holding the lock: through an ActorDriver the
+        read is a browser actor operation, and the actor thread may itself
+        be in wait() needing the lock. Batches read by concurrent callers
+        can therefore be processed out of order, so a request seen ending
+        before it was seen starting is remembered in _finished.
+        """
+        if not self._network_events:
+            return
+
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            # Logging not enabled for this driver: rely on the DOM signals
+            self._network_events = False
+            return
+
+        with self._lock:
+            self._track_requests(entries)
+
+    def _track_requests(self, entries):
+        """Update in-flight requests from performance log entries; lock must be held"""
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            method = message.get("method", "")
+            params = message.get("params", {})
+            if method.startswith("Network."):
+                for callback in self._listeners:
+                    try:
+                        callback(method, params)
+                    except Exception as e:
+                        print(f"Network listener error: {e}")
+
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                if request_id in self._finished:
+                    self._finished.discard(request_id)
+                else:
+                    self._inflight.add(request_id)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                if request_id in self._inflight:
+                    self._inflight.discard(request_id)
+                else:
+                    self._finished.add(request_id)
+            else:
+                continue
+            timestamp = entry.get("timestamp")
+            self._last_network_activity = max(self._last_network_activity,
+                                              timestamp / 1000 if timestamp else time.time())
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return wait count, timeouts and average wait"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['avg_wait'] = stats['total_wait'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
@@ -0,0 +1,189 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Sequence
+from urllib.parse import urldefrag
+
+DEFAULT_BLOCKLIST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "config", "blocklist.txt")
+DEFAULT_BLOCKED_TYPES = ("media", "font")
+
+# Network.setBlockedURLs only matches URLs, so resource types are blocked
+# by the file extensions (and font services) that carry them. Extensions
+# also used for scripts are left out: .ts is TypeScript as often as MPEG-TS.
+RESOURCE_TYPE_PATTERNS = {
+    "media": [f"*.{ext}{suffix}" for ext in ("mp4", "webm", "ogv", "ogg", "mov", "m4v", "m3u8", "mpd", "m4s",
+                                             "mp3", "m4a", "aac", "wav", "flac")
+              for suffix in ("", "?*")],
+    "font": [f"*.{ext}{suffix}" for ext in ("woff", "woff2", "ttf", "otf", "eot") for suffix in ("", "?*")]
+            + ["*://fonts.googleapis.com/*", "*://use.typekit.net/*"],
+}
+
+MAX_TRACKED_PAGES = 20
+MAX_TRACKED_REQUESTS = 10000  # Requests that never finish are dropped beyond this
+MAX_KNOWN_SIZES = 4096
+
+
+def pattern_regex(pattern: str) -> Pattern:
+    """Regex matching URLs the way Network.setBlockedURLs does: '*' is the only wildcard"""
+    return re.compile(".*".join(re.escape(part) for part in pattern.split("*")), re.DOTALL)
+
+
+def load_blocklist(path: str) -> List[str]:
+    """URL patterns from a blocklist file; bare domains also cover their subdomains"""
+    patterns = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            if "*" in entry or "/" in entry:
+                patterns.append(entry)
+            else:
+                patterns.extend([f"*://{entry}/*", f"*.{entry}/*"])
+    return patterns
+
+
+class RequestFilter:
+    """Blocks ads, trackers and heavy resource types with Network.setBlockedURLs
+
+    Patterns come from a blocklist file and per-type rules (see
+    RESOURCE_TYPE_PATTERNS). Per-page statistics are built from the Network
+    events PageReadiness reads from the performance log (see
+    on_network_event): requests and bytes loaded, and requests blocked per
+    rule, for the latest load of each page. Blocked bytes can only count
+    resources whose size is known from an earlier unblocked load.
+    """
+
+    def __init__(self, driver, blocklist_path: Optional[str] = DEFAULT_BLOCKLIST,
+                 block_types: Sequence[str] = DEFAULT_BLOCKED_TYPES):
+        self.driver = driver
+        self.blocklist_path = blocklist_path
+        self.block_types = tuple(block_types)
+        self.enabled = False
+        self.rules: Dict[str, str] = {}  # pattern -> "blocklist" or resource type
+        self._matchers: List[tuple] = []  # (compiled pattern, rule) in rule order
+
+        self._lock = threading.Lock()
+        self._requests = {}  # requestId -> (page, url)
+        self._pages = OrderedDict()  # page URL -> stats
+        self._sizes = OrderedDict()  # URL -> bytes of its last load
+
+    def _build_rules(self):
+        rules = {}
+        if self.blocklist_path:
+            try:
+                for pattern in load_blocklist(self.blocklist_path):
+                    rules.setdefault(pattern, "blocklist")
+            except OSError as e:
+                print(f"⚠️ Could not read blocklist {self.blocklist_path}: {e}")
+        for resource_type in self.block_types:
+            for pattern in RESOURCE_TYPE_PATTERNS.get(resource_type, []):
+                rules.setdefault(pattern, resource_type)
+        return rules
+
+    def enable(self) -> bool:
+        """Start blocking; returns False if the driver has no DevTools access"""
+        if not self.driver or not hasattr(self.driver, "execute_cdp_cmd"):
+            return False
+
+        rules = self._build_rules()
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(rules)})
+        except Exception as e:
+            print(f"Request blocking unavailable: {e}")
+            return False
+
+        self.rules = rules
+        self._matchers = [(pattern_regex(pattern), rule) for pattern, rule in rules.items()]
+        self.enabled = True
+        types = ", ".join(self.block_types) or "no resource types"
+        print(f"🚫 Blocking {len(rules)} URL patterns ({types})")
+        return True
+
+    def disable(self):
+        """Stop blocking requests"""
+        if self.enabled:
+            try:
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+            except Exception as e:
+                print(f"Could not clear blocked URLs: {e}")
+        self.enabled = False
+        self.rules = {}
+        self._matchers = []
+
+    def on_network_event(self, method: str, params: dict):
+        """PageReadiness listener: attribute requests to the page that made them"""
+        with self._lock:
+            if method == "Network.requestWillBeSent":
+                url = params.get("request", {}).get("url", "")
+                if url.startswith("data:"):
+                    return
+                if len(self._requests) >= MAX_TRACKED_REQUESTS:
+                    self._requests.clear()
+                page = urldefrag(params.get("documentURL") or url)[0]
+                if params.get("type") == "Document" and page == urldefrag(url)[0]:
+                    self._pages.pop(page, None)  # Stats are per load: a reload starts over
+                self._requests[params.get("requestId")] = (page, url)
+                self._page(page)['requests'] += 1
+
+            elif method == "Network.loadingFinished":
+                request = self._requests.pop(params.get("requestId"), None)
+                if request:
+                    size = int(params.get("encodedDataLength") or 0)
+                    self._page(request[0])['bytes'] += size
+                    self._sizes[request[1]] = size
+                    self._sizes.move_to_end(request[1])
+                    if len(self._sizes) > MAX_KNOWN_SIZES:
+                        self._sizes.popitem(last=False)
+
+            elif method == "Network.loadingFailed":
+                request = self._requests.pop(params.get("requestId"), None)
+                blocked = params.get("blockedReason") or "BLOCKED_BY_CLIENT" in params.get("errorText", "")
+                if request and blocked:
+                    page, url = request
+                    stats = self._page(page)
+                    stats['blocked_requests'] += 1
+                    stats['blocked_bytes'] += self._sizes.get(url, 0)
+                    rule = self._rule_for(url)
+                    stats['blocked_by'][rule] = stats['blocked_by'].get(rule, 0) + 1
+
+    def _page(self, page):
+        """Stats for a page URL, creating them (and evicting the oldest) as needed; lock must be held"""
+        stats = self._pages.get(page)
+        if stats is None:
+            stats = self._pages[page] = {'requests': 0, 'bytes': 0, 'blocked_requests': 0,
+                                         'blocked_bytes': 0, 'blocked_by': {}}
+            if len(self._pages) > MAX_TRACKED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return stats
+
+    def _rule_for(self, url):
+        for regex, rule in self._matchers:
+            if regex.fullmatch(url):
+                return rule
+        return "other"
+
+    def page_stats(self, url: Optional[str]) -> Dict:
+        """Requests, bytes, blocked requests and blocked bytes recorded for a page URL"""
+        with self._lock:
+            stats = self._pages.get(urldefrag(url or "")[0])
+            if stats is None:
+                return {'requests': 0, 'bytes': 0, 'blocked_requests': 0, 'blocked_bytes': 0, 'blocked_by': {}}
+            return dict(stats, blocked_by=dict(stats['blocked_by']))
+
+    def get_stats(self) -> Dict:
+        """Totals over the tracked pages"""
+        with self._lock:
+            pages = list(self._pages.values())
+        return {
+            'enabled': self.enabled,
+            'patterns': len(self.rules),
+            'pages': len(pages),
+            'blocked_requests': sum(page['blocked_requests'] for page in pages),
+            'blocked_bytes': sum(page['blocked_bytes'] for page in pages),
+        }
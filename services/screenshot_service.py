@@ -1,105 +1,285 @@
-import os
-import uuid
-import tempfile
+import base64
 from PIL import Image
 import io
 import time
 
+from services.browser_actor import BrowserPreempted, actor_operation
+from services.image_hash import diff_tile_hashes, tile_hashes
+from services.screenshot_store import Screenshot, ScreenshotStore, TiledScreenshot
+
+# Chrome can't composite a single capture much taller than this; taller
+# pages are captured as tiles instead of one canvas
+MAX_CDP_CAPTURE_HEIGHT = 16384
+
+# Tiled capture limits, in CSS pixels
+DEFAULT_CAPTURE_TILE_HEIGHT = 2048
+DEFAULT_MAX_CAPTURE_HEIGHT = 32768
+DEFAULT_MAX_CAPTURE_TILES = 16
+
+HIDE_FIXED_ELEMENTS_SCRIPT = """
+document.querySelectorAll('body *').forEach(function (el) {
+    var position = getComputedStyle(el).position;
+    if (position === 'fixed' || position === 'sticky') {
+        el.setAttribute('data-assistant-hidden', el.style.visibility);
+        el.style.visibility = 'hidden';
+    }
+});
+"""
+
+RESTORE_FIXED_ELEMENTS_SCRIPT = """
+document.querySelectorAll('[data-assistant-hidden]').forEach(function (el) {
+    el.style.visibility = el.getAttribute('data-assistant-hidden');
+    el.removeAttribute('data-assistant-hidden');
+});
+"""
+
 
 class ScreenshotService:
-    def __init__(self, browser_service, screenshot_temp_dir):
+    """Captures pages as in-memory Screenshot objects
+
+    Nothing is written to disk: captures go into a bounded ScreenshotStore
+    and are passed straight to the vision service.
+    """
+
+    def __init__(self, browser_service, store=None, capture_mode="auto", scroll_delay=0.5,
+                 tile_height=DEFAULT_CAPTURE_TILE_HEIGHT, max_capture_height=DEFAULT_MAX_CAPTURE_HEIGHT,
+                 max_tiles=DEFAULT_MAX_CAPTURE_TILES):
         self.browser_service = browser_service
-        self.screenshot_temp_dir = screenshot_temp_dir
-        self.last_screenshot_path = None
+        self.store = store or ScreenshotStore()
+        self.last_screenshot = None
+        # "auto"/"cdp": single DevTools capture with scrolling as fallback, "stitch": always scroll,
+        # "tiled": always capture tiles. Scrolled captures and pages taller than one capture are
+        # tiled in every mode, so no page-tall canvas is ever allocated.
+        self.capture_mode = capture_mode
+        self.scroll_delay = scroll_delay
+        self.tile_height = tile_height
+        self.max_capture_height = max_capture_height
+        self.max_tiles = max_tiles
+        # (url, tile signatures) of the last capture_changes() call
+        self._previous_tiles = None
+
+    @property
+    def actor(self):
+        """The browser's actor, so captures run as one operation on it"""
+        return getattr(self.browser_service, "actor", None)
+
+    def _checkpoint(self):
+        """Between capture steps: give way to a waiting foreground command"""
+        if self.actor:
+            self.actor.checkpoint()
 
-        if not os.path.exists(self.screenshot_temp_dir):
-            os.makedirs(self.screenshot_temp_dir)
+    def _keep(self, screenshot):
+        """Register a new capture in the store"""
+        screenshot.url = self.browser_service.current_url
+        self.store.put(screenshot)
+        self.last_screenshot = screenshot
+        return screenshot
 
+    @actor_operation
     def take_screenshot(self):
-        """Take a simple screenshot"""
+        """Take a simple viewport screenshot"""
         if not self.browser_service.driver:
             return None
 
         try:
-            screenshot_path = os.path.join(self.screenshot_temp_dir, f"screenshot_{uuid.uuid4()}.png")
-            self.browser_service.driver.save_screenshot(screenshot_path)
-            self.last_screenshot_path = screenshot_path
-            return screenshot_path
+            return self._keep(Screenshot(png=self.browser_service.driver.get_screenshot_as_png()))
         except Exception as e:
             print(f"Screenshot error: {e}")
             return None
 
+    @actor_operation
     def take_full_page_screenshot(self):
-        """Take a full page screenshot by scrolling and stitching"""
+        """Take a full page screenshot
+
+        Uses a single DevTools capture when available. Pages too tall for
+        one canvas, and pages captured by scrolling, come back as a
+        TiledScreenshot.
+        """
         if not self.browser_service.driver:
             return None
 
+        tall = self.capture_mode == "tiled" or self._page_height() > MAX_CDP_CAPTURE_HEIGHT
+        if tall:
+            screenshot = self.take_tiled_screenshot()
+            if screenshot:
+                return screenshot
+
+        if self.capture_mode in ("auto", "cdp"):
+            screenshot = self._capture_full_page_cdp()
+            if screenshot:
+                return self._keep(screenshot)
+
+        if not tall:
+            screenshot = self.take_tiled_screenshot()
+            if screenshot:
+                return screenshot
+        return self.take_screenshot()
+
+    def capture_changes(self):
+        """Take a full page screenshot and compare it with the previous one of the same page
+
+        Returns (screenshot, diff). diff is a ScreenshotDiff of the tiles
+        that changed, or None if there is no earlier capture of this URL.
+        Raises BrowserPreempted if a foreground command interrupted a
+        background capture.
+        """
+        screenshot = self.take_full_page_screenshot()
+        if not screenshot:
+            return None, None
+
         try:
-            driver = self.browser_service.driver
+            signatures = tile_hashes(screenshot)
+        except Exception as e:
+            print(f"⚠️ Tile hashing error: {e}")
+            self._previous_tiles = None
+            return screenshot, None
 
-            # Store original state
-            original_size = driver.get_window_size()
-            original_scroll = driver.execute_script("return window.pageYOffset;")
+        diff = None
+        if self._previous_tiles and self._previous_tiles[0] == screenshot.url:
+            diff = diff_tile_hashes(self._previous_tiles[1], signatures)
+            print(f"🔍 {len(diff.changed)}/{diff.total_tiles} regions changed on {screenshot.url}")
+        self._previous_tiles = (screenshot.url, signatures)
+        return screenshot, diff
+
+    @actor_operation
+    def take_tiled_screenshot(self):
+        """Capture the page as a TiledScreenshot of fixed-height tiles
+
+        At most max_capture_height CSS pixels and max_tiles tiles are
+        captured, so memory stays bounded however tall the page is.
+        """
+        if not self.browser_service.driver:
+            return None
 
-            # Get page dimensions
-            total_height = driver.execute_script(
+        screenshot = None
+        if self.capture_mode != "stitch":
+            screenshot = self._capture_tiles_cdp()
+        if not screenshot:
+            screenshot = self._capture_tiles_scrolled()
+        return self._keep(screenshot) if screenshot else None
+
+    def _page_height(self):
+        """Document height in CSS pixels, or 0 if unknown"""
+        try:
+            return int(self.browser_service.driver.execute_script(
                 "return Math.max(document.body.scrollHeight, document.documentElement.scrollHeight);"
-            )
+            ) or 0)
+        except Exception:
+            return 0
+
+    def _capture_height(self, page_height, tile_height):
+        return min(page_height, self.max_capture_height, tile_height * self.max_tiles)
+
+    def _capture_tiles_cdp(self):
+        """Capture tiles with one clipped Page.captureScreenshot call each"""
+        driver = self.browser_service.driver
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return None
+
+        try:
+            metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+            content = metrics.get("cssContentSize") or metrics["contentSize"]
+            width = max(1, int(content["width"]))
+            page_height = max(1, int(content["height"]))
+            capture_height = self._capture_height(page_height, self.tile_height)
+
+            screenshot = TiledScreenshot(page_height=page_height)
+            screenshot.truncated = capture_height < page_height
+            for top in range(0, capture_height, self.tile_height):
+                self._checkpoint()
+                result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                    "format": "png",
+                    "captureBeyondViewport": True,
+                    "clip": {"x": 0, "y": top, "width": width,
+                             "height": min(self.tile_height, capture_height - top), "scale": 1},
+                })
+                screenshot.add_tile(base64.b64decode(result["data"]))
+            return screenshot
+
+        except BrowserPreempted:
+            raise
+        except Exception as e:
+            print(f"CDP tiled capture unavailable, falling back to scrolling: {e}")
+            return None
+
+    def _capture_tiles_scrolled(self):
+        """Capture one viewport-sized tile per scroll position"""
+        try:
+            driver = self.browser_service.driver
+            original_scroll = driver.execute_script("return window.pageYOffset;")
             viewport_height = driver.execute_script("return window.innerHeight")
+            page_height = self._page_height()
+            capture_height = self._capture_height(page_height, viewport_height)
 
-            screenshot_path = os.path.join(self.screenshot_temp_dir, f"screenshot_{uuid.uuid4()}.png")
+            screenshot = TiledScreenshot(page_height=page_height)
+            screenshot.truncated = capture_height < page_height
+            try:
+                for top in range(0, capture_height, viewport_height):
+                    self._checkpoint()
+                    driver.execute_script(f"window.scrollTo(0, {top});")
+                    time.sleep(self.scroll_delay)
+                    offset = driver.execute_script("return window.pageYOffset;")
+                    png = driver.get_screenshot_as_png()
 
-            # Scroll to top
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(0.5)
+                    # The last scroll stops short at the bottom of the page and
+                    # the last tile may reach past the capture limit: crop both
+                    skip = top - offset
+                    keep = min(viewport_height, capture_height - top)
+                    if skip or keep < viewport_height:
+                        png = self._crop_rows(png, skip, keep, viewport_height)
+                    screenshot.add_tile(png)
 
-            # Take first screenshot
-            screenshot_binary = driver.get_screenshot_as_png()
-            screenshot = Image.open(io.BytesIO(screenshot_binary))
-            total_width = screenshot.width
+                    if top == 0:
+                        # Fixed and sticky elements would repeat in every tile
+                        driver.execute_script(HIDE_FIXED_ELEMENTS_SCRIPT)
+            finally:
+                driver.execute_script(RESTORE_FIXED_ELEMENTS_SCRIPT)
+                driver.execute_script(f"window.scrollTo(0, {original_scroll});")
 
-            # If page fits in one screenshot
-            if total_height <= viewport_height:
-                screenshot.save(screenshot_path)
-                self.last_screenshot_path = screenshot_path
-                return screenshot_path
+            return screenshot
 
-            # Create full screenshot canvas
-            full_screenshot = Image.new('RGB', (total_width, total_height))
-            full_screenshot.paste(screenshot, (0, 0))
+        except BrowserPreempted:
+            raise
+        except Exception as e:
+            print(f"Tiled screenshot error: {e}")
+            return None
 
-            # Scroll and capture sections
-            current_height = viewport_height
-            while current_height < total_height:
-                driver.execute_script(f"window.scrollTo(0, {current_height});")
-                time.sleep(0.5)
+    def _crop_rows(self, png, skip, keep, viewport_height):
+        """Crop a viewport PNG to CSS rows [skip, skip + keep)"""
+        with Image.open(io.BytesIO(png)) as image:
+            ratio = image.height / viewport_height  # Device pixels per CSS pixel
+            top = round(skip * ratio)
+            bottom = min(image.height, round((skip + keep) * ratio))
+            buffer = io.BytesIO()
+            image.crop((0, top, image.width, bottom)).save(buffer, format="PNG")
+            return buffer.getvalue()
 
-                screenshot_binary = driver.get_screenshot_as_png()
-                screenshot = Image.open(io.BytesIO(screenshot_binary))
-                full_screenshot.paste(screenshot, (0, current_height))
-                current_height += viewport_height
+    def _capture_full_page_cdp(self):
+        """Capture the whole page in one Page.captureScreenshot call"""
+        driver = self.browser_service.driver
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return None
+
+        try:
+            metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+            content = metrics.get("cssContentSize") or metrics["contentSize"]
+            width = max(1, int(content["width"]))
+            height = max(1, min(int(content["height"]), MAX_CDP_CAPTURE_HEIGHT))
 
-            # Save and restore state
-            full_screenshot.save(screenshot_path)
-            driver.set_window_size(original_size['width'], original_size['height'])
-            driver.execute_script(f"window.scrollTo(0, {original_scroll});")
+            result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "png",
+                "captureBeyondViewport": True,
+                "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1},
+            })
 
-            self.last_screenshot_path = screenshot_path
-            return screenshot_path
+            return Screenshot(png=base64.b64decode(result["data"]))
 
         except Exception as e:
-            print(f"Full screenshot error: {e}")
-            # Fallback to simple screenshot
-            return self.take_screenshot()
+            print(f"CDP screenshot unavailable, falling back to scrolling: {e}")
+            return None
 
     def cleanup_screenshots(self):
-        """Clean up screenshot files"""
-        try:
-            if os.path.exists(self.screenshot_temp_dir):
-                for file in os.listdir(self.screenshot_temp_dir):
-                    try:
-                        os.remove(os.path.join(self.screenshot_temp_dir, file))
-                    except:
-                        pass
-        except:
-            pass
+        """Drop stored screenshots"""
+        self.store.clear()
+        self.last_screenshot = None
+        self._previous_tiles = None
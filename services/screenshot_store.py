@@ -0,0 +1,201 @@
+import io
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+DEFAULT_MAX_ITEMS = 16
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class Screenshot:
+    """A captured page held in memory
+
+    Created from PNG bytes (as returned by the browser) or from a PIL image
+    (e.g. a stitched capture). The other form is produced lazily, at most
+    once, and only if a consumer asks for it.
+    """
+
+    def __init__(self, png: Optional[bytes] = None, image: Optional[Image.Image] = None,
+                 url: Optional[str] = None, top: int = 0):
+        if png is None and image is None:
+            raise ValueError("Screenshot needs PNG bytes or an image")
+
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.top = top  # Offset within the page, in image pixels (for tiles)
+        self.created_at = time.time()
+        self._png = png
+        self._image = image
+        self._lock = threading.Lock()
+
+    @property
+    def image(self) -> Image.Image:
+        """Decoded image"""
+        with self._lock:
+            if self._image is None:
+                self._image = Image.open(io.BytesIO(self._png))
+                self._image.load()
+            return self._image
+
+    @property
+    def png(self) -> bytes:
+        """PNG encoded bytes"""
+        with self._lock:
+            if self._png is None:
+                buffer = io.BytesIO()
+                self._image.save(buffer, format="PNG")
+                self._png = buffer.getvalue()
+            return self._png
+
+    @property
+    def encoded_size(self) -> int:
+        """Size of the PNG if it exists, without encoding one"""
+        return len(self._png) if self._png is not None else 0
+
+    @property
+    def size(self):
+        return self.image.size
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held (encoded plus decoded pixels)"""
+        total = self.encoded_size
+        if self._image is not None:
+            total += self._image.width * self._image.height * len(self._image.getbands())
+        return total
+
+    def crop(self, box) -> 'Screenshot':
+        """New screenshot of the (left, top, right, bottom) region"""
+        return Screenshot(image=self.image.crop(box), url=self.url, top=self.top + box[1])
+
+
+class TiledScreenshot:
+    """A long page captured as a sequence of fixed-height tiles
+
+    Tiles are kept PNG encoded and only decoded while iterating, one at a
+    time, so memory grows with the (capped) tile count rather than with a
+    full-page canvas. Iterate it to get each tile as a Screenshot whose
+    top is its offset in the page.
+    """
+
+    def __init__(self, url: Optional[str] = None, page_height: int = 0):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.created_at = time.time()
+        self.page_height = page_height  # Height the page reported, in CSS pixels
+        self.truncated = False  # True if the page was taller than the capture limit
+        self.width = 0
+        self.height = 0
+        self._tiles: List[Tuple[int, int, bytes]] = []  # (top, height, png)
+
+    def add_tile(self, png: bytes):
+        """Append the next tile below the ones already captured"""
+        with Image.open(io.BytesIO(png)) as image:  # Reads the header only
+            width, height = image.size
+        self._tiles.append((self.height, height, png))
+        self.width = max(self.width, width)
+        self.height += height
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def __iter__(self) -> Iterator[Screenshot]:
+        for top, _, png in self._tiles:
+            yield Screenshot(png=png, url=self.url, top=top)
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def encoded_size(self) -> int:
+        return sum(len(png) for _, _, png in self._tiles)
+
+    @property
+    def nbytes(self) -> int:
+        return self.encoded_size
+
+    def crop(self, box) -> Screenshot:
+        """Screenshot of the (left, top, right, bottom) region, assembled from the tiles it spans"""
+        left, top, right, bottom = box
+        canvas = Image.new("RGB", (right - left, bottom - top))
+        for tile_top, height, png in self._tiles:
+            start, end = max(top, tile_top), min(bottom, tile_top + height)
+            if start < end:
+                image = Screenshot(png=png).image
+                canvas.paste(image.crop((left, start - tile_top, right, end - tile_top)), (0, start - top))
+        return Screenshot(image=canvas, url=self.url, top=top)
+
+    def thumbnail(self, width: int) -> Image.Image:
+        """Downscaled image of the whole capture, built tile by tile"""
+        scale = min(1.0, width / self.width)
+        canvas = Image.new("RGB", (max(1, round(self.width * scale)), max(1, round(self.height * scale))))
+        for tile in self:
+            image = tile.image
+            tile_size = (canvas.width, max(1, round(image.height * scale)))
+            canvas.paste(image.resize(tile_size, Image.LANCZOS, reducing_gap=3.0), (0, round(tile.top * scale)))
+        return canvas
+
+
+class ScreenshotStore:
+    """Bounded in-memory store of recent screenshots with LRU eviction
+
+    Holds at most max_items screenshots and about max_bytes of memory.
+    Evicted screenshots stay alive only as long as something (e.g. a
+    queued analysis) still references them.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_MAX_ITEMS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items: 'OrderedDict[str, Screenshot]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, screenshot: Screenshot) -> Screenshot:
+        """Add a screenshot, evicting the least recently used ones over the limits"""
+        with self._lock:
+            self._items[screenshot.id] = screenshot
+            self._items.move_to_end(screenshot.id)
+            self._evict_locked()
+        return screenshot
+
+    def get(self, screenshot_id: str) -> Optional[Screenshot]:
+        with self._lock:
+            screenshot = self._items.get(screenshot_id)
+            if screenshot is not None:
+                self._items.move_to_end(screenshot_id)
+            return screenshot
+
+    def latest(self) -> Optional[Screenshot]:
+        with self._lock:
+            return next(reversed(self._items.values()), None)
+
+    def discard(self, screenshot_id: str):
+        with self._lock:
+            self._items.pop(screenshot_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def _evict_locked(self):
+        total = sum(item.nbytes for item in self._items.values())
+        while self._items and (len(self._items) > self.max_items or total > self.max_bytes):
+            if len(self._items) == 1:
+                break  # Always keep the newest capture
+            _, evicted = self._items.popitem(last=False)
+            total -= evicted.nbytes
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': sum(item.nbytes for item in self._items.values()),
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+MAX_HISTORY_ENTRIES = 50
+
+# Read in one round trip when a page is recorded or left, and after a
+# back/forward move. The fingerprint covers the title, the rendered text
+# (FNV-1a hash and length) and the number of images and links, so a page
+# served from the back/forward cache or reloaded unchanged compares equal
+# while new or updated content doesn't.
+PAGE_STATE_SCRIPT = """
+var text = document.body ? document.body.innerText : '';
+var hash = 2166136261;
+for (var i = 0; i < text.length; i++) {
+    hash ^= text.charCodeAt(i);
+    hash = Math.imul(hash, 16777619);
+}
+return {
+    fingerprint: [document.title, text.length, (hash >>> 0).toString(16),
+                  document.images.length, document.links.length].join('|'),
+    scrollX: window.scrollX,
+    scrollY: window.scrollY
+};
+"""
+
+
+class HistoryEntry:
+    """One page in the session history and what is known about it
+
+    fingerprint and scroll describe the page as it was last seen.
+    analysis holds the futures of the vision analyses queued for it (see
+    VisionService.queue_background_analysis), kept so a revisit can tell
+    whether they completed, are still running or were dropped.
+    """
+
+    def __init__(self, url: str, fingerprint: Optional[str] = None, scroll: Tuple[int, int] = (0, 0)):
+        self.url = url
+        self.fingerprint = fingerprint
+        self.scroll = scroll
+        self.analysis: Dict[str, Future] = {}
+        self.visited = time.time()
+        self.changed = True  # Set by revisit(); a new page has nothing to reuse
+
+    def update(self, state: Optional[Dict]):
+        """Record the page state read by PAGE_STATE_SCRIPT"""
+        if state:
+            self.fingerprint = state.get('fingerprint')
+            self.scroll = (int(state.get('scrollX') or 0), int(state.get('scrollY') or 0))
+
+    def revisit(self, state: Optional[Dict]) -> bool:
+        """Compare the page shown again with this entry; True if it is unchanged
+
+        A changed page drops its analysis handles; its scroll position is
+        left to be restored by the caller either way.
+        """
+        self.visited = time.time()
+        fingerprint = state.get('fingerprint') if state else None
+        self.changed = fingerprint is None or fingerprint != self.fingerprint
+        if self.changed:
+            self.fingerprint = fingerprint
+            self.analysis = {}
+        return not self.changed
+
+    def analysis_pending(self) -> bool:
+        """An analysis queued for this page is still running"""
+        return any(not future.done() for future in self.analysis.values())
+
+
+class SessionHistory:
+    """Mirror of the browser's back/forward list, one HistoryEntry per page
+
+    visit() records a page opened by navigating or clicking and drops any
+    forward entries, like the browser does. move() follows a back/forward
+    step; if the browser ends up somewhere the mirror doesn't expect
+    (e.g. after in-page navigation it never saw) the page is recorded as
+    a new visit instead.
+    """
+
+    def __init__(self, max_entries: int = MAX_HISTORY_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self.entries: List[HistoryEntry] = []
+        self.index = -1
+
+    @property
+    def current(self) -> Optional[HistoryEntry]:
+        return self.entries[self.index] if 0 <= self.index < len(self.entries) else None
+
+    def visit(self, url: str, state: Optional[Dict] = None) -> HistoryEntry:
+        entry = HistoryEntry(url)
+        entry.update(state)
+        del self.entries[self.index + 1:]
+        self.entries.append(entry)
+        del self.entries[:-self.max_entries]
+        self.index = len(self.entries) - 1
+        return entry
+
+    def move(self, step: int, url: str, state: Optional[Dict] = None) -> Tuple[HistoryEntry, bool]:
+        """Follow a back (-1) or forward (+1) step that ended at url
+
+        Returns the entry and whether it was already known; state is only
+        recorded for a page that wasn't (see HistoryEntry.revisit otherwise).
+        """
+        target = self.index + step
+        if 0 <= target < len(self.entries) and self.entries[target].url == url:
+            self.index = target
+            return self.entries[target], True
+        if self.current and self.current.url == url:
+            return self.current, True  # Nothing to go back or forward to
+        return self.visit(url, state), False
+
+    def clear(self):
+        self.entries = []
+        self.index = -1
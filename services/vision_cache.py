@@ -0,0 +1,172 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, List
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".web_assistant", "vision_cache.db")
+DEFAULT_TTL = 7 * 24 * 60 * 60  # One week
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class VisionCache:
+    """Persistent vision results cache backed by SQLite.
+
+    Entries are keyed by (kind, key), e.g. ("describe", url). Each entry has
+    its own expiry time and the table is capped at max_entries by evicting
+    the least recently used rows. A single connection guarded by a lock is
+    shared by all threads.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 default_ttl: Optional[float] = DEFAULT_TTL):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access)")
+            self._conn.commit()
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        """Return cached value or None, refreshing its LRU position"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+                self._conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def contains(self, kind: str, key: str) -> bool:
+        """Check for a live entry without touching counters or LRU order"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """Return distinct live keys starting with prefix"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT key FROM entries WHERE substr(key, 1, ?) = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (len(prefix), prefix, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def set(self, kind: str, key: str, value: str, ttl: Optional[float] = None):
+        """Store a value, evicting least recently used entries over the cap"""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, value, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, value, now, expires_at, now)
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def delete(self, key: str, kind: Optional[str] = None):
+        """Remove entries for a key (all kinds unless one is given)"""
+        with self._lock:
+            if kind is None:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            else:
+                self._conn.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            self._conn.commit()
+            self.expirations += cursor.rowcount
+            return cursor.rowcount
+
+    def _evict_locked(self):
+        """Drop least recently used rows beyond max_entries (lock must be held)"""
+        if not self.max_entries:
+            return
+
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry count and hit/miss/eviction counters"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except:
+                pass
@@ -0,0 +1,312 @@
+import asyncio
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterator, Optional
+
+import httpx
+import openai
+
+DEFAULT_TIMEOUT = 60.0  # Overall deadline per request, including retries
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_REQUESTS_PER_MINUTE = 300
+DEFAULT_TOKENS_PER_MINUTE = 150000
+DEFAULT_MAX_CONNECTIONS = 8
+
+# Rough prompt cost of one high-detail image tile (1024x2048 -> 6 tiles + base)
+IMAGE_TOKEN_ESTIMATE = 1105
+
+# Errors worth retrying: rate limits, server errors and transport failures
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+)
+
+_STREAM_END = object()
+
+
+class VisionError(Exception):
+    """Raised when a vision request fails after retries or misses its deadline"""
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at rate_per_minute
+
+    Only used from the client's event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.rate = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Wait until amount tokens are available and take them; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return waited
+            delay = (amount - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens would be available"""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def refund(self, amount: float):
+        """Give back tokens that were reserved but not used"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class VisionClient:
+    """Shared asyncio OpenAI client for all vision and text completions
+
+    An event loop runs on its own daemon thread and owns one AsyncOpenAI
+    client with a pooled HTTP connection. Requests from any thread pass
+    through request and token rate limiters, are retried with jittered
+    exponential backoff on 429/5xx/connection errors, and fail with
+    VisionError once their deadline passes. Pass base_url to point it at a
+    local fake server.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'rate_limit_wait': 0.0,
+        }
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="vision-client-loop", daemon=True)
+        self._thread.start()
+
+        async def create_client():
+            # Created on the loop so the connection pool belongs to it
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                timeout=httpx.Timeout(timeout, connect=10.0),
+            )
+            client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+            return client, TokenBucket(requests_per_minute), TokenBucket(tokens_per_minute)
+
+        self._client, self._request_bucket, self._token_bucket = self._run(create_client())
+
+    def _run(self, coroutine, timeout: Optional[float] = None):
+        """Run a coroutine on the client loop and block for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def submit(self, request: Dict, timeout: Optional[float] = None) -> Future:
+        """Start a chat completion and return a future; cancelling it aborts the request"""
+        return asyncio.run_coroutine_threadsafe(self.acomplete(request, timeout), self._loop)
+
+    def stream(self, request: Dict, timeout: Optional[float] = None) -> Iterator[str]:
+        """Run a streamed chat completion, yielding text deltas on the calling thread"""
+        deltas = queue.Queue()
+
+        async def pump():
+            try:
+                async for delta in self.astream(request, timeout):
+                    deltas.put(delta)
+                deltas.put(_STREAM_END)
+            except BaseException as e:
+                deltas.put(e)
+                raise
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = deltas.get()
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, BaseException):
+                    if isinstance(item, asyncio.CancelledError):
+                        return
+                    raise item
+                yield item
+        finally:
+            # Consumer stopped early: stop reading from the server
+            future.cancel()
+
+    async def acomplete(self, request: Dict, timeout: Optional[float] = None) -> Optional[str]:
+        """Async chat completion with rate limiting, retries and a deadline"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        estimate = self._estimate_tokens(request)
+
+        attempt = 0
+        while True:
+            await self._acquire(estimate, deadline)
+            used = 0  # Tokens to keep charged; an attempt that fails gives its estimate back
+            try:
+                response = await asyncio.wait_for(
+                    self._client.chat.completions.create(**request), self._remaining(deadline)
+                )
+                usage = getattr(response, 'usage', None)
+                used = getattr(usage, 'total_tokens', None) or estimate
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS + (asyncio.TimeoutError,) as e:
+                error = e
+            except openai.OpenAIError as e:
+                self._count('failures')
+                raise VisionError(f"OpenAI request failed: {e}") from e
+            finally:
+                self._token_bucket.refund(max(0, estimate - used))
+
+            attempt += 1
+            await self._backoff(error, attempt, deadline)
+
+    async def astream(self, request: Dict, timeout: Optional[float] = None):
+        """Async streamed chat completion; retries only before the first token"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        estimate = self._estimate_tokens(request)
+
+        attempt = 0
+        while True:
+            await self._acquire(estimate, deadline)
+            started = False
+            try:
+                stream = await asyncio.wait_for(
+                    self._client.chat.completions.create(stream=True, **request), self._remaining(deadline)
+                )
+                try:
+                    iterator = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(iterator.__anext__(), self._remaining(deadline))
+                        except StopAsyncIteration:
+                            return
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            started = True
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await stream.close()
+            except RETRYABLE_ERRORS + (asyncio.TimeoutError,) as e:
+                if started:
+                    self._count('failures')
+                    raise VisionError(f"Stream interrupted: {e!r}") from e
+                error = e
+            except openai.OpenAIError as e:
+                self._count('failures')
+                raise VisionError(f"OpenAI request failed: {e}") from e
+            finally:
+                # Streams report no usage: keep the estimate once tokens arrived
+                if not started:
+                    self._token_bucket.refund(estimate)
+
+            attempt += 1
+            await self._backoff(error, attempt, deadline)
+
+    async def _acquire(self, estimate: int, deadline: float):
+        """Wait for request and token budget, failing if it won't arrive in time"""
+        # Fail at once rather than sleeping out the deadline in the limiter
+        remaining = self._remaining(deadline)
+        wait = max(self._request_bucket.wait_time(1), self._token_bucket.wait_time(estimate))
+        if wait >= remaining:
+            self._count('failures')
+            raise VisionError(f"Rate limit wait of {wait:.1f}s exceeds the deadline")
+
+        # Other requests may still take the budget first, so the wait stays bounded
+        waited = 0.0
+        taken = []
+        for bucket, amount in ((self._request_bucket, 1), (self._token_bucket, estimate)):
+            try:
+                waited += await asyncio.wait_for(bucket.acquire(amount), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                for held, held_amount in taken:
+                    held.refund(held_amount)
+                self._count('failures')
+                raise VisionError("Vision request deadline exceeded waiting for the rate limiter") from None
+            taken.append((bucket, amount))
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['rate_limit_wait'] += waited
+
+    async def _backoff(self, error: Exception, attempt: int, deadline: float):
+        """Sleep before the next attempt, or give up after max_retries / the deadline"""
+        if attempt > self.max_retries:
+            self._count('failures')
+            raise VisionError(f"Giving up after {attempt} attempts: {error!r}") from error
+
+        # Full jitter, but honour an explicit Retry-After from the server
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get('retry-after')))
+            except (TypeError, ValueError):
+                pass
+
+        remaining = self._remaining(deadline)
+        if delay >= remaining:
+            self._count('failures')
+            raise VisionError(f"Deadline exceeded while retrying: {error!r}") from error
+
+        self._count('retries')
+        print(f"⏳ Vision request failed ({type(error).__name__}), retry {attempt} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    def _remaining(self, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._count('failures')
+            raise VisionError("Vision request deadline exceeded")
+        return remaining
+
+    def _estimate_tokens(self, request: Dict) -> int:
+        """Approximate prompt + completion tokens for the tokens-per-minute limiter"""
+        tokens = request.get('max_tokens') or 0
+        for message in request.get('messages', []):
+            content = message.get('content')
+            if isinstance(content, str):
+                tokens += len(content) // 4
+                continue
+            for part in content or []:
+                if part.get('type') == 'image_url':
+                    tokens += IMAGE_TOKEN_ESTIMATE
+                else:
+                    tokens += len(part.get('text', '')) // 4
+        return tokens
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return request, retry, failure and rate-limit wait totals"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def close(self):
+        """Close the HTTP pool and stop the event loop"""
+        try:
+            self._run(self._client.close(), timeout=5)
+            # Finish streams whose consumers stopped early before the loop goes away
+            self._run(self._loop.shutdown_asyncgens(), timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -1,23 +1,137 @@
 import base64
-import openai
+import itertools
 import json
 import os
+import queue
 import threading
 import time
-from typing import Optional, Dict
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Generator, Iterator, List
+
+from services.image_preprocessor import ImagePreprocessor, DEFAULT_MAX_TILES
+from services.screenshot_store import Screenshot, TiledScreenshot
+from services.image_hash import HashIndex, ScreenshotDiff, hash_screenshot, hamming_distance, DEFAULT_HASH_SIZE
+from services.vision_cache import VisionCache
+from services.vision_client import VisionClient, VisionError
+from utils.text_stream import split_sentences
+
+# Lower values are served first by the worker pool
+FOREGROUND_PRIORITY = 0
+BACKGROUND_PRIORITY = 10
+
+ANALYSIS_TYPES = ("describe", "content")
+
+PROMPTS = {
+    "describe": "Describe this webpage briefly. Focus on key navigation elements and main content. Keep it concise.",
+    "content": "Summarize the main content of this page. Ignore menus, ads, and navigation. Be brief and direct.",
+    "combined": (
+        "Analyze this webpage and answer with a JSON object with two string fields. "
+        "\"description\": describe the page briefly, focusing on key navigation elements and main content. "
+        "\"content\": summarize the main content of the page, ignoring menus, ads, and navigation. "
+        "Keep both concise."
+    ),
+    "update": (
+        "This image shows only the parts of a webpage that changed since it was last analyzed, "
+        "for example an opened menu, dialog or panel; separate parts are stacked top to bottom. "
+        "The earlier analysis was:\n"
+        "Description: {describe}\nContent: {content}\n"
+        "Answer with a JSON object with two string fields, \"description\" and \"content\", "
+        "updating the earlier ones to reflect the change. Keep both concise."
+    ),
+}
+
+MAX_TOKENS = {"describe": 300, "content": 300, "combined": 600, "update": 600}
+
+# Analysis types answered with a JSON object holding both fields
+JSON_ANALYSIS_TYPES = ("combined", "update")
+
+# Pages where at most this fraction of regions changed since the last capture
+# are re-analyzed from the changed region plus the previous results
+INCREMENTAL_MAX_CHANGE = 0.4
+# ...and whose changed bands add up to at most this many pixels in height;
+# taller changes are analyzed as a full page, which stays tiled
+INCREMENTAL_MAX_HEIGHT = 3072
+
+# Text-only summaries of DOM content go to a cheaper model
+TEXT_MODEL = "gpt-4o-mini"
+TEXT_SUMMARY_PROMPT = (
+    "Summarize the main content of this web page text for someone listening, not reading. "
+    "Be brief and direct."
+)
+MAX_TEXT_CHARS = 12000
+
+# Deadline for requests a user is waiting on; background ones use the client default
+FOREGROUND_TIMEOUT = 30.0
+
+# Cache keys for results addressed by screenshot perceptual hash
+PHASH_PREFIX = "phash:"
+# Cache kind holding the hash of the screenshot a URL's results came from
+RENDER_HASH_KIND = "render"
+
+# Bits two whole-page hashes may differ by and still count as the same render.
+# At 12 of 256 bits, pages sharing a template but showing different content
+# (or a page with a large dialog open) matched each other.
+DEFAULT_HASH_THRESHOLD = 4
 
 
 class VisionService:
-    def __init__(self):
+    def __init__(self, max_workers: int = 2, combined_analysis: bool = True,
+                 cache: Optional[VisionCache] = None, hash_threshold: int = DEFAULT_HASH_THRESHOLD,
+                 hash_size: int = DEFAULT_HASH_SIZE, preprocessor: Optional[ImagePreprocessor] = None):
         self.openai_client = None
-        self.description_cache: Dict[str, str] = {}
-        self.content_cache: Dict[str, str] = {}
-        self.processing_queue = []
+        self.cache = cache or VisionCache()
+        self.preprocessor = preprocessor or ImagePreprocessor()
         self.setup_openai()
 
-        # Start background processor
-        self.background_thread = threading.Thread(target=self._background_processor, daemon=True)
-        self.background_thread.start()
+        # Content-addressed lookup: screenshots within hash_threshold differing
+        # bits of a previously analyzed one reuse its results
+        self.hash_threshold = hash_threshold
+        self.hash_size = hash_size
+        self.hash_index = self._new_hash_index()
+        for key in self.cache.keys(PHASH_PREFIX):
+            try:
+                self.hash_index.add(int(key[len(PHASH_PREFIX):], 16))
+            except ValueError:
+                continue
+
+        # Prioritized task queue: entries are (priority, sequence, task)
+        self.processing_queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self.max_workers = max(1, max_workers)
+
+        # Ask for description and content in a single vision call when both are missing
+        self.combined_analysis = combined_analysis
+
+        # Single-flight registry: one pending future per (analysis type, url),
+        # plus screenshot hashes, so duplicate requests wait instead of calling again
+        self._inflight_lock = threading.RLock()
+        self._inflight: Dict[tuple, tuple] = {}
+        self._inflight_hashes: List[tuple] = []
+        self._coalesced = 0
+
+        # Navigation tracking: queued or running background work for a page
+        # the user has left is cancelled (see on_navigation)
+        self._current_epoch = 0
+        self._tasks: Dict[int, Dict] = {}
+        self._cancelled = 0
+
+        # (url, results) dropped by the last invalidate(), kept as context for
+        # an incremental re-analysis of that page
+        self._invalidated = None
+
+        # Pool usage metrics
+        self._stats_lock = threading.Lock()
+        self._busy_workers = 0
+        self._tasks_completed = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+        # Start background workers
+        self.workers = []
+        for index in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"vision-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
 
     def setup_openai(self):
         """Setup OpenAI client with secure configuration"""
@@ -30,7 +144,7 @@ class VisionService:
                     print("❌ OpenAI API key validation failed")
                     return
 
-                self.openai_client = openai.OpenAI(api_key=secure_config.openai_api_key)
+                self.openai_client = self._create_client(secure_config.openai_api_key)
                 print("✅ OpenAI API initialized with secure config")
                 return
 
@@ -40,7 +154,7 @@ class VisionService:
             # Fallback to environment variable
             openai_api_key = os.getenv('OPENAI_API_KEY')
             if openai_api_key and openai_api_key.startswith('sk-'):
-                self.openai_client = openai.OpenAI(api_key=openai_api_key)
+                self.openai_client = self._create_client(openai_api_key)
                 print("✅ OpenAI API initialized from environment variable")
                 return
 
@@ -53,7 +167,7 @@ class VisionService:
                             if line.startswith('OPENAI_API_KEY='):
                                 api_key = line.split('=', 1)[1].strip()
                                 if api_key and api_key.startswith('sk-'):
-                                    self.openai_client = openai.OpenAI(api_key=api_key)
+                                    self.openai_client = self._create_client(api_key)
                                     print("✅ OpenAI API initialized from .env file")
                                     return
                 except Exception as e:
@@ -73,7 +187,7 @@ class VisionService:
                             config = json.load(config_file)
                             openai_api_key = config.get('OPENAI_API_KEY')
                             if openai_api_key and openai_api_key.startswith('sk-'):
-                                self.openai_client = openai.OpenAI(api_key=openai_api_key)
+                                self.openai_client = self._create_client(openai_api_key)
                                 print(f"✅ OpenAI API initialized from {config_path}")
                                 return
                 except Exception as e:
@@ -89,186 +203,700 @@ class VisionService:
         except Exception as e:
             print(f"❌ Error initializing OpenAI: {e}")
 
-    def queue_background_analysis(self, url: str, screenshot_path: str):
-        """Queue screenshot for background analysis"""
+    def _create_client(self, api_key: str) -> VisionClient:
+        """Create the shared async client (OPENAI_BASE_URL points it at another server)"""
+        return VisionClient(api_key, base_url=os.getenv('OPENAI_BASE_URL') or None)
+
+    def queue_background_analysis(self, url: str, screenshot: Screenshot,
+                                  diff: Optional[ScreenshotDiff] = None) -> Dict[str, Future]:
+        """Queue screenshot for background analysis
+
+        diff compares the screenshot with the previous capture of the same
+        page: if nothing changed the cached results are kept, and if only a
+        small region changed just that region is analyzed.
+
+        Returns a future per result type still being computed (queued here
+        or already in flight); empty when everything was cached.
+        """
         if not self.openai_client:
             print("⚠️ Cannot queue analysis: OpenAI client not initialized")
-            return
+            return {}
+
+        if diff is not None and diff.unchanged and all(self.cache.contains(t, url) for t in ANALYSIS_TYPES):
+            print(f"✅ No visible change on {url} - keeping cached analysis")
+            return {}
+
+        image_hash = hash_screenshot(screenshot, self.hash_size)
+        # Changes seen since the last capture of this page outrank any cached result
+        changed = diff is not None and not diff.unchanged
+
+        missing = []
+        pending = {}
+        for analysis_type in ANALYSIS_TYPES:
+            if not changed:
+                # A URL hit for a page that now looks different is stale and gets re-analyzed
+                if self._cached_for_render(analysis_type, url, image_hash):
+                    continue
+                # The same render seen under another URL; its result is copied to this one
+                if image_hash is not None and self._lookup_by_hash(analysis_type, image_hash, url):
+                    continue
 
-        print(f"🔄 Queuing background analysis for: {url}")
-        self.processing_queue.append({
-            'url': url,
-            'screenshot_path': screenshot_path,
-            'timestamp': time.time()
-        })
-
-    def _background_processor(self):
-        """Process screenshots in background"""
-        while True:
-            if self.processing_queue:
-                task = self.processing_queue.pop(0)
-                try:
-                    url = task['url']
-                    screenshot_path = task['screenshot_path']
+            # Already being analyzed (e.g. a foreground request for this page)
+            inflight = self._find_inflight(analysis_type, url, image_hash)
+            if inflight:
+                pending[analysis_type] = inflight[0]
+                self._count_coalesced()
+                print(f"🔗 {analysis_type} for {url} already in flight - not queuing again")
+                continue
 
-                    print(f"🤖 Processing in background: {url}")
+            missing.append(analysis_type)
 
-                    # Generate both description and content
-                    description = self._analyze_screenshot(screenshot_path, "describe")
-                    content = self._analyze_screenshot(screenshot_path, "content")
+        # Check if everything is cached or already being analyzed
+        if not missing:
+            print(f"✅ Nothing left to analyze for {url} - skipping background analysis")
+            return pending
 
-                    if description:
-                        self.description_cache[url] = description
-                        print(f"✅ Cached description for: {url}")
+        print(f"🔄 Queuing background analysis for: {url}")
 
-                    if content:
-                        self.content_cache[url] = content
-                        print(f"✅ Cached content for: {url}")
+        # Only part of the page changed: update the previous results from that region
+        if len(missing) == len(ANALYSIS_TYPES):
+            context = self._incremental_context(url, diff)
+            if context:
+                print(f"🧩 Analyzing {len(diff.changed)} changed region(s) of {url}")
+                return self._submit(self._changed_bands(screenshot, diff), "update", url, BACKGROUND_PRIORITY,
+                                    image_hash, context=context)
+
+        # One upload covers both fields; otherwise each analysis runs as its own
+        # task so they can execute concurrently
+        if self.combined_analysis and len(missing) == len(ANALYSIS_TYPES):
+            missing = ["combined"]
+
+        # Tasks hold the screenshot itself; it is freed when the last one finishes
+        for analysis_type in missing:
+            pending.update(self._submit(screenshot, analysis_type, url, BACKGROUND_PRIORITY, image_hash))
+        return pending
+
+    def _incremental_context(self, url: str, diff: Optional[ScreenshotDiff]) -> Optional[Dict[str, str]]:
+        """Previous results for url if the page changed little enough to update them"""
+        if diff is None or diff.unchanged or diff.changed_fraction > INCREMENTAL_MAX_CHANGE:
+            return None
+        if sum(bottom - top for top, bottom in diff.bands()) > INCREMENTAL_MAX_HEIGHT:
+            return None
 
-                    # Clean up screenshot
-                    try:
-                        os.remove(screenshot_path)
-                    except:
-                        pass
+        context = {kind: self.cache.get(kind, url) for kind in ANALYSIS_TYPES}
+        if not all(context.values()) and self._invalidated and self._invalidated[0] == url:
+            context = self._invalidated[1]
+        return context if all(context.values()) else None
+
+    def _changed_bands(self, screenshot: Screenshot, diff: ScreenshotDiff):
+        """Full-width crops of the page's changed bands, one image per band"""
+        width = screenshot.size[0]
+        crops = [screenshot.crop((0, top, width, bottom)) for top, bottom in diff.bands()]
+        if len(crops) == 1:
+            return crops[0]
+        stacked = TiledScreenshot(url=screenshot.url)
+        for crop in crops:
+            stacked.add_tile(crop.png)
+        return stacked
+
+    def _submit(self, screenshot: Screenshot, analysis_type: str, url: Optional[str], priority: int,
+                image_hash: Optional[int] = None, context: Optional[Dict[str, str]] = None) -> Dict[str, Future]:
+        """Queue an analysis task, or join an identical one already in flight
+
+        Returns one future per result type the task produces ("combined"
+        and "update" produce both "describe" and "content"). context holds
+        the previous results an "update" builds on.
+        """
+        kinds = ANALYSIS_TYPES if analysis_type in JSON_ANALYSIS_TYPES else (analysis_type,)
+
+        with self._inflight_lock:
+            existing = {kind: self._find_inflight_locked(kind, url, image_hash) for kind in kinds}
+            if all(existing.values()):
+                self._coalesced += 1
+                if priority == FOREGROUND_PRIORITY:
+                    for _, pending_task in existing.values():
+                        self._promote_locked(pending_task)
+                return {kind: entry[0] for kind, entry in existing.items()}
+
+            futures = {kind: Future() for kind in kinds}
+            task_id = next(self._sequence)
+            task = {
+                'id': task_id,
+                'epoch': self._current_epoch,
+                'url': url,
+                'screenshot': screenshot,
+                'image_hash': image_hash,
+                'analysis_type': analysis_type,
+                'context': context,
+                'priority': priority,
+                'futures': futures,
+                'claimed': False,
+                'cancelled': False,
+                'request_future': None,
+                'timestamp': time.time()
+            }
+            self._tasks[task_id] = task
+            for kind, future in futures.items():
+                self._register_inflight_locked(kind, url, image_hash, future, task)
+
+        self.processing_queue.put((priority, task_id, task))
+        return futures
+
+    def _worker_loop(self):
+        """Take tasks from the priority queue and analyze them"""
+        while True:
+            _, _, task = self.processing_queue.get()
+
+            # A promoted task sits in the queue twice; only the first pull runs it.
+            # Tasks cancelled by navigation are dropped here.
+            with self._inflight_lock:
+                skip = task['claimed'] or task['cancelled']
+                task['claimed'] = True
+            if skip:
+                if task['cancelled']:
+                    with self._inflight_lock:
+                        self._forget_task_locked(task)
+                self.processing_queue.task_done()
+                continue
+
+            futures = task['futures']
+            wait_time = time.time() - task['timestamp']
+
+            with self._stats_lock:
+                self._busy_workers += 1
+                self._total_wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
 
-                except Exception as e:
-                    print(f"❌ Error in background processing: {e}")
+            try:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_running_or_notify_cancel()
+
+                url = task['url']
+                analysis_type = task['analysis_type']
+                if task['priority'] == BACKGROUND_PRIORITY:
+                    print(f"🤖 Processing {analysis_type} in background: {url}")
+
+                if analysis_type in JSON_ANALYSIS_TYPES:
+                    results = self._analyze_combined(task['screenshot'], task, analysis_type)
+                else:
+                    results = {analysis_type: self._analyze_screenshot(task['screenshot'], analysis_type, task)}
+
+                for result_type, value in results.items():
+                    if value:
+                        self._store_result(result_type, url, task['image_hash'], value)
+                        if url:
+                            print(f"✅ Cached {result_type} for: {url}")
+
+                for kind, future in futures.items():
+                    if not future.done():
+                        future.set_result(results.get(kind))
+
+            except Exception as e:
+                print(f"❌ Error in background processing: {e}")
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+
+            finally:
+                with self._inflight_lock:
+                    self._tasks.pop(task['id'], None)
+                with self._stats_lock:
+                    self._busy_workers -= 1
+                    self._tasks_completed += 1
+                self.processing_queue.task_done()
+
+    def on_navigation(self, url: str, epoch: int):
+        """Cancel background analyses of pages the user has navigated away from
+
+        Queued tasks are forgotten at once, releasing their screenshots,
+        and skipped when a worker reaches them; running ones have their API
+        request aborted. Their futures resolve to None so waiters move on.
+        """
+        with self._inflight_lock:
+            self._current_epoch = epoch
+            stale = [task for task in self._tasks.values()
+                     if task['priority'] == BACKGROUND_PRIORITY and not task['cancelled']
+                     and task['epoch'] < epoch and task['url'] != url]
+            for task in stale:
+                task['cancelled'] = True
+                if not task['claimed']:
+                    self._forget_task_locked(task)
+            self._cancelled += len(stale)
+
+        for task in stale:
+            print(f"🚫 Dropping stale analysis for: {task['url']}")
+            request_future = task['request_future']
+            if request_future is not None:
+                request_future.cancel()
+            for future in task['futures'].values():
+                if not future.done():
+                    future.set_result(None)
+
+    def _forget_task_locked(self, task: Dict):
+        """Drop a task that will never run from the registries (lock must be held)"""
+        self._tasks.pop(task['id'], None)
+        for key, (_, pending_task) in list(self._inflight.items()):
+            if pending_task is task:
+                del self._inflight[key]
+        self._inflight_hashes[:] = [entry for entry in self._inflight_hashes if entry[4] is not task]
+        task['screenshot'] = None
+
+    def _find_inflight_locked(self, analysis_type: str, url: Optional[str], image_hash: Optional[int]):
+        """Return (future, task) of a pending analysis of the same page (lock must be held)
+
+        A similar screenshot only matches when one side has no URL: its
+        result is cached under the URL that queued it, so a waiter for a
+        different URL would never find it there.
+        """
+        if url:
+            entry = self._inflight.get((analysis_type, url))
+            if entry:
+                return entry
+
+        if image_hash is not None:
+            for pending_hash, kind, pending_url, future, task in self._inflight_hashes:
+                if kind != analysis_type or (url and pending_url and pending_url != url):
+                    continue
+                if hamming_distance(pending_hash, image_hash) <= self.hash_threshold:
+                    return future, task
+
+        return None
+
+    def _find_inflight(self, analysis_type: str, url: Optional[str], image_hash: Optional[int] = None):
+        with self._inflight_lock:
+            return self._find_inflight_locked(analysis_type, url, image_hash)
+
+    def _register_inflight_locked(self, analysis_type: str, url: Optional[str], image_hash: Optional[int],
+                                  future: Future, task: Optional[Dict]):
+        """Track a pending result until its future completes (lock must be held)"""
+        key = (analysis_type, url)
+        if url:
+            self._inflight[key] = (future, task)
+
+        hash_entry = None
+        if image_hash is not None:
+            hash_entry = (image_hash, analysis_type, url, future, task)
+            self._inflight_hashes.append(hash_entry)
+
+        def unregister(_future):
+            with self._inflight_lock:
+                if url and self._inflight.get(key, (None,))[0] is future:
+                    del self._inflight[key]
+                if hash_entry is not None and hash_entry in self._inflight_hashes:
+                    self._inflight_hashes.remove(hash_entry)
+
+        future.add_done_callback(unregister)
+
+    def _promote_locked(self, task: Optional[Dict]):
+        """Requeue a waiting background task at foreground priority (lock must be held)"""
+        if task is None or task['claimed'] or task['priority'] == FOREGROUND_PRIORITY:
+            return
+        task['priority'] = FOREGROUND_PRIORITY
+        self.processing_queue.put((FOREGROUND_PRIORITY, next(self._sequence), task))
+
+    def _count_coalesced(self):
+        with self._inflight_lock:
+            self._coalesced += 1
+
+    def wait_for_pending(self, analysis_type: str, url: Optional[str] = None,
+                         image_hash: Optional[int] = None, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait for an analysis of the same page that is already in flight
+
+        Returns its result, or None when nothing matching is pending (or it
+        failed), in which case the caller should run its own analysis.
+        """
+        with self._inflight_lock:
+            entry = self._find_inflight_locked(analysis_type, url, image_hash)
+            if not entry:
+                return None
+            future, task = entry
+            self._coalesced += 1
+            self._promote_locked(task)
 
-            time.sleep(1)  # Check every second
+        print(f"🔗 Waiting for in-flight {analysis_type} of {url} instead of a new API call")
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            print(f"⚠️ In-flight analysis did not complete: {e}")
+            return None
 
-    def get_page_description(self, screenshot_path: str, url: str = None) -> str:
+    def _new_hash_index(self) -> HashIndex:
+        return HashIndex(bits=self.hash_size * self.hash_size, max_threshold=self.hash_threshold)
+
+    def _hash_key(self, image_hash: int) -> str:
+        return f"{PHASH_PREFIX}{image_hash:x}"
+
+    def _lookup_by_hash(self, analysis_type: str, image_hash: int, url: Optional[str] = None) -> Optional[str]:
+        """Return a result cached for a perceptually similar screenshot
+
+        A hit is also stored under url, so later lookups of the page, and a
+        resumed crawl, find it there without hashing a screenshot.
+        """
+        for distance, candidate in self.hash_index.search(image_hash, self.hash_threshold):
+            key = self._hash_key(candidate)
+            value = self.cache.get(analysis_type, key)
+            if value:
+                print(f"🖼️ Perceptual cache hit for {analysis_type} (distance {distance})")
+                if url:
+                    self._store_result(analysis_type, url, image_hash, value)
+                return value
+            if not any(self.cache.contains(kind, key) for kind in ANALYSIS_TYPES):
+                # Expired or evicted from the backing store
+                self.hash_index.remove(candidate)
+        return None
+
+    def _cached_for_render(self, analysis_type: str, url: Optional[str], image_hash: Optional[int]) -> bool:
+        """A result is cached under url and came from a screenshot matching image_hash
+
+        Results stored without a screenshot (e.g. content read from the DOM)
+        can't be compared and count as current.
+        """
+        if not url or not self.cache.contains(analysis_type, url):
+            return False
+        stored = self.cache.get(RENDER_HASH_KIND, url) if image_hash is not None else None
+        if stored is None:
+            return True
+        try:
+            return hamming_distance(int(stored, 16), image_hash) <= self.hash_threshold
+        except ValueError:
+            return True
+
+    def _store_result(self, analysis_type: str, url: Optional[str], image_hash: Optional[int], value: str):
+        """Cache a result under its URL and its screenshot hash"""
+        if url:
+            self.cache.set(analysis_type, url, value)
+            if image_hash is not None:
+                self.cache.set(RENDER_HASH_KIND, url, f"{image_hash:x}")
+        if image_hash is not None:
+            self.cache.set(analysis_type, self._hash_key(image_hash), value)
+            self.hash_index.add(image_hash)
+
+    def get_cached_description(self, url: str) -> Optional[str]:
+        """Return cached description for a URL, if any"""
+        return self.cache.get("describe", url) if url else None
+
+    def get_cached_content(self, url: str) -> Optional[str]:
+        """Return cached main content for a URL, if any"""
+        return self.cache.get("content", url) if url else None
+
+    def has_cached_analysis(self, url: str) -> bool:
+        """Whether every analysis of a URL is cached"""
+        return bool(url) and all(self.cache.contains(kind, url) for kind in ANALYSIS_TYPES)
+
+    def invalidate(self, url: str):
+        """Drop every cached analysis for a URL, and results of renders like its last one
+
+        Otherwise an unchanged page would be answered again from the hash
+        index, and a refresh would not re-analyze anything.
+        """
+        if url:
+            previous = {kind: self.cache.get(kind, url) for kind in ANALYSIS_TYPES}
+            if all(previous.values()):
+                self._invalidated = (url, previous)
+            render = self.cache.get(RENDER_HASH_KIND, url)
+            self.cache.delete(url)
+            if render:
+                try:
+                    image_hash = int(render, 16)
+                except ValueError:
+                    image_hash = None
+                if image_hash is not None:
+                    for _, candidate in self.hash_index.search(image_hash, self.hash_threshold):
+                        self.hash_index.remove(candidate)
+                        self.cache.delete(self._hash_key(candidate))
+            print(f"🗑️ Cache invalidated for: {url}")
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Return cache size and hit/miss/eviction counters"""
+        return self.cache.stats()
+
+    def get_queue_stats(self) -> Dict[str, float]:
+        """Return queue depth, wait time and worker usage for sizing the pool"""
+        with self._stats_lock:
+            completed = self._tasks_completed
+            return {
+                'queue_depth': self.processing_queue.qsize(),
+                'max_workers': self.max_workers,
+                'busy_workers': self._busy_workers,
+                'worker_utilization': self._busy_workers / self.max_workers,
+                'tasks_completed': completed,
+                'avg_wait_time': self._total_wait_time / completed if completed else 0.0,
+                'max_wait_time': self._max_wait_time,
+                'inflight_requests': len(self._inflight) + len(self._inflight_hashes),
+                'coalesced_requests': self._coalesced,
+                'cancelled_tasks': self._cancelled,
+            }
+
+    def get_page_description(self, screenshot: Screenshot, url: str = None) -> str:
         """Get page description - check cache first"""
-        if url and url in self.description_cache:
-            print("📋 Using cached description")
-            return self.description_cache[url]
+        cached = self.get_cached_description(url)
+        if cached:
+            print(f"📋 Using cached description for: {url}")
+            print("✅ No API call needed - returning from cache")
+            return cached
 
-        # Not in cache, analyze now
-        description = self._analyze_screenshot(screenshot_path, "describe")
+        # Same render seen before under another URL?
+        image_hash = hash_screenshot(screenshot, self.hash_size)
+        if image_hash is not None:
+            cached = self._lookup_by_hash("describe", image_hash, url)
+            if cached:
+                return cached
+
+        # Not in cache, analyze now ahead of any background work
+        print(f"🔍 No cache found for: {url} - analyzing with OpenAI...")
+        description = self._wait_foreground(
+            self._submit(screenshot, "describe", url, FOREGROUND_PRIORITY, image_hash)["describe"])
 
         if description and url:
-            self.description_cache[url] = description
+            print(f"💾 Saved description to cache for: {url}")
 
         return description or "Could not analyze page"
 
-    def get_main_content(self, screenshot_path: str, url: str = None) -> str:
+    def get_main_content(self, screenshot: Screenshot, url: str = None) -> str:
         """Get main content - check cache first"""
-        if url and url in self.content_cache:
-            print("📋 Using cached content")
-            return self.content_cache[url]
+        cached = self.get_cached_content(url)
+        if cached:
+            print(f"📋 Using cached content for: {url}")
+            print("✅ No API call needed - returning from cache")
+            return cached
+
+        # Same render seen before under another URL?
+        image_hash = hash_screenshot(screenshot, self.hash_size)
+        if image_hash is not None:
+            cached = self._lookup_by_hash("content", image_hash, url)
+            if cached:
+                return cached
 
-        # Not in cache, analyze now
-        content = self._analyze_screenshot(screenshot_path, "content")
+        # Not in cache, analyze now ahead of any background work
+        print(f"🔍 No cache found for: {url} - analyzing with OpenAI...")
+        content = self._wait_foreground(
+            self._submit(screenshot, "content", url, FOREGROUND_PRIORITY, image_hash)["content"])
 
         if content and url:
-            self.content_cache[url] = content
+            print(f"💾 Saved content to cache for: {url}")
 
         return content or "Could not read content"
 
-    def _analyze_screenshot(self, screenshot_path: str, analysis_type: str) -> Optional[str]:
-        """Analyze screenshot with OpenAI"""
-        if not self.openai_client:
-            return "OpenAI not configured - check API key"
+    def _wait_foreground(self, future: Future) -> Optional[str]:
+        """Result of a foreground analysis, or None if it takes longer than FOREGROUND_TIMEOUT
 
+        The analysis itself keeps running and is cached when it completes.
+        """
         try:
-            base64_image = self.encode_image_to_base64(screenshot_path)
-            if not base64_image:
-                return None
+            return future.result(FOREGROUND_TIMEOUT)
+        except FutureTimeoutError:
+            print(f"⏱️ Analysis took over {FOREGROUND_TIMEOUT:.0f}s - not waiting any longer")
+            return None
 
-            if analysis_type == "describe":
-                prompt = "Describe this webpage briefly. Focus on key navigation elements and main content. Keep it concise."
-            else:  # content
-                prompt = "Summarize the main content of this page. Ignore menus, ads, and navigation. Be brief and direct."
-
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{
-                    "role": "user",
-                    "content": [{
-                        "type": "text",
-                        "text": prompt
-                    }, {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{base64_image}"}
-                    }]
-                }],
-                max_tokens=300
-            )
-
-            return response.choices[0].message.content
+    def stream_page_description(self, screenshot: Screenshot, url: str = None) -> Iterator[str]:
+        """Yield the page description sentence by sentence as it is generated"""
+        return self._stream_analysis(screenshot, "describe", url, "Could not analyze page")
+
+    def stream_main_content(self, screenshot: Screenshot, url: str = None) -> Iterator[str]:
+        """Yield the main content summary sentence by sentence as it is generated"""
+        return self._stream_analysis(screenshot, "content", url, "Could not read content")
+
+    def _stream_analysis(self, screenshot: Screenshot, analysis_type: str, url: Optional[str],
+                         fallback: str) -> Iterator[str]:
+        """Stream an analysis, caching the full text once it completes"""
+        cached = self.cache.get(analysis_type, url) if url else None
+        image_hash = None
+        if not cached:
+            image_hash = hash_screenshot(screenshot, self.hash_size)
+            if image_hash is not None:
+                cached = self._lookup_by_hash(analysis_type, image_hash, url)
+
+        if cached:
+            print(f"📋 Using cached {analysis_type} for: {url}")
+            yield from split_sentences([cached])
+            return
 
-        except Exception as e:
-            print(f"❌ OpenAI analysis error: {e}")
-            return f"Error analyzing: {str(e)}"
+        # Same page already being analyzed: wait for it rather than paying twice
+        pending = self.wait_for_pending(analysis_type, url, image_hash)
+        if pending:
+            yield from split_sentences([pending])
+            return
+
+        # Register the stream so background requests for this page join it
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._inflight_lock:
+            self._register_inflight_locked(analysis_type, url, image_hash, future, None)
 
-    def encode_image_to_base64(self, image_path):
-        """Encode image to base64"""
+        text = None
+        try:
+            print(f"🔍 No cache found for: {url} - streaming analysis from OpenAI...")
+            tokens = self._stream_screenshot_tokens(screenshot, analysis_type)
+            text = yield from self._stream_and_cache(tokens, analysis_type, url, image_hash, fallback)
+        finally:
+            future.set_result(text)
+
+    def stream_text_summary(self, text: str, url: str = None) -> Iterator[str]:
+        """Yield a summary of already-extracted page text from the text-only model"""
+        request = {
+            "model": TEXT_MODEL,
+            "messages": [{
+                "role": "user",
+                "content": f"{TEXT_SUMMARY_PROMPT}\n\n{text[:MAX_TEXT_CHARS]}"
+            }],
+            "max_tokens": MAX_TOKENS["content"]
+        }
+        print(f"📝 Summarizing {len(text)} chars of page text with {TEXT_MODEL}")
+        return self._stream_and_cache(self._stream_tokens(request), "content", url, None,
+                                      "Could not read content")
+
+    def store_content(self, url: str, content: str):
+        """Cache main content obtained without a vision call"""
+        if url and content:
+            self.cache.set("content", url, content)
+
+    def _stream_and_cache(self, tokens: Iterator[str], analysis_type: str, url: Optional[str],
+                          image_hash: Optional[int], fallback: str) -> Generator[str, None, Optional[str]]:
+        """Split a token stream into sentences, caching the full text at the end
+
+        Returns the full text (None on failure) as the generator's value.
+        """
+        sentences = []
         try:
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode('utf-8')
+            for sentence in split_sentences(tokens):
+                sentences.append(sentence)
+                yield sentence
         except Exception as e:
-            print(f"❌ Image encoding error: {e}")
+            print(f"❌ OpenAI streaming error: {e}")
+            if not sentences:
+                yield fallback
             return None
 
-    def clear_cache(self):
-        """Clear all caches"""
-        self.description_cache.clear()
-        self.content_cache.clear()
-        print("🗑️ Cache cleared")
+        if not sentences:
+            yield fallback
+            return None
 
-    # Añadir estos métodos mejorados a la clase VisionService:
+        text = " ".join(sentences)
+        self._store_result(analysis_type, url, image_hash, text)
+        print(f"💾 Saved streamed {analysis_type} to cache for: {url}")
+        return text
 
-    def get_page_description(self, screenshot_path: str, url: str = None) -> str:
-        """Get page description - check cache first"""
-        if url and url in self.description_cache:
-            print(f"📋 Using cached description for: {url}")
-            print("✅ No API call needed - returning from cache")
-            return self.description_cache[url]
+    def _stream_screenshot_tokens(self, screenshot: Screenshot, analysis_type: str) -> Iterator[str]:
+        """Yield completion text deltas for a screenshot analysis"""
+        request = self._build_request(screenshot, analysis_type)
+        if request:
+            yield from self._stream_tokens(request)
 
-        # Not in cache, analyze now
-        print(f"🔍 No cache found for: {url} - analyzing with OpenAI...")
-        description = self._analyze_screenshot(screenshot_path, "describe")
+    def _stream_tokens(self, request: Dict) -> Iterator[str]:
+        """Yield completion text deltas as they arrive"""
+        if not self.openai_client:
+            raise VisionError("OpenAI not configured - check API key")
 
-        if description and url:
-            self.description_cache[url] = description
-            print(f"💾 Saved description to cache for: {url}")
+        yield from self.openai_client.stream(request, timeout=FOREGROUND_TIMEOUT)
 
-        return description or "Could not analyze page"
+    def _build_request(self, screenshot: Screenshot, analysis_type: str,
+                       context: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """Build chat completion arguments for a screenshot analysis"""
+        image_urls = self._prepare_image_urls(screenshot)
+        if not image_urls:
+            return None
 
-    def get_main_content(self, screenshot_path: str, url: str = None) -> str:
-        """Get main content - check cache first"""
-        if url and url in self.content_cache:
-            print(f"📋 Using cached content for: {url}")
-            print("✅ No API call needed - returning from cache")
-            return self.content_cache[url]
+        prompt = PROMPTS[analysis_type].format(**context) if context else PROMPTS[analysis_type]
+        if len(image_urls) > 1 and analysis_type != "update":
+            prompt += f" The page is split into {len(image_urls)} images, top to bottom."
+
+        content = [{"type": "text", "text": prompt}]
+        content.extend({"type": "image_url", "image_url": {"url": url}} for url in image_urls)
+
+        request = {
+            "model": "gpt-4o",
+            "messages": [{
+                "role": "user",
+                "content": content
+            }],
+            "max_tokens": MAX_TOKENS[analysis_type]
+        }
+        if analysis_type in JSON_ANALYSIS_TYPES:
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    def _analyze_screenshot(self, screenshot: Screenshot, analysis_type: str,
+                            task: Optional[Dict] = None) -> Optional[str]:
+        """Analyze screenshot with OpenAI"""
+        if not self.openai_client:
+            print("❌ OpenAI not configured - check API key")
+            return None
 
-        # Not in cache, analyze now
-        print(f"🔍 No cache found for: {url} - analyzing with OpenAI...")
-        content = self._analyze_screenshot(screenshot_path, "content")
+        try:
+            request = self._build_request(screenshot, analysis_type, task.get('context') if task else None)
+            if not request:
+                return None
 
-        if content and url:
-            self.content_cache[url] = content
-            print(f"💾 Saved content to cache for: {url}")
+            foreground = task is None or task['priority'] == FOREGROUND_PRIORITY
+            request_future = self.openai_client.submit(request, timeout=FOREGROUND_TIMEOUT if foreground else None)
+            if task is not None:
+                with self._inflight_lock:
+                    task['request_future'] = request_future
+                    if task['cancelled']:
+                        request_future.cancel()
 
-        return content or "Could not read content"
+            return request_future.result()
 
-    def queue_background_analysis(self, url: str, screenshot_path: str):
-        """Queue screenshot for background analysis"""
-        if not self.openai_client:
-            print("⚠️ Cannot queue analysis: OpenAI client not initialized")
-            return
+        except CancelledError:
+            print(f"🚫 Aborted {analysis_type} request for a page no longer shown")
+            return None
 
-        # Check if we already have both caches for this URL
-        if url in self.description_cache and url in self.content_cache:
-            print(f"✅ Already have complete cache for {url} - skipping background analysis")
-            try:
-                os.remove(screenshot_path)
-            except:
-                pass
-            return
+        except Exception as e:
+            # Never return the error as an analysis: it would be cached and spoken
+            print(f"❌ OpenAI analysis error: {e}")
+            return None
 
-        print(f"🔄 Queuing background analysis for: {url}")
-        self.processing_queue.append({
-            'url': url,
-            'screenshot_path': screenshot_path,
-            'timestamp': time.time()
-        })
\ No newline at end of file
+    def _analyze_combined(self, screenshot: Screenshot, task: Optional[Dict] = None,
+                          analysis_type: str = "combined") -> Dict[str, Optional[str]]:
+        """Analyze screenshot once and return both description and content"""
+        raw = self._analyze_screenshot(screenshot, analysis_type, task)
+        if not raw:
+            return {"describe": None, "content": None}
+
+        try:
+            data = json.loads(raw)
+            return {
+                "describe": str(data.get("description") or "").strip() or None,
+                "content": str(data.get("content") or "").strip() or None,
+            }
+        except (ValueError, AttributeError):
+            # Not JSON (e.g. an error message): don't cache it as either field
+            print(f"⚠️ Combined analysis returned unexpected output: {raw[:80]}")
+            return {"describe": None, "content": None}
+
+    def _prepare_image_urls(self, screenshot: Screenshot) -> List[str]:
+        """Preprocess screenshot into upload-ready data URLs"""
+        if self.preprocessor:
+            processed = self.preprocessor.process_screenshot(screenshot)
+            if processed:
+                return processed.data_urls()
+
+        # Fall back to sending the original PNG (the first few tiles of a tiled capture)
+        images = itertools.islice(screenshot, DEFAULT_MAX_TILES) if isinstance(screenshot, TiledScreenshot) else [screenshot]
+        urls = []
+        for image in images:
+            base64_image = self.encode_image_to_base64(image)
+            if base64_image:
+                urls.append(f"data:image/png;base64,{base64_image}")
+        return urls
+
+    def encode_image_to_base64(self, screenshot: Screenshot):
+        """Encode screenshot to base64 PNG"""
+        try:
+            return base64.b64encode(screenshot.png).decode('utf-8')
+        except Exception as e:
+            print(f"❌ Image encoding error: {e}")
+            return None
+
+    def clear_cache(self):
+        """Clear all caches"""
+        self.cache.clear()
+        self.hash_index = self._new_hash_index()
+        print("🗑️ Cache cleared")
+
+    def cleanup(self):
+        """Release client and cache resources"""
+        if self.openai_client:
+            self.openai_client.close()
+        self.cache.close()
@@ -0,0 +1,34 @@
+import json
+import os
+
+from utils.fuzzy_match import FuzzyMatcher
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "benchmarks", "data", "click_corpus.json")
+
+# Share of corpus transcripts whose best match must be the expected label
+MIN_TOP1_ACCURACY = 0.95
+
+
+def test_click_corpus_top1_accuracy():
+    with open(CORPUS, encoding="utf-8") as f:
+        pages = json.load(f)["pages"]
+
+    cases, misses = 0, []
+    for page in pages:
+        matcher = FuzzyMatcher(page["labels"])
+        for case in page["cases"]:
+            cases += 1
+            best = matcher.best(case["transcript"])
+            found = page["labels"][best[1]] if best else None
+            if found != case["expected"]:
+                misses.append((case["transcript"], found, case["expected"]))
+
+    accuracy = 1 - len(misses) / cases
+    assert accuracy >= MIN_TOP1_ACCURACY, f"top-1 accuracy {accuracy:.0%}, misses: {misses}"
+
+
+def test_spelling_outranks_shared_sound():
+    matcher = FuzzyMatcher(["Press", "Pricing", "Products"])
+    assert matcher.labels[matcher.best("price")[1]] == "Pricing"
+    assert matcher.labels[matcher.best("press")[1]] == "Press"
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+
+from services.browser_actor import BACKGROUND
+from services.browser_service import BrowserService
+from services.page_readiness import PageReadiness
+
+
+class FakeDriver:
+    """Enough of a WebDriver for readiness waits: a slow performance log and a page that settles"""
+
+    def __init__(self, log_delay=0.02):
+        self.log_delay = log_delay
+        self.current_url = "about:blank"
+        self.log = []
+
+    def get(self, url):
+        self.current_url = url
+
+    def get_log(self, kind):
+        time.sleep(self.log_delay)
+        entries, self.log = self.log, []
+        return entries
+
+    def execute_script(self, script, *args):
+        if "readyState" in script:
+            return {"readyState": "complete", "quietMs": 1000}
+        return None
+
+
+def network_event(method, request_id):
+    message = {"message": {"method": method, "params": {"requestId": request_id}}}
+    return {"message": json.dumps(message), "timestamp": time.time() * 1000}
+
+
+def test_navigate_while_background_waits_for_readiness():
+    browser = BrowserService(driver=FakeDriver(), block_requests=False)
+    browser.readiness.network_idle = 0.3
+    try:
+        def background_wait():
+            with browser.actor.priority(BACKGROUND):
+                for _ in range(20):
+                    browser.wait_until_ready()
+
+        background = threading.Thread(target=background_wait, daemon=True)
+        background.start()
+        time.sleep(0.1)
+
+        result = []
+        foreground = threading.Thread(target=lambda: result.append(browser.navigate_to("https://example.com")),
+                                      daemon=True)
+        foreground.start()
+        foreground.join(10)
+
+        assert not foreground.is_alive(), "navigate_to deadlocked against a background readiness wait"
+        assert result and result[0][0]
+    finally:
+        browser.cleanup()
+
+
+def test_request_end_read_before_its_start():
+    readiness = PageReadiness(FakeDriver(log_delay=0))
+    readiness._track_requests([network_event("Network.loadingFinished", "1")])
+    readiness._track_requests([network_event("Network.requestWillBeSent", "1")])
+    assert not readiness._inflight
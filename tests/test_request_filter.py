@@ -0,0 +1,67 @@
+from services.request_filter import RESOURCE_TYPE_PATTERNS, RequestFilter, load_blocklist
+
+
+class FakeDriver:
+    """Records the DevTools commands a RequestFilter sends"""
+
+    def __init__(self):
+        self.commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+        return {}
+
+
+def make_filter(tmp_path, *entries):
+    blocklist = tmp_path / "blocklist.txt"
+    blocklist.write_text("# Test rules\n" + "\n".join(entries) + "\n")
+    driver = FakeDriver()
+    request_filter = RequestFilter(driver, blocklist_path=str(blocklist))
+    assert request_filter.enable()
+    return request_filter, driver
+
+
+def test_blocklist_domains_cover_subdomains(tmp_path):
+    path = tmp_path / "blocklist.txt"
+    path.write_text("# Ads\ndoubleclick.net\n\n*/ads/*\n")
+    assert load_blocklist(str(path)) == ["*://doubleclick.net/*", "*.doubleclick.net/*", "*/ads/*"]
+
+
+def test_enable_sends_every_rule(tmp_path):
+    request_filter, driver = make_filter(tmp_path, "tracker.example")
+    blocked = dict(driver.commands)["Network.setBlockedURLs"]["urls"]
+    assert blocked == list(request_filter.rules)
+    assert "*://tracker.example/*" in blocked
+    assert "*.mp4?*" in blocked and "*.woff2" in blocked
+
+
+def test_media_patterns_leave_typescript_alone():
+    assert not any(".ts" in pattern for pattern in RESOURCE_TYPE_PATTERNS["media"])
+
+
+def test_rule_for_attributes_urls_to_rules(tmp_path):
+    request_filter, _ = make_filter(tmp_path, "tracker.example", "*/ads/*")
+    assert request_filter._rule_for("https://tracker.example/pixel.gif") == "blocklist"
+    assert request_filter._rule_for("https://cdn.tracker.example/t.js") == "blocklist"
+    assert request_filter._rule_for("https://site.example/ads/banner.js") == "blocklist"
+    assert request_filter._rule_for("https://site.example/clip.mp4") == "media"
+    assert request_filter._rule_for("https://site.example/clip.mp4?token=1") == "media"
+    assert request_filter._rule_for("https://site.example/font.woff2") == "font"
+    assert request_filter._rule_for("https://site.example/app.ts") == "other"
+    assert request_filter._rule_for("https://site.example/index.html") == "other"
+
+
+def test_rule_for_treats_only_star_as_wildcard(tmp_path):
+    request_filter, _ = make_filter(tmp_path, "*/track[er]/*")
+    # "?" and "[...]" are literal in Network.setBlockedURLs patterns
+    assert request_filter._rule_for("https://site.example/clip.mp4x") == "other"
+    assert request_filter._rule_for("https://site.example/clip.mp4xtoken") == "other"
+    assert request_filter._rule_for("https://site.example/track[er]/1") == "blocklist"
+    assert request_filter._rule_for("https://site.example/tracke/1") == "other"
+
+
+def test_disable_clears_rules(tmp_path):
+    request_filter, driver = make_filter(tmp_path, "tracker.example")
+    request_filter.disable()
+    assert driver.commands[-1] == ("Network.setBlockedURLs", {"urls": []})
+    assert request_filter._rule_for("https://tracker.example/pixel.gif") == "other"
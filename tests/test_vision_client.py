@@ -0,0 +1,132 @@
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from services.vision_client import VisionClient, VisionError
+
+ANSWER = "A test page."
+
+REQUEST = {
+    "model": "gpt-4o",
+    "messages": [{"role": "user", "content": "Describe the page."}],
+    "max_tokens": 100,
+}
+
+
+class FakeOpenAI(http.server.BaseHTTPRequestHandler):
+    """Chat completions endpoint answering each request with the next (status, retry-after) of server.script
+
+    Once the script runs out every request gets a normal completion.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.requests += 1
+            status, retry_after = self.server.script.pop(0) if self.server.script else (200, None)
+
+        if status == 200:
+            payload = {
+                "id": "fake", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+            }
+        else:
+            payload = {"error": {"message": f"fake {status}", "type": "fake"}}
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if retry_after is not None:
+            self.send_header("retry-after", str(retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    server.lock = threading.Lock()
+    server.script = []
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_client(server):
+    clients = []
+
+    def make(**options):
+        client = VisionClient("fake-key", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+                              backoff_base=0.01, **options)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_retries_after_429_honouring_retry_after(server, make_client):
+    server.script = [(429, 0.3)]
+    client = make_client()
+
+    started = time.monotonic()
+    assert client.submit(REQUEST).result() == ANSWER
+
+    assert time.monotonic() - started >= 0.3
+    assert server.requests == 2
+    assert client.get_stats()['retries'] == 1
+
+
+def test_retries_server_errors_then_gives_up(server, make_client):
+    server.script = [(503, None)] * 3
+    client = make_client(max_retries=2)
+
+    with pytest.raises(VisionError):
+        client.submit(REQUEST).result()
+    assert server.requests == 3
+
+
+def test_retry_after_past_deadline_fails_without_waiting(server, make_client):
+    server.script = [(429, 30)]
+    client = make_client(timeout=2.0)
+
+    started = time.monotonic()
+    with pytest.raises(VisionError, match="Deadline"):
+        client.submit(REQUEST).result()
+    assert time.monotonic() - started < 1.0
+    assert server.requests == 1
+
+
+def test_rate_limit_wait_past_deadline_fails_up_front(server, make_client):
+    client = make_client(requests_per_minute=1, timeout=2.0)
+    assert client.submit(REQUEST).result() == ANSWER
+
+    # The request bucket refills in a minute, long after the deadline
+    started = time.monotonic()
+    with pytest.raises(VisionError, match="Rate limit"):
+        client.submit(REQUEST).result()
+    assert time.monotonic() - started < 0.5
+    assert server.requests == 1
+
+
+def test_failed_attempts_refund_their_token_estimate(server, make_client):
+    server.script = [(429, 0)] * 3
+    client = make_client(tokens_per_minute=1000)
+
+    assert client.submit(REQUEST).result() == ANSWER
+    # Only the successful attempt's reported usage stays charged
+    assert client._token_bucket.tokens >= 1000 - 20 - 1
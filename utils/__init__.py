@@ -1,5 +1,8 @@
 from .file_manager import FileManager
 from .logger import setup_logger
+from .text_stream import split_sentences
+from .fuzzy_match import FuzzyMatcher
+from .startup_timer import StartupTimer
 from .constants import *
 
-__all__ = ['FileManager', 'setup_logger']
\ No newline at end of file
+__all__ = ['FileManager', 'setup_logger', 'split_sentences', 'FuzzyMatcher', 'StartupTimer']
\ No newline at end of file
@@ -0,0 +1,256 @@
+import difflib
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the same scoring runs in pure Python
+    np = None
+
+# Scores are 0-100; below this a candidate isn't considered a match
+MIN_MATCH_SCORE = 55
+
+# Share of the final score decided by how prominent an element is
+PROMINENCE_WEIGHT = 0.1
+
+# Only this many best first-stage candidates get the slower token comparison
+RERANK_CANDIDATES = 40
+
+# Words in a spoken command (or a label) that don't identify the target
+FILLER_WORDS = {"the", "a", "an", "on", "button", "link", "icon", "please", "click", "press", "tap"}
+
+NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+    "first": "1st", "second": "2nd", "third": "3rd",
+}
+
+# Multi-word spellings speech recognition produces for single-word labels
+# and vice versa, normalized to one form
+VARIANTS = {
+    "e mail": "email", "check out": "checkout", "sign up": "signup", "log in": "login",
+    "log on": "login", "logon": "login", "log out": "logout", "sign out": "signout",
+    "sign in": "signin", "set up": "setup", "add on": "addon", "web site": "website",
+    "home page": "homepage", "wi fi": "wifi", "drop down": "dropdown",
+}
+_VARIANT_PATTERN = re.compile(r"\b(" + "|".join(re.escape(v) for v in VARIANTS) + r")\b")
+
+_PHONETIC_RULES = [
+    (re.compile(r"^(kn|gn|pn|wr|ps)"), lambda m: m.group(0)[1]),
+    (re.compile(r"^x"), "s"),
+    (re.compile(r"sch"), "sk"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"[sc]h"), "x"),
+    (re.compile(r"th"), "0"),
+    (re.compile(r"gh"), ""),
+    (re.compile(r"wh"), "w"),
+    (re.compile(r"qu"), "kw"),
+    (re.compile(r"dg"), "j"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"[cq]"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"z"), "s"),
+]
+
+
+def normalize(text: str) -> List[str]:
+    """Lower-case tokens with accents, punctuation, number words, plurals and
+    common spelling variants folded to one form"""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"[(\[]\s*\d+\s*[)\]]", " ", text)  # Counters like "Inbox (12)"
+    text = text.replace("&", " and ").replace("'", "")
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    text = _VARIANT_PATTERN.sub(lambda m: VARIANTS[m.group(1)], text)
+
+    tokens = [_singular(NUMBER_WORDS.get(token, token)) for token in text.split()]
+    meaningful = [token for token in tokens if token not in FILLER_WORDS]
+    return meaningful or tokens
+
+
+def _singular(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def phonetic_key(word: str) -> str:
+    """Rough Metaphone-style sound key: "weather" and "whether" share one"""
+    if not word or word.isdigit():
+        return word
+    for pattern, replacement in _PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    key = word[0] + re.sub(r"[aeiouyhw]", "", word[1:])
+    return re.sub(r"(.)\1+", r"\1", key)
+
+
+def _grams(text: str, size: int) -> Dict[str, float]:
+    """L2-normalized character n-gram counts of a padded string"""
+    text = f" {text} "
+    counts: Dict[str, float] = {}
+    for index in range(max(1, len(text) - size + 1)):
+        gram = text[index:index + size]
+        counts[gram] = counts.get(gram, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in counts.values()))
+    return {gram: value / norm for gram, value in counts.items()}
+
+
+def prominence(rect: Sequence[float], viewport: Sequence[float]) -> float:
+    """0-1 weight of an element from its (x, y, width, height) in a (width, height) viewport
+
+    Elements inside the viewport count more than ones that need scrolling,
+    larger ones more than tiny ones, and higher ones slightly more.
+    """
+    x, y, width, height = rect
+    view_width, view_height = max(1.0, viewport[0]), max(1.0, viewport[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+
+    in_view = y + height > 0 and y < view_height and x + width > 0 and x < view_width
+    # Anything covering 1% of the viewport already counts as large
+    area = min(1.0, (width * height) / (view_width * view_height * 0.01))
+    top = 1.0 - min(1.0, max(0.0, y) / view_height) if in_view else 0.0
+    return (0.6 if in_view else 0.2) + 0.25 * area + 0.15 * top
+
+
+class _Postings:
+    """Inverted index from n-gram to (rows, weights): a sparse candidate matrix
+
+    Multiplying it with a query vector scores every candidate at once, with
+    numpy arrays when available.
+    """
+
+    def __init__(self, vectors: List[Dict[str, float]]):
+        self.size = len(vectors)
+        postings: Dict[str, Tuple[list, list]] = {}
+        for row, vector in enumerate(vectors):
+            for gram, weight in vector.items():
+                rows, weights = postings.setdefault(gram, ([], []))
+                rows.append(row)
+                weights.append(weight)
+
+        if np is not None:
+            postings = {gram: (np.array(rows, dtype=np.int32), np.array(weights, dtype=np.float32))
+                        for gram, (rows, weights) in postings.items()}
+        self.postings = postings
+
+    def dot(self, query: Dict[str, float]):
+        if np is not None:
+            scores = np.zeros(self.size, dtype=np.float32)
+            for gram, weight in query.items():
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    scores[posting[0]] += weight * posting[1]
+            return scores
+
+        scores = [0.0] * self.size
+        for gram, weight in query.items():
+            posting = self.postings.get(gram)
+            if posting is not None:
+                for row, value in zip(*posting):
+                    scores[row] += weight * value
+        return scores
+
+
+class FuzzyMatcher:
+    """Ranks candidate labels against a noisy spoken target
+
+    Similarity combines token overlap (tolerating misspelled and
+    phonetically equal tokens), character trigrams of the label with spaces
+    removed (so "log in" meets "Login") and trigrams of its sound keys.
+    Candidate features are computed once; each query scores all candidates
+    with a sparse matrix product and re-ranks the best few token by token.
+    """
+
+    def __init__(self, labels: Sequence[str]):
+        self.labels = list(labels)
+        self._tokens = [normalize(label) for label in self.labels]
+        self._joined = ["".join(tokens) for tokens in self._tokens]
+        self._phonetic = [[phonetic_key(token) for token in tokens] for tokens in self._tokens]
+        self._chars = _Postings([_grams(joined, 3) for joined in self._joined])
+        self._sounds = _Postings([_grams("".join(keys), 2) for keys in self._phonetic])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def rank(self, query: str, weights: Optional[Sequence[float]] = None,
+             limit: int = 5, min_score: float = MIN_MATCH_SCORE) -> List[Tuple[float, int]]:
+        """Return up to limit (score, index) pairs at or above min_score, best first
+
+        weights are optional per-candidate prominence values in 0-1.
+        """
+        tokens = normalize(query)
+        if not tokens or not self.labels:
+            return []
+        joined = "".join(tokens)
+        keys = [phonetic_key(token) for token in tokens]
+
+        chars = self._chars.dot(_grams(joined, 3))
+        sounds = self._sounds.dot(_grams("".join(keys), 2))
+
+        # First stage over every candidate, second only over the best few
+        first = [0.6 * float(c) + 0.4 * float(s) for c, s in zip(chars, sounds)]
+        shortlist = sorted(range(len(first)), key=first.__getitem__, reverse=True)[:RERANK_CANDIDATES]
+
+        results = []
+        for index in shortlist:
+            if self._joined[index] == joined:
+                similarity = 1.0
+            else:
+                token_score = self._token_score(tokens, keys, index)
+                similarity = 0.5 * token_score + 0.3 * float(chars[index]) + 0.2 * float(sounds[index])
+
+            weight = weights[index] if weights is not None else 1.0
+            score = 100.0 * similarity * (1.0 - PROMINENCE_WEIGHT + PROMINENCE_WEIGHT * weight)
+            if score >= min_score:
+                results.append((round(score, 1), index))
+
+        results.sort(key=lambda item: (-item[0], item[1]))
+        return results[:limit]
+
+    def best(self, query: str, weights: Optional[Sequence[float]] = None) -> Optional[Tuple[float, int]]:
+        """(score, index) of the best match, or None"""
+        ranked = self.rank(query, weights, limit=1)
+        return ranked[0] if ranked else None
+
+    def _token_score(self, tokens: List[str], keys: List[str], index: int) -> float:
+        """How well query tokens are covered by the candidate's, and vice versa"""
+        candidate, candidate_keys = self._tokens[index], self._phonetic[index]
+        if not candidate:
+            return 0.0
+
+        pairs = [[_token_similarity(token, key, other, other_key)
+                  for other, other_key in zip(candidate, candidate_keys)]
+                 for token, key in zip(tokens, keys)]
+        coverage = sum(max(row) for row in pairs) / len(tokens)
+        precision = sum(max(column) for column in zip(*pairs)) / len(candidate)
+        return 0.7 * coverage + 0.3 * precision
+
+
+def _token_similarity(token: str, key: str, other: str, other_key: str) -> float:
+    if token == other:
+        return 1.0
+    ratio = difflib.SequenceMatcher(None, token, other).ratio()
+    if len(token) >= 3 and _common_prefix(token, other) >= max(3, len(token) - 1):
+        # Spoken abbreviation or another form: "tech" for "technology", "price" for "pricing"
+        return max(0.8, ratio)
+    if ratio >= 0.75:
+        return ratio
+    # Sound keys are lossy ("price" and "press" share one), so they only
+    # rescue tokens spelling can't match, and count for less
+    if key == other_key and len(key) > 1:
+        return 0.7
+    return 0.0
+
+
+def _common_prefix(first: str, second: str) -> int:
+    length = 0
+    for a, b in zip(first, second):
+        if a != b:
+            break
+        length += 1
+    return length
@@ -0,0 +1,43 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StartupTimer:
+    """Records how long each startup stage takes, from any thread
+
+    Stages may overlap (services start in parallel), so each is timed on
+    its own and also reported as finished at an offset from the start.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, tuple] = {}  # name -> (duration, finished at)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as stage name"""
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - began)
+
+    def elapsed(self) -> float:
+        """Seconds since the timer was created"""
+        return time.perf_counter() - self.start
+
+    def record(self, name: str, duration: float):
+        finished = time.perf_counter() - self.start
+        with self._lock:
+            self.stages[name] = (duration, finished)
+        print(f"⏱️ {name}: {duration:.2f}s (at {finished:.2f}s)")
+
+    def report(self) -> str:
+        """One line per stage in the order they finished"""
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][1])
+        return "\n".join(f"  {name:<28} {duration:>6.2f}s  done at {finished:>6.2f}s"
+                         for name, (duration, finished) in stages)
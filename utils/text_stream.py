@@ -0,0 +1,34 @@
+import re
+from typing import Iterable, Iterator
+
+# End of sentence: terminal punctuation (optionally followed by a closing
+# quote or bracket) and whitespace, or a line break
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])["\')\]]?\s+|\n+')
+
+# Shorter fragments ("e.g.", "1.") are merged into the following sentence
+MIN_SENTENCE_LENGTH = 20
+
+
+def split_sentences(chunks: Iterable[str], min_length: int = MIN_SENTENCE_LENGTH) -> Iterator[str]:
+    """Turn a stream of text chunks into a stream of complete sentences
+
+    Each sentence is yielded as soon as the boundary after it arrives, so a
+    consumer can start working on it while later chunks are still coming.
+    """
+    buffer = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+
+        start = 0
+        for match in SENTENCE_BOUNDARY.finditer(buffer):
+            sentence = buffer[start:match.end()].strip()
+            if len(sentence) >= min_length:
+                yield sentence
+                start = match.end()
+        buffer = buffer[start:]
+
+    remainder = buffer.strip()
+    if remainder:
+        yield remainder